@@ -21,7 +21,7 @@
 from rest_framework import serializers
 
 from weblate.trans.models import (
-    Project, Component, Translation, Unit, Change, Source,
+    Project, Component, Translation, Unit, Change, Source, RepositoryJob,
 )
 from weblate.lang.models import Language
 from weblate.screenshots.models import Screenshot
@@ -347,6 +347,9 @@ class RepoRequestSerializer(ReadOnlySerializer):
     operation = serializers.ChoiceField(
         choices=('commit', 'pull', 'push', 'reset')
     )
+    method = serializers.ChoiceField(
+        choices=('merge', 'rebase'), required=False
+    )
 
 
 class StatisticsSerializer(ReadOnlySerializer):
@@ -500,3 +503,19 @@ class ChangeSerializer(RemovableSerializer):
                 'view_name': 'api:change-detail',
             },
         }
+
+
+class RepositoryJobSerializer(serializers.ModelSerializer):
+    state_name = serializers.CharField(
+        source='get_state_display', read_only=True
+    )
+    url = serializers.HyperlinkedIdentityField(
+        view_name='api:job-detail',
+    )
+
+    class Meta(object):
+        model = RepositoryJob
+        fields = (
+            'id', 'operation', 'method', 'state', 'state_name', 'result',
+            'message', 'timestamp', 'started', 'finished', 'url',
+        )
@@ -19,13 +19,16 @@
 #
 
 from django.core.files import File
+from django.test.utils import override_settings
 from django.urls import reverse
 
 from rest_framework.test import APITestCase
 
 from weblate.auth.models import User, Group
 from weblate.screenshots.models import Screenshot
-from weblate.trans.models import Project, Change, Unit, Source
+from weblate.trans.models import (
+    Project, Change, Unit, Source, RepositoryJob,
+)
 from weblate.trans.tests.utils import RepoTestMixin, get_test_file
 
 TEST_PO = get_test_file('cs.po')
@@ -140,6 +143,23 @@ class ProjectAPITest(APIBaseTest):
                 request={'operation': operation},
             )
 
+    @override_settings(BACKGROUND_REPOSITORY=True)
+    def test_repo_ops_queued(self):
+        for operation in ('push', 'pull', 'reset', 'commit'):
+            response = self.do_request(
+                'api:project-repository',
+                self.project_kwargs,
+                get=False,
+                superuser=True,
+                request={'operation': operation},
+            )
+            self.assertTrue(response.data['result'])
+            job = RepositoryJob.objects.get(operation=operation)
+            self.assertEqual(job.state, RepositoryJob.STATE_QUEUED)
+            response = self.client.get(response.data['job'])
+            self.assertEqual(response.data['id'], job.pk)
+            self.assertEqual(response.data['state_name'], 'Queued')
+
     def test_repo_invalid(self):
         self.do_request(
             'api:project-repository',
@@ -150,6 +170,45 @@ class ProjectAPITest(APIBaseTest):
             request={'operation': 'invalid'},
         )
 
+    def test_repo_invalid_method(self):
+        self.do_request(
+            'api:project-repository',
+            self.project_kwargs,
+            code=400,
+            get=False,
+            superuser=True,
+            request={'operation': 'pull', 'method': 'invalid'},
+        )
+
+    @override_settings(BACKGROUND_REPOSITORY=True)
+    def test_repo_method_queued(self):
+        self.do_request(
+            'api:project-repository',
+            self.project_kwargs,
+            get=False,
+            superuser=True,
+            request={'operation': 'pull', 'method': 'rebase'},
+        )
+        job = RepositoryJob.objects.get(operation='pull')
+        self.assertEqual(job.method, 'rebase')
+
+    @override_settings(BACKGROUND_REPOSITORY=True)
+    def test_jobs_denied(self):
+        self.do_request(
+            'api:project-repository',
+            self.project_kwargs,
+            get=False,
+            superuser=True,
+            request={'operation': 'pull'},
+        )
+        job = RepositoryJob.objects.get(operation='pull')
+        # Users without repository access do not see job messages
+        response = self.do_request('api:job-list', {})
+        self.assertEqual(response.data['count'], 0)
+        self.do_request('api:job-detail', {'pk': job.pk}, code=404)
+        response = self.do_request('api:job-list', {}, superuser=True)
+        self.assertEqual(response.data['count'], 1)
+
     def test_repo_status_denied(self):
         self.do_request(
             'api:project-repository',
@@ -682,6 +741,8 @@ class MetricsAPITest(APIBaseTest):
         self.authenticate()
         response = self.client.get(reverse('api:metrics'))
         self.assertEqual(response.data['projects'], 1)
+        self.assertIn('more_like_timeouts', response.data)
+        self.assertIn('machinery', response.data)
 
     def test_forbidden(self):
         response = self.client.get(reverse('api:metrics'))
@@ -25,7 +25,7 @@ from django.conf.urls import url, include
 from weblate.api.views import (
     ProjectViewSet, ComponentViewSet, TranslationViewSet, LanguageViewSet,
     UnitViewSet, ChangeViewSet, SourceViewSet, ScreenshotViewSet,
-    Metrics
+    JobViewSet, Metrics
 )
 from weblate.api.routers import WeblateRouter
 
@@ -64,6 +64,11 @@ router.register(
     r'screenshots',
     ScreenshotViewSet
 )
+router.register(
+    r'jobs',
+    JobViewSet,
+    'job',
+)
 
 
 # Wire up our API using automatic URL routing.
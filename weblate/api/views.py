@@ -42,15 +42,18 @@ from weblate.api.serializers import (
     RepoRequestSerializer, StatisticsSerializer, UnitSerializer,
     ChangeSerializer, SourceSerializer, ScreenshotSerializer,
     UploadRequestSerializer, ScreenshotFileSerializer,
+    RepositoryJobSerializer,
 )
 from weblate.auth.models import User
 from weblate.checks.models import Check
 from weblate.formats.exporters import EXPORTERS
+from weblate.machinery.metrics import get_all_metrics
 from weblate.trans.models import (
     Project, Component, Translation, Change, Unit, Source,
-    IndexUpdate, Suggestion,
+    IndexUpdate, Suggestion, RepositoryJob,
 )
 from weblate.trans.stats import get_project_stats
+from weblate.trans.search.workers import get_pool_stats
 from weblate.lang.models import Language
 from weblate.screenshots.models import Screenshot
 from weblate.trans.views.helper import download_translation_file
@@ -149,13 +152,28 @@ class DownloadViewSet(viewsets.ReadOnlyModelViewSet):
 
 class WeblateViewSet(DownloadViewSet):
     """Allow to skip content negotiation for certain requests."""
-    def repository_operation(self, request, obj, project, operation):
+    def repository_operation(self, request, obj, project, operation,
+                             update_method=None):
         permission, method = REPO_OPERATIONS[operation]
+        kwargs = {}
+        if operation == 'pull' and update_method:
+            kwargs['method'] = update_method
 
         if not request.user.has_perm(permission, project):
             raise PermissionDenied()
 
-        return getattr(obj, method)(request)
+        if settings.BACKGROUND_REPOSITORY:
+            job = RepositoryJob.objects.enqueue(
+                obj, operation, request.user, kwargs.get('method')
+            )
+            return {
+                'result': True,
+                'job': reverse(
+                    'api:job-detail', kwargs={'pk': job.pk}, request=request
+                ),
+            }
+
+        return {'result': getattr(obj, method)(request, **kwargs)}
 
     @action(
         detail=True,
@@ -176,12 +194,11 @@ class WeblateViewSet(DownloadViewSet):
             serializer = RepoRequestSerializer(data=request.data)
             serializer.is_valid(raise_exception=True)
 
-            data = {
-                'result': self.repository_operation(
-                    request, obj, project,
-                    serializer.validated_data['operation']
-                )
-            }
+            data = self.repository_operation(
+                request, obj, project,
+                serializer.validated_data['operation'],
+                serializer.validated_data.get('method'),
+            )
 
             storage = get_messages(request)
             if storage:
@@ -602,6 +619,23 @@ class ChangeViewSet(viewsets.ReadOnlyModelViewSet):
         return Change.objects.last_changes(self.request.user).order_by('id')
 
 
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Queued repository operations API"""
+
+    queryset = RepositoryJob.objects.none()
+    serializer_class = RepositoryJobSerializer
+
+    def get_queryset(self):
+        user = self.request.user
+        # Job messages contain repository output, same as the status
+        return RepositoryJob.objects.filter(
+            project__in=[
+                project.pk for project in user.allowed_projects
+                if user.has_perm('meta:vcs.status', project)
+            ]
+        ).order_by('id')
+
+
 class Metrics(APIView):
     """Metrics view for monitoring"""
     permission_classes = (IsAuthenticated,)
@@ -611,6 +645,7 @@ class Metrics(APIView):
         """
         Return a list of all users.
         """
+        more_like = get_pool_stats()
         return Response({
             'units': Unit.objects.count(),
             'units_translated': Unit.objects.filter(
@@ -627,5 +662,9 @@ class Metrics(APIView):
             'checks': Check.objects.count(),
             'suggestions': Suggestion.objects.count(),
             'index_updates': IndexUpdate.objects.count(),
+            'more_like_queue': more_like['queue'],
+            'more_like_timeouts': more_like['timeouts'],
+            'more_like_rejected': more_like['rejected'],
+            'machinery': get_all_metrics(),
             'name': settings.SITE_TITLE,
         })
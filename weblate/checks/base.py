@@ -32,6 +32,9 @@ class Check(object):
     default_disabled = False
     severity = 'info'
     enable_check_value = False
+    # Whether the check queries database, these can not be evaluated
+    # in parallel worker processes
+    needs_database = False
 
     def get_identifier(self):
         return self.check_id
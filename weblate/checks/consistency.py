@@ -74,6 +74,7 @@ class ConsistencyCheck(TargetCheck):
     )
     ignore_untranslated = False
     severity = 'warning'
+    needs_database = True
 
     def check_target_unit(self, sources, targets, unit):
         # Do not check consistency if user asked not to have it
@@ -104,6 +105,7 @@ class TranslatedCheck(TargetCheck):
     )
     ignore_untranslated = False
     severity = 'warning'
+    needs_database = True
 
     def check_target_unit(self, sources, targets, unit):
         if unit.translated:
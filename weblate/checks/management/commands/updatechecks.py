@@ -18,18 +18,81 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from collections import defaultdict, deque
+import multiprocessing
+
+from weblate.checks.runner import (
+    CheckRunner, evaluate_snapshots, update_translation_checks,
+)
 from weblate.trans.management.commands import WeblateLangCommand
 
 
 class Command(WeblateLangCommand):
     help = 'updates checks for units'
 
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            dest='jobs',
+            default=1,
+            help='Number of worker processes to evaluate checks',
+        )
+
     def handle(self, *args, **options):
-        translations = {}
-        for unit in self.iterate_units(*args, **options):
-            unit.run_checks()
-            if unit.translation.id not in translations:
-                translations[unit.translation.id] = unit.translation
-
-        for translation in translations.values():
-            translation.invalidate_cache()
+        translations = self.get_translations(**options)
+        if options['jobs'] > 1:
+            self.handle_parallel(translations, options['jobs'])
+        else:
+            for translation in translations:
+                self.stdout.write('Processing {0}'.format(translation))
+                update_translation_checks(translation)
+        self.stdout.write('Operation completed')
+
+    def handle_parallel(self, translations, jobs):
+        """Evaluate checks in worker processes.
+
+        The workers do not access the database, all results are stored
+        from this process.
+        """
+        # Units and time spent per worker
+        stats = defaultdict(lambda: [0, 0.0])
+        pending = deque()
+        pool = multiprocessing.Pool(jobs)
+        try:
+            for translation in translations:
+                self.stdout.write('Processing {0}'.format(translation))
+                runner = CheckRunner(translation)
+                for unit in translation.unit_set.all():
+                    runner.add(unit)
+                runner.prepare()
+                pending.append((
+                    runner,
+                    pool.apply_async(
+                        evaluate_snapshots, (runner.get_snapshots(), )
+                    )
+                ))
+                # Limit number of translations kept in memory
+                if len(pending) > 2 * jobs:
+                    self.store_results(stats, *pending.popleft())
+            while pending:
+                self.store_results(stats, *pending.popleft())
+        finally:
+            pool.close()
+            pool.join()
+
+        for pid, (units, elapsed) in sorted(stats.items()):
+            self.stdout.write(
+                'Worker {0}: {1} units, {2:.1f} units/s'.format(
+                    pid, units, units / elapsed if elapsed else 0.0
+                )
+            )
+
+    @staticmethod
+    def store_results(stats, runner, result):
+        pid, elapsed, results = result.get()
+        stats[pid][0] += len(results)
+        stats[pid][1] += elapsed
+        runner.run(results)
+        runner.translation.invalidate_cache()
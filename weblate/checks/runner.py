@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Batch execution of quality checks."""
+
+from __future__ import unicode_literals
+
+from collections import OrderedDict, defaultdict
+import os
+import time
+
+from django.db.models import BooleanField, Case, Exists, OuterRef, Q, When
+
+from weblate.checks import CHECKS
+from weblate.checks.models import Check
+from weblate.utils.state import STATE_TRANSLATED
+
+
+def check_target(unit, sources, targets, checks):
+    """Return set of failing target checks."""
+    return {
+        check for check, check_obj in checks.items()
+        if check_obj.target and check_obj.check_target(sources, targets, unit)
+    }
+
+
+def check_source(unit, sources, checks):
+    """Return set of failing source checks."""
+    return {
+        check for check, check_obj in checks.items()
+        if check_obj.source and check_obj.check_source(sources, unit)
+    }
+
+
+class Snapshot(object):
+    """Picklable object holding given attributes."""
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class UnitSnapshot(object):
+    """Copy of unit data used by checks not needing database.
+
+    This is passed to worker processes instead of the unit.
+    """
+    def __init__(self, unit, translation):
+        self.pk = unit.pk
+        self.content_hash = unit.content_hash
+        self.context = unit.context
+        self.comment = unit.comment
+        self.state = unit.state
+        self.translated = unit.translated
+        self.fuzzy = unit.fuzzy
+        self.approved = unit.approved
+        self.all_flags = unit.all_flags
+        self.sources = unit.get_source_plurals()
+        self.targets = unit.get_target_plurals()
+        self.translation = translation
+
+    @staticmethod
+    def snapshot_translation(translation):
+        """Return snapshot of translation attributes used by checks."""
+        component = translation.component
+        return Snapshot(
+            pk=translation.pk,
+            is_template=translation.is_template,
+            language=Snapshot(code=translation.language.code),
+            component=Snapshot(
+                allow_translation_propagation=(
+                    component.allow_translation_propagation
+                ),
+                project=Snapshot(
+                    source_language=Snapshot(
+                        code=component.project.source_language.code
+                    ),
+                ),
+            ),
+        )
+
+
+def evaluate_snapshots(snapshots):
+    """Evaluate checks on unit snapshots.
+
+    This is executed in worker processes and does not touch the database.
+    Returns process ID, time spent and sets of failing target and source
+    checks for each unit.
+    """
+    start = time.time()
+    result = []
+    for unit, check_ids in snapshots:
+        checks = {check: CHECKS[check] for check in check_ids}
+        result.append((
+            check_target(unit, unit.sources, unit.targets, checks),
+            check_source(unit, unit.sources, checks),
+        ))
+    return os.getpid(), time.time() - start, result
+
+
+class CheckRunner(object):
+    """Run checks for units of single translation in a batch.
+
+    Existing checks are loaded in one query, all checks are evaluated in
+    memory and the differences are stored using bulk create and single
+    delete. The failing checks flag is then updated with one query.
+    """
+    def __init__(self, translation):
+        self.translation = translation
+        self.project = translation.component.project
+        self.language = translation.language
+        self.units = []
+        # Existing checks keyed by content hash and language id
+        self.existing = defaultdict(dict)
+        self.created = OrderedDict()
+        self.deleted = []
+        # Content hashes with changed target checks
+        self.changed = set()
+        self.checks = None
+        self._translated = None
+
+    def add(self, unit, same_state=True, is_new=False):
+        """Add unit to process, the flags have same meaning as in
+        Unit.run_checks.
+        """
+        self.units.append((unit, same_state, is_new))
+
+    @property
+    def translated(self):
+        """Content hashes having translated units in this language."""
+        if self._translated is None:
+            from weblate.trans.models import Unit
+            self._translated = set(Unit.objects.filter(
+                translation__language=self.language,
+                translation__component__project=self.project,
+                state__gte=STATE_TRANSLATED,
+            ).exclude(
+                translation__component__allow_translation_propagation=False,
+            ).values_list('content_hash', flat=True))
+        return self._translated
+
+    def load(self):
+        """Load existing checks."""
+        checks = Check.objects.filter(
+            Q(language=self.language) | Q(language=None),
+            project=self.project,
+        ).values_list('pk', 'content_hash', 'language', 'check', 'ignore')
+        for pk, content_hash, language, check, ignore in checks:
+            self.existing[(content_hash, language)][check] = (pk, ignore)
+
+    def prepare(self):
+        """Load source flags and decide which checks to run."""
+        flags = dict(
+            self.translation.component.source_set.values_list(
+                'id_hash', 'check_flags'
+            )
+        )
+        for unit, dummy, dummy in self.units:
+            if 'all_flags' not in unit.__dict__:
+                unit.all_flags = unit.get_all_flags(
+                    flags.get(unit.id_hash, '')
+                )
+        self.checks = [
+            (unit, ) + self.get_checks_to_run(unit, same_state, is_new)
+            for unit, same_state, is_new in self.units
+        ]
+
+    def get_snapshots(self):
+        """Return unit snapshots and checks not needing database.
+
+        This can be processed by evaluate_snapshots in other process.
+        """
+        translation = UnitSnapshot.snapshot_translation(self.translation)
+        return [
+            (
+                UnitSnapshot(unit, translation),
+                [
+                    check for check, check_obj in checks_to_run.items()
+                    if not check_obj.needs_database
+                ],
+            )
+            for unit, checks_to_run, dummy, dummy in self.checks
+        ]
+
+    def create(self, content_hash, language, check):
+        """Create check unless it already exists."""
+        key = (content_hash, language.pk if language else None)
+        if check in self.existing[key]:
+            return
+        self.existing[key][check] = (None, False)
+        self.created[(key, check)] = Check(
+            content_hash=content_hash,
+            project=self.project,
+            language=language,
+            ignore=False,
+            check=check,
+        )
+        if language is not None:
+            self.changed.add(content_hash)
+
+    def delete(self, content_hash, language, check):
+        """Delete existing check."""
+        key = (content_hash, language.pk if language else None)
+        pk = self.existing[key].pop(check)[0]
+        if pk is None:
+            del self.created[(key, check)]
+        else:
+            self.deleted.append(pk)
+        if language is not None:
+            self.changed.add(content_hash)
+
+    def get_checks_to_run(self, unit, same_state, is_new):
+        """Return checks to run, whether to do cleanup and whether to
+        remove all target checks.
+
+        This matches Unit.get_checks_to_run, except that it uses
+        preloaded data.
+        """
+        # Run only source checks on template
+        if self.translation.is_template:
+            return (
+                {x: y for x, y in CHECKS.data.items() if y.source},
+                True,
+                False,
+            )
+
+        if (same_state and not is_new) or unit.state >= STATE_TRANSLATED:
+            return CHECKS.data, True, False
+
+        # We run only checks which span across more units
+        checks_to_run = {}
+
+        # Delete all checks if only message with this source is fuzzy
+        purge = unit.content_hash not in self.translated
+        if not purge and 'inconsistent' in CHECKS:
+            # Consistency check checks across more translations
+            checks_to_run['inconsistent'] = CHECKS['inconsistent']
+
+        # Run source checks as well
+        for check in CHECKS:
+            if CHECKS[check].source:
+                checks_to_run[CHECKS[check].check_id] = CHECKS[check]
+
+        return checks_to_run, False, purge
+
+    def update_target(self, unit, failing, cleanup_checks, purge):
+        """Store target checks results for single unit."""
+        key = (unit.content_hash, self.language.pk)
+        if purge:
+            for check in list(self.existing[key]):
+                self.delete(unit.content_hash, self.language, check)
+
+        for check in failing:
+            self.create(unit.content_hash, self.language, check)
+
+        # Delete no longer failing checks
+        if cleanup_checks:
+            for check in set(self.existing[key]) - failing:
+                self.delete(unit.content_hash, self.language, check)
+
+    def update_source(self, unit, failing, cleanup_checks):
+        """Store source checks results for single unit."""
+        for check in failing:
+            self.create(unit.content_hash, None, check)
+
+        # Delete no longer failing checks
+        if cleanup_checks:
+            key = (unit.content_hash, None)
+            for check in set(self.existing[key]) - failing:
+                self.delete(unit.content_hash, None, check)
+
+    def save(self):
+        """Store changed checks."""
+        if self.created:
+            Check.objects.bulk_create(self.created.values())
+            self.created = OrderedDict()
+        if self.deleted:
+            Check.objects.filter(pk__in=self.deleted).delete()
+            self.deleted = []
+
+    def update_flags(self):
+        """Update failing check flag on affected units."""
+        from weblate.trans.models import Unit, Translation
+        units = Unit.objects.filter(translation=self.translation)
+        if self.changed:
+            # Units sharing checks in other components
+            related = Unit.objects.filter(
+                translation__component__project=self.project,
+                translation__language=self.language,
+                content_hash__in=self.changed,
+            ).exclude(
+                translation=self.translation
+            )
+            translations = list(Translation.objects.filter(
+                pk__in=related.values('translation')
+            ).prefetch())
+            if translations:
+                # MySQL can not use subquery on the updated table
+                related = list(related.values_list('pk', flat=True))
+                units = Unit.objects.filter(
+                    Q(translation=self.translation) | Q(pk__in=related)
+                )
+        else:
+            translations = []
+
+        units.update(
+            has_failing_check=Case(
+                When(
+                    state__gte=STATE_TRANSLATED,
+                    then=Exists(Check.objects.filter(
+                        content_hash=OuterRef('content_hash'),
+                        project=self.project,
+                        language=self.language,
+                        ignore=False,
+                    ))
+                ),
+                default=False,
+                output_field=BooleanField(),
+            )
+        )
+
+        # Keep in memory copies in sync
+        for unit, dummy, dummy in self.units:
+            key = (unit.content_hash, self.language.pk)
+            unit.has_failing_check = (
+                unit.state >= STATE_TRANSLATED and
+                any(not ignore for pk, ignore in self.existing[key].values())
+            )
+
+        for translation in translations:
+            translation.invalidate_cache()
+
+    def split_checks(self, database):
+        """Return checks to run for each unit limited to ones (not)
+        needing database.
+        """
+        return [
+            {
+                check: check_obj
+                for check, check_obj in checks_to_run.items()
+                if check_obj.needs_database == database
+            }
+            for dummy, checks_to_run, dummy, dummy in self.checks
+        ]
+
+    def evaluate(self):
+        """Evaluate checks not needing database in this process.
+
+        Returns same results as evaluate_snapshots.
+        """
+        result = []
+        for item, checks in zip(self.checks, self.split_checks(False)):
+            unit = item[0]
+            sources = unit.get_source_plurals()
+            result.append((
+                check_target(
+                    unit, sources, unit.get_target_plurals(), checks
+                ),
+                check_source(unit, sources, checks),
+            ))
+        return result
+
+    def run(self, results=None):
+        """Run checks on all added units.
+
+        The results can contain output of evaluate_snapshots, otherwise
+        all checks are evaluated in this process.
+
+        Target checks are stored before evaluating checks needing database
+        for source strings as these depend on failing target checks.
+        """
+        if not self.units:
+            return
+        if self.checks is None:
+            self.prepare()
+        if results is None:
+            results = self.evaluate()
+        self.load()
+
+        database_checks = self.split_checks(True)
+        items = list(zip(self.checks, results, database_checks))
+
+        for (unit, dummy, cleanup, purge), result, checks in items:
+            failing = result[0] | check_target(
+                unit,
+                unit.get_source_plurals(),
+                unit.get_target_plurals(),
+                checks
+            )
+            self.update_target(unit, failing, cleanup, purge)
+        self.save()
+
+        for (unit, dummy, cleanup, purge), result, checks in items:
+            failing = result[1] | check_source(
+                unit, unit.get_source_plurals(), checks
+            )
+            self.update_source(unit, failing, cleanup)
+        self.save()
+
+        self.update_flags()
+
+
+def update_translation_checks(translation):
+    """Run all checks on all units of translation.
+
+    Returns number of processed units.
+    """
+    runner = CheckRunner(translation)
+    for unit in translation.unit_set.all():
+        runner.add(unit)
+    runner.run()
+    translation.invalidate_cache()
+    return len(runner.units)
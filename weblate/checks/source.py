@@ -68,6 +68,7 @@ class MultipleFailingCheck(SourceCheck):
         'The translations in several languages have failing checks'
     )
     severity = 'warning'
+    needs_database = True
 
     def check_source(self, source, unit):
         related = Language.objects.filter(
@@ -71,3 +71,12 @@ class PeriodicCommandTest(RepoTestCase):
 class UpdateChecksTest(CheckGitTest):
     command_name = 'updatechecks'
     expected_string = 'Processing'
+
+
+class UpdateChecksParallelTest(CheckGitTest):
+    command_name = 'updatechecks'
+    expected_string = 'units/s'
+
+    def do_test(self, *args, **kwargs):
+        kwargs['jobs'] = 2
+        super(UpdateChecksParallelTest, self).do_test(*args, **kwargs)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Tests for batch checks runner."""
+
+from weblate.checks.models import Check
+from weblate.checks.runner import (
+    CheckRunner, evaluate_snapshots, update_translation_checks,
+)
+from weblate.trans.models import Unit
+from weblate.trans.tests.test_models import RepoTestCase
+from weblate.utils.state import STATE_FUZZY
+
+
+class CheckRunnerTest(RepoTestCase):
+    def setUp(self):
+        super(CheckRunnerTest, self).setUp()
+        self.component = self.create_component()
+
+    def get_state(self):
+        return (
+            set(Check.objects.values_list(
+                'content_hash', 'language', 'check', 'ignore'
+            )),
+            set(Unit.objects.values_list('pk', 'has_failing_check')),
+        )
+
+    def test_rebuild(self):
+        """Batch run produces same result as per unit run."""
+        expected = self.get_state()
+        self.assertTrue(expected[0])
+        Check.objects.all().delete()
+        Unit.objects.update(has_failing_check=False)
+        for translation in self.component.translation_set.all():
+            update_translation_checks(translation)
+        self.assertEqual(expected, self.get_state())
+
+    def test_cleanup(self):
+        """Stale checks are removed."""
+        expected = self.get_state()
+        unit = Unit.objects.all()[0]
+        Check.objects.create(
+            content_hash=unit.content_hash,
+            project=self.component.project,
+            language=unit.translation.language,
+            check='same',
+        )
+        update_translation_checks(unit.translation)
+        self.assertEqual(expected, self.get_state())
+
+    def test_fuzzy(self):
+        """Changing to fuzzy removes checks if only translation."""
+        check = Check.objects.exclude(language=None)[0]
+        unit = check.related_units[0]
+        Unit.objects.filter(pk=unit.pk).update(state=STATE_FUZZY)
+        unit = Unit.objects.get(pk=unit.pk)
+        runner = CheckRunner(unit.translation)
+        runner.add(unit, same_state=False)
+        runner.run()
+        self.assertFalse(unit.checks().exists())
+        self.assertFalse(unit.has_failing_check)
+        self.assertFalse(Unit.objects.get(pk=unit.pk).has_failing_check)
+
+    def test_snapshots(self):
+        """Results evaluated from snapshots match in process ones."""
+        expected = self.get_state()
+        Check.objects.all().delete()
+        Unit.objects.update(has_failing_check=False)
+        for translation in self.component.translation_set.all():
+            runner = CheckRunner(translation)
+            for unit in translation.unit_set.all():
+                runner.add(unit)
+            runner.prepare()
+            results = evaluate_snapshots(runner.get_snapshots())[2]
+            runner.run(results)
+        self.assertEqual(expected, self.get_state())
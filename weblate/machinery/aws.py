@@ -21,6 +21,7 @@
 from __future__ import unicode_literals
 
 import boto3
+from botocore.config import Config
 
 from django.conf import settings
 
@@ -39,6 +40,11 @@ class AWSTranslation(MachineTranslation):
             region_name=settings.MT_AWS_REGION,
             aws_access_key_id=settings.MT_AWS_ACCESS_KEY_ID,
             aws_secret_access_key=settings.MT_AWS_SECRET_ACCESS_KEY,
+            config=Config(
+                max_pool_connections=settings.MT_POOL_SIZE,
+                connect_timeout=settings.MT_TIMEOUT,
+                read_timeout=settings.MT_TIMEOUT,
+            ),
         )
 
     def download_languages(self):
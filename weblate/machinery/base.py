@@ -21,11 +21,15 @@
 
 from __future__ import unicode_literals
 
+from collections import OrderedDict
+import os
 import sys
 import json
+import threading
+from time import time
 
-from six.moves.urllib.request import Request, urlopen
-from six.moves.urllib.error import HTTPError
+import requests
+from requests.adapters import HTTPAdapter
 
 from django.core.cache import cache
 from django.conf import settings
@@ -34,11 +38,54 @@ from django.utils.http import urlencode
 
 from weblate import USER_AGENT
 from weblate.logger import LOGGER
+from weblate.machinery.cache import get_results, set_results
+from weblate.machinery.metrics import increment, record_latency
 from weblate.utils.errors import report_error
 from weblate.utils.hash import calculate_hash, hash_to_checksum
 from weblate.utils.site import get_site_url
 
 
+ADAPTER_LOCK = threading.Lock()
+ADAPTER = [None, None]
+# Sessions are not thread safe, so every thread has its own
+SESSIONS = threading.local()
+
+
+def get_adapter():
+    """Return HTTP adapter shared by all threads.
+
+    The adapter keeps connections to the services open, so that these
+    are reused by following requests.
+    """
+    with ADAPTER_LOCK:
+        # Connections can not be shared with forked process
+        if ADAPTER[0] is None or ADAPTER[1] != os.getpid():
+            ADAPTER[0] = HTTPAdapter(pool_maxsize=settings.MT_POOL_SIZE)
+            ADAPTER[1] = os.getpid()
+        return ADAPTER[0]
+
+
+def get_session():
+    """Return HTTP session for current thread using shared adapter."""
+    adapter = get_adapter()
+    session = getattr(SESSIONS, 'session', None)
+    if session is None or session.get_adapter('https://') is not adapter:
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers['User-Agent'] = USER_AGENT
+        SESSIONS.session = session
+    return session
+
+
+def reset_session():
+    """Close all kept connections."""
+    with ADAPTER_LOCK:
+        if ADAPTER[0] is not None:
+            ADAPTER[0].close()
+        ADAPTER[0] = None
+
+
 class MachineTranslationError(Exception):
     """Generic Machine translation error."""
 
@@ -54,6 +101,8 @@ class MachineTranslation(object):
     rank_boost = 0
     default_languages = []
     cache_translations = True
+    # Maximal number of strings translated in single request
+    batch_size = 1
 
     @classmethod
     def get_rank(cls):
@@ -73,16 +122,28 @@ class MachineTranslation(object):
     def get_identifier(self):
         return self.mtid
 
-    def authenticate(self, request):
+    def authenticate(self, headers):
         """Hook for backends to allow add authentication headers to request."""
         return
 
+    def http_request(self, method, url, headers=None, data=None):
+        """Perform HTTP request using shared session."""
+        response = get_session().request(
+            method,
+            url,
+            headers=headers,
+            data=data,
+            timeout=settings.MT_TIMEOUT,
+        )
+        response.raise_for_status()
+        return response
+
     def json_req(self, url, http_post=False, skip_auth=False, raw=False,
                  **kwargs):
         """Perform JSON request."""
         # Encode params
         if kwargs:
-            params = urlencode(kwargs)
+            params = urlencode(kwargs, doseq=True)
         else:
             params = ''
 
@@ -94,23 +155,23 @@ class MachineTranslation(object):
         if params and not http_post:
             url = '?'.join((url, params))
 
-        # Create request object with custom headers
-        request = Request(url)
-        request.timeout = 0.5
-        request.add_header('User-Agent', USER_AGENT)
-        request.add_header('Referer', get_site_url())
+        # Custom headers
+        headers = {'Referer': get_site_url()}
         # Optional authentication
         if not skip_auth:
-            self.authenticate(request)
+            self.authenticate(headers)
 
         # Fire request
         if http_post:
-            handle = urlopen(request, params.encode('utf-8'))
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            response = self.http_request(
+                'POST', url, headers, params.encode('utf-8')
+            )
         else:
-            handle = urlopen(request)
+            response = self.http_request('GET', url, headers)
 
         # Read and possibly convert response
-        text = handle.read()
+        text = response.content
         # Needed for Microsoft
         if text[:3] == b'\xef\xbb\xbf':
             text = text.decode('UTF-8-sig')
@@ -163,6 +224,20 @@ class MachineTranslation(object):
         """
         raise NotImplementedError()
 
+    def download_translations_batch(self, source, language, texts, units,
+                                    user):
+        """Download translations for list of strings.
+
+        Should return list of download_translations results for every
+        string. Services which can translate several strings in single
+        request should override this and set batch_size, the default
+        implementation downloads the strings one by one.
+        """
+        return [
+            self.download_translations(source, language, text, unit, user)
+            for text, unit in zip(texts, units)
+        ]
+
     def convert_language(self, language):
         """Convert language to service specific code."""
         return language
@@ -227,76 +302,185 @@ class MachineTranslation(object):
         return cache.set(self.rate_limit_cache, True, 1800)
 
     def is_rate_limit_error(self, exc):
-        if not isinstance(exc, HTTPError):
+        if not isinstance(exc, requests.HTTPError):
             return False
         # Apply rate limiting for following status codes:
         # HTTP 429 Too Many Requests
         # HTTP 403 Forbidden
         # HTTP 503 Service Unavailable
-        if exc.code in (429, 403, 503):
+        if exc.response.status_code in (429, 403, 503):
             return True
         return False
 
+    def get_languages(self, language, unit):
+        """Return tuple of service specific source and target language.
+
+        None is returned if the language combination is not supported.
+        """
+        language = self.convert_language(language)
+        source = self.convert_language(
+            unit.translation.component.project.source_language.code
+        )
+        if self.is_supported(source, language):
+            return source, language
+        # Try without country code
+        if '_' in language or '-' in language:
+            language = language.replace('-', '_').split('_')[0]
+            if source != language and self.is_supported(source, language):
+                return source, language
+        return None
+
+    @property
+    def persistent_cache(self):
+        """Whether results should be stored in the database."""
+        return self.mtid in settings.MT_PERSISTENT_CACHE
+
+    def get_cache_key(self, source, language, text):
+        return 'mt:{}:{}:{}'.format(
+            self.mtid,
+            calculate_hash(source, language),
+            hash_to_checksum(calculate_hash(None, text)),
+        )
+
+    @staticmethod
+    def format_results(translations):
+        return [
+            {
+                'text': trans[0],
+                'quality': trans[1],
+                'service': trans[2],
+                'source': trans[3]
+            }
+            for trans in translations
+        ]
+
+    def timed_download(self, function, *args):
+        """Call download function measuring its duration."""
+        start = time()
+        try:
+            return function(*args)
+        except Exception as exc:
+            self.handle_error(exc)
+        finally:
+            record_latency(self.mtid, time() - start)
+
+    def handle_error(self, exc):
+        """Report failed download and raise MachineTranslationError."""
+        increment(self.mtid, 'errors')
+        if self.is_rate_limit_error(exc):
+            self.set_rate_limit()
+
+        self.report_error(
+            exc,
+            'Failed to fetch translations from %s',
+        )
+        raise MachineTranslationError('{0}: {1}'.format(
+            exc.__class__.__name__,
+            str(exc)
+        ))
+
     def translate(self, language, text, unit, user):
         """Return list of machine translations."""
         if text == '':
             return []
 
+        increment(self.mtid, 'requests')
+
         if self.is_rate_limited():
+            increment(self.mtid, 'rate_limited')
             return []
 
-        language = self.convert_language(language)
-        source = self.convert_language(
-            unit.translation.component.project.source_language.code
-        )
-        if not self.is_supported(source, language):
-            # Try without country code
-            if '_' in language or '-' in language:
-                language = language.replace('-', '_').split('_')[0]
-                if source == language:
-                    return []
-                if not self.is_supported(source, language):
-                    return []
-            else:
-                return []
+        languages = self.get_languages(language, unit)
+        if languages is None:
+            return []
+        source, language = languages
 
         cache_key = None
         if self.cache_translations:
-            cache_key = 'mt:{}:{}:{}'.format(
-                self.mtid,
-                calculate_hash(source, language),
-                hash_to_checksum(calculate_hash(None, text)),
-            )
-            result = cache.get(cache_key)
-            if result is not None:
-                return result
+            cache_key = self.get_cache_key(source, language, text)
+            cached = get_results([cache_key], self.persistent_cache)
+            if cache_key in cached:
+                increment(self.mtid, 'cache_hits')
+                return cached[cache_key]
+            increment(self.mtid, 'cache_misses')
+
+        translations = self.timed_download(
+            self.download_translations, source, language, text, unit, user
+        )
 
-        try:
-            translations = self.download_translations(
-                source, language, text, unit, user
-            )
+        result = self.format_results(translations)
+        if cache_key:
+            set_results({cache_key: result}, self.persistent_cache)
+        return result
 
-            result = [
-                {
-                    'text': trans[0],
-                    'quality': trans[1],
-                    'service': trans[2],
-                    'source': trans[3]
-                }
-                for trans in translations
-            ]
-            if cache_key:
-                cache.set(cache_key, result, 7 * 86400)
-            return result
-        except Exception as exc:
-            if self.is_rate_limit_error(exc):
-                self.set_rate_limit()
+    def translate_batch(self, language, texts, units, user):
+        """Return list of machine translations for every text.
 
-            self.report_error(
-                exc,
-                'Failed to fetch translations from %s',
+        The units are expected to belong to single project. Strings
+        which are not cached are downloaded in batches of batch_size.
+        """
+        results = [[] for text in texts]
+
+        if not texts:
+            return results
+
+        increment(self.mtid, 'requests', len([text for text in texts if text]))
+
+        if self.is_rate_limited():
+            increment(self.mtid, 'rate_limited')
+            return results
+
+        languages = self.get_languages(language, units[0])
+        if languages is None:
+            return results
+        source, language = languages
+
+        # Positions of every text, so that duplicates are fetched once
+        pending = OrderedDict()
+        for pos, text in enumerate(texts):
+            if text != '':
+                pending.setdefault(text, []).append(pos)
+
+        cache_keys = {}
+        if self.cache_translations:
+            cache_keys = {
+                text: self.get_cache_key(source, language, text)
+                for text in pending
+            }
+            cached = get_results(
+                list(cache_keys.values()), self.persistent_cache
+            )
+            for text, cache_key in cache_keys.items():
+                if cache_key in cached:
+                    for pos in pending.pop(text):
+                        results[pos] = cached[cache_key]
+            increment(self.mtid, 'cache_hits', len(cached))
+            increment(self.mtid, 'cache_misses', len(pending))
+
+        pending = list(pending.items())
+        for start in range(0, len(pending), self.batch_size):
+            # Rate limiting might have been triggered by previous batch
+            if self.is_rate_limited():
+                increment(self.mtid, 'rate_limited')
+                break
+            batch = pending[start:start + self.batch_size]
+            translations = self.timed_download(
+                self.download_translations_batch,
+                source,
+                language,
+                [text for text, positions in batch],
+                [units[positions[0]] for text, positions in batch],
+                user
             )
-            raise MachineTranslationError('{0}: {1}'.format(
-                exc.__class__.__name__,
-                str(exc)
-            ))
+
+            updates = {}
+            for (text, positions), translation in zip(batch, translations):
+                result = self.format_results(translation)
+                for pos in positions:
+                    results[pos] = result
+                if cache_keys:
+                    updates[cache_keys[text]] = result
+            if updates:
+                set_results(updates, self.persistent_cache)
+
+        return results
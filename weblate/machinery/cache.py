@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Caching of machine translation results.
+
+The results are looked up in small cache kept in the process, then in
+the Django cache and optionally in the database for services listed in
+MT_PERSISTENT_CACHE.
+"""
+
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+from time import time
+import threading
+
+from django.core.cache import cache
+
+from weblate.machinery.models import CachedTranslation
+
+# Timeout for cached results
+CACHE_TIMEOUT = 7 * 86400
+# Timeout for results with no translation
+NEGATIVE_TIMEOUT = 3600
+# Number of results kept in the process
+LOCAL_SIZE = 1000
+
+LOCAL_LOCK = threading.Lock()
+LOCAL_CACHE = OrderedDict()
+
+
+def get_timeout(result):
+    if result:
+        return CACHE_TIMEOUT
+    return NEGATIVE_TIMEOUT
+
+
+def get_local(keys):
+    """Lookup keys in the process cache."""
+    result = {}
+    now = time()
+    with LOCAL_LOCK:
+        for key in keys:
+            try:
+                expires, value = LOCAL_CACHE.pop(key)
+            except KeyError:
+                continue
+            if expires < now:
+                continue
+            # Move to the end as most recently used
+            LOCAL_CACHE[key] = (expires, value)
+            result[key] = value
+    return result
+
+
+def set_local(data):
+    """Store results in the process cache."""
+    now = time()
+    with LOCAL_LOCK:
+        for key, value in data.items():
+            LOCAL_CACHE.pop(key, None)
+            LOCAL_CACHE[key] = (now + get_timeout(value), value)
+        # Remove least recently used items
+        while len(LOCAL_CACHE) > LOCAL_SIZE:
+            LOCAL_CACHE.popitem(last=False)
+
+
+def clear_local():
+    with LOCAL_LOCK:
+        LOCAL_CACHE.clear()
+
+
+def get_results(keys, persistent=False):
+    """Return dictionary of cached results for given keys."""
+    result = get_local(keys)
+
+    missing = [key for key in keys if key not in result]
+    if missing:
+        shared = cache.get_many(missing)
+        set_local(shared)
+        result.update(shared)
+
+    if persistent:
+        missing = [key for key in keys if key not in result]
+        if missing:
+            stored = dict(
+                CachedTranslation.objects.filter(
+                    key__in=missing
+                ).values_list('key', 'data')
+            )
+            store_shared(stored)
+            set_local(stored)
+            result.update(stored)
+
+    return result
+
+
+def store_shared(data):
+    """Store results in the Django cache, grouped by timeout."""
+    for timeout in (CACHE_TIMEOUT, NEGATIVE_TIMEOUT):
+        items = {
+            key: value for key, value in data.items()
+            if get_timeout(value) == timeout
+        }
+        if items:
+            cache.set_many(items, timeout)
+
+
+def set_results(data, persistent=False):
+    """Store results in the caches."""
+    set_local(data)
+    store_shared(data)
+    if persistent:
+        for key, value in data.items():
+            # Results without translation are not stored permanently
+            if value:
+                CachedTranslation.objects.update_or_create(
+                    key=key, defaults={'data': value}
+                )
@@ -41,6 +41,7 @@ class GoogleTranslation(MachineTranslation):
     """Google Translate API v2 machine translation support."""
     name = 'Google Translate'
     max_score = 90
+    batch_size = 100
 
     def __init__(self):
         """Check configuration."""
@@ -88,3 +89,26 @@ class GoogleTranslation(MachineTranslation):
         translation = response['data']['translations'][0]['translatedText']
 
         return [(translation, self.max_score, self.name, text)]
+
+    def download_translations_batch(self, source, language, texts, units,
+                                    user):
+        """Download translations of several strings in single request."""
+        response = self.json_req(
+            GOOGLE_API_ROOT,
+            http_post=True,
+            key=settings.MT_GOOGLE_KEY,
+            q=texts,
+            source=source,
+            target=language,
+            format='text',
+        )
+
+        if 'error' in response:
+            raise MachineTranslationError(response['error']['message'])
+
+        return [
+            [(translation['translatedText'], self.max_score, self.name, text)]
+            for text, translation in zip(
+                texts, response['data']['translations']
+            )
+        ]
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Machine translation usage and latency metrics.
+
+The counters are kept in the Django cache, so they are shared by all
+processes using it. Every process aggregates the increments in memory
+and adds them to the cache periodically.
+"""
+
+from __future__ import unicode_literals
+
+from collections import defaultdict
+import threading
+from time import time
+
+from django.core.cache import cache
+
+from weblate.machinery import MACHINE_TRANSLATION_SERVICES
+
+COUNTERS = ('requests', 'cache_hits', 'cache_misses', 'errors', 'rate_limited')
+
+# Upper bounds of latency histogram buckets in milliseconds, slower
+# requests are counted in the last one
+BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+# Interval (in seconds) for storing aggregated counters in the cache
+FLUSH_INTERVAL = 10
+
+PENDING_LOCK = threading.Lock()
+PENDING = defaultdict(int)
+LAST_FLUSH = [time()]
+
+
+def get_key(service, name):
+    return 'mt-metrics:{0}:{1}'.format(service, name)
+
+
+def get_bucket_name(limit):
+    return 'latency-{0}'.format(limit)
+
+
+def add_counter(key, amount):
+    """Increase counter in the cache."""
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # The counter does not exist yet or has been evicted, it can be
+        # created concurrently by other process as well
+        if not cache.add(key, amount, None):
+            cache.incr(key, amount)
+
+
+def flush_metrics():
+    """Store counters aggregated by current process in the cache."""
+    with PENDING_LOCK:
+        pending = dict(PENDING)
+        PENDING.clear()
+        LAST_FLUSH[0] = time()
+    for key, amount in pending.items():
+        add_counter(key, amount)
+
+
+def increment(service, name, amount=1):
+    """Increase service counter."""
+    if not amount:
+        return
+    with PENDING_LOCK:
+        PENDING[get_key(service, name)] += amount
+        flush = time() - LAST_FLUSH[0] >= FLUSH_INTERVAL
+    if flush:
+        flush_metrics()
+
+
+def record_latency(service, seconds):
+    """Store request duration in the histogram."""
+    milliseconds = seconds * 1000
+    for limit in BUCKETS:
+        if milliseconds <= limit:
+            break
+    increment(service, get_bucket_name(limit))
+
+
+def get_percentile(histogram, percentile):
+    """Return upper bound of bucket containing the percentile."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    threshold = total * percentile / 100.0
+    count = 0
+    for limit in BUCKETS:
+        count += histogram[limit]
+        if count >= threshold:
+            break
+    return limit
+
+
+def get_metrics(service):
+    """Return metrics for the service."""
+    flush_metrics()
+    names = list(COUNTERS) + [get_bucket_name(limit) for limit in BUCKETS]
+    values = cache.get_many([get_key(service, name) for name in names])
+    result = {
+        name: values.get(get_key(service, name), 0) for name in COUNTERS
+    }
+    histogram = {
+        limit: values.get(get_key(service, get_bucket_name(limit)), 0)
+        for limit in BUCKETS
+    }
+    result['latency_p50'] = get_percentile(histogram, 50)
+    result['latency_p95'] = get_percentile(histogram, 95)
+    return result
+
+
+def get_all_metrics():
+    """Return metrics for all enabled services."""
+    result = []
+    for service in MACHINE_TRANSLATION_SERVICES.values():
+        metrics = get_metrics(service.mtid)
+        metrics['service'] = service.mtid
+        metrics['name'] = service.name
+        result.append(metrics)
+    return result
+
+
+def reset_metrics(service):
+    names = list(COUNTERS) + [get_bucket_name(limit) for limit in BUCKETS]
+    keys = [get_key(service, name) for name in names]
+    with PENDING_LOCK:
+        for key in keys:
+            PENDING.pop(key, None)
+    cache.delete_many(keys)
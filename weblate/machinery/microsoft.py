@@ -23,8 +23,6 @@ from datetime import timedelta
 
 from defusedxml import ElementTree
 
-from six.moves.urllib.request import Request, urlopen
-
 from django.conf import settings
 from django.utils import timezone
 from django.template.loader import get_template
@@ -94,12 +92,9 @@ class MicrosoftTranslation(MachineTranslation):
 
         return self._access_token
 
-    def authenticate(self, request):
+    def authenticate(self, headers):
         """Hook for backends to allow add authentication headers to request."""
-        request.add_header(
-            'Authorization',
-            'Bearer {0}'.format(self.access_token)
-        )
+        headers['Authorization'] = 'Bearer {0}'.format(self.access_token)
 
     def convert_language(self, language):
         """Convert language to service specific code."""
@@ -208,20 +203,20 @@ class MicrosoftTerminologyService(MachineTranslation):
         )
         payload = template.render(kwargs)
 
-        request = Request(self.MS_TM_API_URL, payload.encode('utf-8'))
-        request.timeout = 0.5
-        request.add_header(
-            'SOAPAction', '"{}"'.format(self.MS_TM_SOAP_HEADER + action)
-        )
-        request.add_header('Content-Type', 'text/xml; charset=utf-8')
-        return urlopen(request)
+        headers = {
+            'SOAPAction': '"{}"'.format(self.MS_TM_SOAP_HEADER + action),
+            'Content-Type': 'text/xml; charset=utf-8',
+        }
+        return self.http_request(
+            'POST', self.MS_TM_API_URL, headers, payload.encode('utf-8')
+        ).content
 
     def download_languages(self):
         """Get list of supported languages."""
         xp_code = self.MS_TM_XPATH + 'Code'
         languages = []
         resp = self.soap_req('GetLanguages')
-        root = ElementTree.fromstring(resp.read())
+        root = ElementTree.fromstring(resp)
         results = root.find(self.MS_TM_XPATH + 'GetLanguagesResult')
         if results is not None:
             for lang in results:
@@ -242,7 +237,7 @@ class MicrosoftTerminologyService(MachineTranslation):
             to_lang=language,
             max_result=20,
         )
-        root = ElementTree.fromstring(resp.read())
+        root = ElementTree.fromstring(resp)
         results = root.find(self.MS_TM_XPATH + 'GetTranslationsResult')
         if results is not None:
             for translation in results:
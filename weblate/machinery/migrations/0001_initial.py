@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.0.13 on 2026-10-17 09:10
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import weblate.utils.fields
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedTranslation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('data', weblate.utils.fields.JSONField()),
+                ('timestamp', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
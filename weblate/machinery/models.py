@@ -22,6 +22,26 @@ from __future__ import unicode_literals
 
 from appconf import AppConf
 
+from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+
+from weblate.utils.fields import JSONField
+
+
+@python_2_unicode_compatible
+class CachedTranslation(models.Model):
+    """Persistent storage for machine translation results.
+
+    Used for services listed in MT_PERSISTENT_CACHE, see
+    weblate.machinery.cache.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    data = JSONField()
+    timestamp = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return self.key
+
 
 class WeblateConf(AppConf):
     """Machine translation settings."""
@@ -70,9 +90,31 @@ class WeblateConf(AppConf):
     SAP_PASSWORD = None
     SAP_USE_MT = True
 
+    # Timeout (in seconds) for requests to machine translation services
+    TIMEOUT = 5
+
+    # Number of connections kept open to every machine translation service
+    POOL_SIZE = 10
+
+    # Services whose results are stored in the database
+    PERSISTENT_CACHE = ()
+
     # Limit (in seconds) for Weblate machine translation
     WEBLATE_LIMIT = 15
 
+    # Number of workers and maximal number of queued requests for
+    # Weblate machine translation
+    WEBLATE_WORKERS = 4
+    WEBLATE_QUEUE = 20
+
+    # Limit (in seconds) for fetching all machine translations in editor
+    DEADLINE = 10
+
+    # Number of workers and maximal number of queued requests for
+    # querying machine translation services in editor
+    WORKERS = 8
+    QUEUE = 50
+
     # List of machine translations
     SERVICES = (
         'weblate.machinery.weblatetm.WeblateTranslation',
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Concurrent querying of machine translation services.
+
+The services are queried by bounded pool of threads kept for whole
+process. Requests exceeding the queue size are rejected immediately, so
+the load is not piling up when the services are slow to respond.
+"""
+
+from __future__ import unicode_literals
+
+import os
+from time import time
+import threading
+
+from django.conf import settings
+from django.db import connection
+
+from six.moves.queue import Queue, Empty, Full
+
+from weblate.machinery.base import MachineTranslationError
+
+POOL_LOCK = threading.Lock()
+POOL = [None]
+
+
+class TranslateRequest(object):
+    """Single translation request processed by the pool."""
+    def __init__(self, service, language, text, unit, user, queue):
+        self.service = service
+        self.language = language
+        self.text = text
+        self.unit = unit
+        self.user = user
+        self.queue = queue
+        self.cancelled = False
+
+    def process(self):
+        try:
+            result = self.service.translate(
+                self.language, self.text, self.unit, self.user
+            )
+        except Exception as error:
+            result = error
+        finally:
+            connection.close()
+        self.queue.put((self.service, result))
+
+
+class TranslatePool(object):
+    """Pool of threads querying machine translation services."""
+    def __init__(self, workers, queue_size):
+        self.queue = Queue(queue_size)
+        self.pid = os.getpid()
+        self.threads = [
+            threading.Thread(target=self.worker) for dummy in range(workers)
+        ]
+        for thread in self.threads:
+            thread.daemon = True
+            thread.start()
+
+    def worker(self):
+        while True:
+            request = self.queue.get()
+            # The caller is not waiting for the result anymore
+            if not request.cancelled:
+                request.process()
+            self.queue.task_done()
+
+    def submit(self, request):
+        """Queue request, returns False if the queue is full."""
+        try:
+            self.queue.put_nowait(request)
+        except Full:
+            return False
+        return True
+
+
+def get_pool():
+    """Return pool shared by whole process.
+
+    The pool is created on first use, forked processes get their own
+    as the worker threads do not survive fork.
+    """
+    with POOL_LOCK:
+        if POOL[0] is None or POOL[0].pid != os.getpid():
+            POOL[0] = TranslatePool(settings.MT_WORKERS, settings.MT_QUEUE)
+        return POOL[0]
+
+
+def translate_services(services, language, text, unit, user, timeout):
+    """Query machine translation services concurrently.
+
+    Yields tuples of service and list of translations or exception in
+    the order the services answer. Services which did not answer
+    within timeout or could not be queued are yielded with
+    MachineTranslationError.
+    """
+    deadline = time() + timeout
+    results = Queue()
+    pending = {}
+
+    # Make sure related objects are loaded before being used in threads
+    unit.translation.component.project.source_language
+
+    pool = get_pool()
+    for service in services:
+        request = TranslateRequest(
+            service, language, text, unit, user, results
+        )
+        if pool.submit(request):
+            pending[service] = request
+        else:
+            yield service, MachineTranslationError(
+                'Request rejected, too many requests in progress'
+            )
+
+    while pending:
+        try:
+            service, result = results.get(timeout=max(0, deadline - time()))
+        except Empty:
+            break
+        del pending[service]
+        yield service, result
+
+    for service, request in pending.items():
+        # Skip processing if it is still in the queue
+        request.cancelled = True
+        yield service, MachineTranslationError(
+            'Request timed out after {0} seconds'.format(timeout)
+        )
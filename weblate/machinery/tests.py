@@ -20,9 +20,12 @@
 
 from __future__ import unicode_literals
 import json
+import threading
+import time
 
 from botocore.stub import Stubber, ANY
 
+from django.core.cache import cache
 from django.test import TestCase
 from django.test.utils import override_settings
 
@@ -32,7 +35,17 @@ import httpretty
 import weblate.trans.tests.mypretty  # noqa
 from weblate.trans.tests.test_views import FixtureTestCase
 from weblate.trans.models.unit import Unit
-from weblate.machinery.base import MachineTranslationError
+from weblate.machinery.base import (
+    MachineTranslationError, get_session, reset_session,
+)
+from weblate.machinery.cache import (
+    clear_local, LOCAL_CACHE, NEGATIVE_TIMEOUT,
+)
+from weblate.machinery.metrics import (
+    get_metrics, record_latency, reset_metrics, increment, flush_metrics,
+    get_key,
+)
+from weblate.machinery.models import CachedTranslation
 from weblate.machinery.dummy import DummyTranslation
 from weblate.machinery.deepl import DeepLTranslation
 from weblate.machinery.glosbe import GlosbeTranslation
@@ -49,6 +62,7 @@ from weblate.machinery.google import GoogleTranslation, GOOGLE_API_ROOT
 from weblate.machinery.yandex import YandexTranslation
 from weblate.machinery.saptranslationhub import SAPTranslationHub
 from weblate.machinery.weblatetm import WeblateTranslation
+from weblate.machinery.runner import translate_services, TranslatePool
 from weblate.checks.tests.test_checks import MockUnit
 
 GLOSBE_JSON = '''
@@ -236,6 +250,11 @@ DEEPL_RESPONSE = b'''{
 
 class MachineTranslationTest(TestCase):
     """Testing of machine translation core."""
+    def setUp(self):
+        # Do not reuse connections opened while mocking HTTP
+        reset_session()
+        clear_local()
+
     def get_machine(self, cls):
         machine = cls()
         machine.delete_cache()
@@ -282,6 +301,174 @@ class MachineTranslationTest(TestCase):
             []
         )
 
+    def test_translate_batch(self):
+        machine_translation = self.get_machine(DummyTranslation)
+        machine_translation.cache_translations = True
+        results = machine_translation.translate_batch(
+            'cs',
+            ['Hello', 'Hello, world!', '', 'Hello, world!'],
+            [MockUnit()] * 4,
+            None
+        )
+        self.assertEqual([len(result) for result in results], [0, 2, 0, 2])
+        self.assertEqual(results[1][0]['text'], 'Nazdar světe!')
+        # Served from cache
+        self.assertEqual(
+            machine_translation.translate(
+                'cs', 'Hello, world!', MockUnit(), None
+            ),
+            results[1]
+        )
+
+    def test_translate_batch_unsupported(self):
+        machine_translation = self.get_machine(DummyTranslation)
+        self.assertEqual(
+            machine_translation.translate_batch(
+                'de', ['Hello, world!'], [MockUnit()], None
+            ),
+            [[]]
+        )
+
+    def test_translate_services(self):
+        machine_translation = self.get_machine(DummyTranslation)
+        results = list(translate_services(
+            [machine_translation], 'cs', 'Hello, world!', MockUnit(), None, 10
+        ))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][0], machine_translation)
+        self.assertEqual(len(results[0][1]), 2)
+
+    def test_translate_services_timeout(self):
+        machine_translation = self.get_machine(DummyTranslation)
+        event = threading.Event()
+        original = machine_translation.download_translations
+
+        def download_translations(*args):
+            event.wait()
+            return original(*args)
+
+        machine_translation.download_translations = download_translations
+        results = list(translate_services(
+            [machine_translation], 'cs', 'Hello, world!', MockUnit(), None, 0
+        ))
+        event.set()
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0][1], MachineTranslationError)
+
+    def test_translate_services_partial(self):
+        slow = self.get_machine(DummyTranslation)
+        fast = self.get_machine(DummyTranslation)
+        event = threading.Event()
+        original = slow.download_translations
+
+        def download_translations(*args):
+            event.wait()
+            return original(*args)
+
+        slow.download_translations = download_translations
+        results = translate_services(
+            [slow, fast], 'cs', 'Hello, world!', MockUnit(), None, 1
+        )
+        # Slow service does not hold back others
+        self.assertEqual(next(results)[0], fast)
+        service, result = next(results)
+        event.set()
+        self.assertEqual(service, slow)
+        self.assertIsInstance(result, MachineTranslationError)
+
+    def test_translate_cache_layers(self):
+        machine_translation = self.get_machine(DummyTranslation)
+        machine_translation.cache_translations = True
+        with override_settings(MT_PERSISTENT_CACHE=('dummy',)):
+            result = machine_translation.translate(
+                'cs', 'Hello, world!', MockUnit(), None
+            )
+            self.assertEqual(CachedTranslation.objects.count(), 1)
+            # Loaded from the database when not in other caches
+            cache.clear()
+            clear_local()
+            machine_translation.download_translations = None
+            self.assertEqual(
+                machine_translation.translate(
+                    'cs', 'Hello, world!', MockUnit(), None
+                ),
+                result
+            )
+
+    def test_translate_cache_negative(self):
+        machine_translation = self.get_machine(DummyTranslation)
+        machine_translation.cache_translations = True
+        self.assertEqual(
+            machine_translation.translate('cs', 'Hello', MockUnit(), None),
+            []
+        )
+        key = machine_translation.get_cache_key('en', 'cs', 'Hello')
+        self.assertEqual(cache.get(key), [])
+        self.assertLessEqual(
+            LOCAL_CACHE[key][0], time.time() + NEGATIVE_TIMEOUT
+        )
+
+    def test_metrics(self):
+        machine_translation = self.get_machine(DummyTranslation)
+        machine_translation.cache_translations = True
+        reset_metrics(machine_translation.mtid)
+        machine_translation.translate('cs', 'Hello, world!', MockUnit(), None)
+        machine_translation.translate('cs', 'Hello, world!', MockUnit(), None)
+        machine_translation.set_rate_limit()
+        machine_translation.translate('cs', 'Hello, world!', MockUnit(), None)
+        metrics = get_metrics(machine_translation.mtid)
+        self.assertEqual(metrics['requests'], 3)
+        self.assertEqual(metrics['cache_hits'], 1)
+        self.assertEqual(metrics['cache_misses'], 1)
+        self.assertEqual(metrics['rate_limited'], 1)
+        self.assertEqual(metrics['errors'], 0)
+        self.assertEqual(metrics['latency_p50'], 50)
+
+    def test_metrics_percentile(self):
+        reset_metrics('test')
+        for dummy in range(19):
+            record_latency('test', 0.01)
+        record_latency('test', 3)
+        metrics = get_metrics('test')
+        self.assertEqual(metrics['latency_p50'], 50)
+        self.assertEqual(metrics['latency_p95'], 50)
+        record_latency('test', 100)
+        metrics = get_metrics('test')
+        self.assertEqual(metrics['latency_p95'], 5000)
+        self.assertEqual(get_metrics('missing')['latency_p50'], None)
+
+    def test_metrics_flush(self):
+        reset_metrics('test')
+        flush_metrics()
+        increment('test', 'requests')
+        # The counter is aggregated in the process
+        self.assertIsNone(cache.get(get_key('test', 'requests')))
+        flush_metrics()
+        self.assertEqual(cache.get(get_key('test', 'requests')), 1)
+        increment('test', 'requests', 2)
+        self.assertEqual(get_metrics('test')['requests'], 3)
+
+    def test_session(self):
+        session = get_session()
+        self.assertIs(session, get_session())
+        result = []
+        thread = threading.Thread(
+            target=lambda: result.append(get_session())
+        )
+        thread.start()
+        thread.join()
+        # Every thread has own session sharing the connection pools
+        self.assertIsNot(session, result[0])
+        self.assertIs(
+            session.get_adapter('https://'),
+            result[0].get_adapter('https://')
+        )
+
+    def test_translate_pool(self):
+        pool = TranslatePool(0, 1)
+        self.assertTrue(pool.submit(None))
+        self.assertFalse(pool.submit(None))
+
     def assert_translate(self, machine, lang='cs', word='world', empty=False):
         translation = machine.translate(lang, word, MockUnit(), None)
         self.assertIsInstance(translation, list)
@@ -461,6 +648,29 @@ class MachineTranslationTest(TestCase):
         self.assert_translate(machine, lang='he')
         self.assert_translate(machine, word='Zkouška')
 
+    @override_settings(MT_GOOGLE_KEY='KEY')
+    @httpretty.activate
+    def test_google_batch(self):
+        machine = self.get_machine(GoogleTranslation)
+        httpretty.register_uri(
+            httpretty.GET,
+            GOOGLE_API_ROOT + 'languages',
+            body=b'{"data":{"languages":[{"language":"en"},'
+            b'{"language":"cs"}]}}'
+        )
+        httpretty.register_uri(
+            httpretty.POST,
+            GOOGLE_API_ROOT,
+            body=b'{"data":{"translations":[{"translatedText":"svet"},'
+            b'{"translatedText":"ahoj"}]}}'
+        )
+        results = machine.translate_batch(
+            'cs', ['world', 'hello'], [MockUnit(), MockUnit()], None
+        )
+        self.assertEqual(
+            [result[0]['text'] for result in results], ['svet', 'ahoj']
+        )
+
     @override_settings(MT_GOOGLE_KEY='KEY')
     @httpretty.activate
     def test_google_invalid(self):
@@ -630,6 +840,28 @@ class MachineTranslationTest(TestCase):
         )
         self.assert_translate(machine, lang='de', word='Hello')
 
+    @override_settings(MT_DEEPL_KEY='KEY')
+    @httpretty.activate
+    def test_deepl_batch(self):
+        machine = self.get_machine(DeepLTranslation)
+        httpretty.register_uri(
+            httpretty.POST,
+            'https://api.deepl.com/v1/translate',
+            body=b'''{"translations": [
+                {"detected_source_language": "EN", "text": "Hallo"},
+                {"detected_source_language": "EN", "text": "Welt"}
+            ]}''',
+        )
+        results = machine.translate_batch(
+            'de', ['Hello', 'world'], [MockUnit(), MockUnit()], None
+        )
+        self.assertEqual(
+            [result[0]['text'] for result in results], ['Hallo', 'Welt']
+        )
+        self.assertEqual(
+            httpretty.last_request().parsed_body['text'], ['Hello', 'world']
+        )
+
     @override_settings(MT_DEEPL_KEY='KEY')
     @httpretty.activate
     def test_cache(self):
@@ -22,9 +22,10 @@ from __future__ import unicode_literals
 
 from django.conf import settings
 
-from six.moves.urllib.error import HTTPError
 from six.moves.urllib.parse import quote
 
+from requests import HTTPError
+
 from weblate.machinery.base import MachineTranslation, MissingConfiguration
 
 
@@ -56,7 +57,7 @@ class TMServerTranslation(MachineTranslation):
             # This will raise exception in DEBUG mode
             data = self.json_req('{0}/languages/'.format(self.url))
         except HTTPError as error:
-            if error.code == 404:
+            if error.response.status_code == 404:
                 return []
             raise
         return [
@@ -21,7 +21,7 @@
 from __future__ import unicode_literals
 
 from weblate.lang.models import Language
-from weblate.memory.storage import TranslationMemory
+from weblate.memory.storage import TranslationMemory, get_memory_version
 from weblate.machinery.base import MachineTranslation
 
 
@@ -29,11 +29,22 @@ class WeblateMemory(MachineTranslation):
     """Translation service using strings already translated in Weblate."""
     name = 'Weblate Translation Memory'
     rank_boost = 2
-    cache_translations = False
 
     def convert_language(self, language):
         return Language.objects.get(code=language)
 
+    def get_cache_key(self, source, language, text):
+        """Include memory version in the key.
+
+        The cached results are not used once the memory is updated.
+        """
+        return '{0}:{1}'.format(
+            super(WeblateMemory, self).get_cache_key(
+                source.code, language.code, text
+            ),
+            get_memory_version()
+        )
+
     def is_supported(self, source, language):
         """Any language is supported."""
         return True
@@ -52,7 +63,7 @@ class WeblateMemory(MachineTranslation):
 
     def download_translations(self, source, language, text, unit, user):
         """Download list of possible translations from a service."""
-        memory = TranslationMemory()
+        memory = TranslationMemory.get_thread_instance()
         return [
             self.format_unit_match(*result)
             for result in memory.lookup(source.code, language.code, text)
@@ -24,14 +24,30 @@ import json
 
 from django.core.management.base import BaseCommand
 
+from lxml import etree
+
+from weblate import VERSION
 from weblate.memory.storage import TranslationMemory
 
+TMX_HEADER = '''<?xml version="1.0" encoding="utf-8"?>
+<tmx version="1.4">
+<header creationtool="Weblate" creationtoolversion="{0}" segtype="sentence"
+    o-tmf="Weblate" adminlang="en" srclang="*all*" datatype="plaintext"/>
+<body>
+'''
+
+TMX_FOOTER = '''</body>
+</tmx>
+'''
+
+XML_LANG = '{http://www.w3.org/XML/1998/namespace}lang'
+
 
 class Command(BaseCommand):
     """
     Command for exporting translation memory.
     """
-    help = 'exports translation memory in JSON format'
+    help = 'exports translation memory in JSON, JSON lines or TMX format'
 
     def add_arguments(self, parser):
         super(Command, self).add_arguments(parser)
@@ -42,14 +58,51 @@ class Command(BaseCommand):
                 'pretty-printing output.'
             ),
         )
+        parser.add_argument(
+            '--format',
+            default='json',
+            choices=('json', 'jsonl', 'tmx'),
+            help='Output format',
+        )
+
+    def dump_json(self, documents, indent):
+        """Write JSON array, one document at time."""
+        prefix = ' ' * indent
+        separator = '[\n'
+        for document in documents:
+            self.stdout.write(separator)
+            separator = ',\n'
+            self.stdout.write('\n'.join([
+                prefix + line for line in json.dumps(
+                    document, indent=indent, sort_keys=True
+                ).splitlines()
+            ]))
+        if separator == '[\n':
+            self.stdout.write('[')
+        self.stdout.write('\n]\n')
+
+    def dump_jsonl(self, documents, indent):
+        """Write JSON lines, one document per line."""
+        for document in documents:
+            self.stdout.write(json.dumps(document, sort_keys=True))
+            self.stdout.write('\n')
+
+    def dump_tmx(self, documents, indent):
+        """Write TMX file with translation unit for every document."""
+        self.stdout.write(TMX_HEADER.format(VERSION))
+        for document in documents:
+            unit = etree.Element('tu', srclang=document['source_language'])
+            for lang, text in (('source_language', 'source'),
+                               ('target_language', 'target')):
+                node = etree.SubElement(unit, 'tuv')
+                node.set(XML_LANG, document[lang])
+                etree.SubElement(node, 'seg').text = document[text]
+            self.stdout.write(etree.tostring(unit, encoding='unicode'))
+            self.stdout.write('\n')
+        self.stdout.write(TMX_FOOTER)
 
     def handle(self, *args, **options):
         memory = TranslationMemory()
-        memory.open_searcher()
         self.stdout.ending = None
-        json.dump(
-            list(memory.searcher.documents()),
-            self.stdout,
-            indent=options['indent'],
-        )
-        self.stdout.write('\n')
+        dump = getattr(self, 'dump_{0}'.format(options['format']))
+        dump(memory.iterate_documents(), options['indent'])
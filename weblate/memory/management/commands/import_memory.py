@@ -25,6 +25,8 @@ import json
 
 from django.core.management.base import BaseCommand, CommandError
 
+from lxml.etree import XMLSyntaxError
+
 from weblate.memory.storage import TranslationMemory
 
 
@@ -43,7 +45,7 @@ class Command(BaseCommand):
         parser.add_argument(
             'file',
             type=argparse.FileType('r'),
-            help='File to import (TMX or JSON)',
+            help='File to import (TMX, JSON or JSON lines)',
         )
 
     def handle(self, *args, **options):
@@ -58,7 +60,22 @@ class Command(BaseCommand):
 
         memory = TranslationMemory()
         if options['file'].name.lower().endswith('.tmx'):
-            memory.import_tmx(options['file'], langmap)
+            try:
+                memory.import_tmx(options['file'], langmap)
+            except XMLSyntaxError:
+                raise CommandError('Failed to parse TMX file!')
+            finally:
+                options['file'].close()
+        elif options['file'].name.lower().endswith('.jsonl'):
+            try:
+                memory.add_documents(
+                    json.loads(line) for line in options['file']
+                    if line.strip()
+                )
+            except ValueError:
+                raise CommandError('Failed to parse JSON file!')
+            finally:
+                options['file'].close()
         elif options['file'].name.lower().endswith('.json'):
             try:
                 data = json.load(options['file'])
@@ -66,10 +83,8 @@ class Command(BaseCommand):
                 raise CommandError('Failed to parse JSON file!')
             finally:
                 options['file'].close()
-            with memory.writer() as writer:
-                for entry in data:
-                    writer.add_document(**entry)
+            memory.add_documents(data)
         else:
             raise CommandError(
-                'Unsupported file, needs .json or .tmx extension'
+                'Unsupported file, needs .json, .jsonl or .tmx extension'
             )
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from whoosh.index import LockError
+
+from weblate.memory.models import MemoryUpdate
+from weblate.memory.storage import TranslationMemory
+from weblate.trans.models import Unit
+from weblate.utils.state import STATE_TRANSLATED
+
+
+class Command(BaseCommand):
+    """
+    Command for storing translated strings in translation memory.
+    """
+    help = 'stores queued translations in translation memory'
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--limit',
+            action='store',
+            type=int,
+            dest='limit',
+            default=10000,
+            help='number of updates to process in one run'
+        )
+
+    def handle(self, *args, **options):
+        """Translation memory update."""
+        # Grab queued updates from the database
+        with transaction.atomic():
+            updates = MemoryUpdate.objects.all()[:options['limit']]
+            memoryupdates = dict(updates.values_list('pk', 'unitid'))
+
+        # Units might have been changed meanwhile
+        units = Unit.objects.filter(
+            id__in=memoryupdates.values(),
+            state__gte=STATE_TRANSLATED,
+        ).select_related(
+            'translation__language',
+            'translation__component__project__source_language',
+        )
+
+        try:
+            TranslationMemory().import_units(units.iterator())
+        except LockError:
+            raise CommandError(
+                'Failed to acquire lock on the translation memory, '
+                'probably some other update is already running.'
+            )
+
+        # Delete processed updates
+        with transaction.atomic():
+            MemoryUpdate.objects.filter(pk__in=memoryupdates.keys()).delete()
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.0.13 on 2026-10-17 08:30
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memory', '0001_squashed_0003_auto_20180321_1554'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemoryUpdate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unitid', models.IntegerField(unique=True)),
+            ],
+        ),
+    ]
@@ -17,14 +17,38 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
+from __future__ import unicode_literals
 
-
+from django.db import models, transaction, IntegrityError
 from django.db.models.signals import post_migrate
 from django.dispatch import receiver
+from django.utils.encoding import python_2_unicode_compatible
 
 from weblate.memory.storage import setup_index
 
 
+@python_2_unicode_compatible
+class MemoryUpdate(models.Model):
+    """Queue of translated units to be stored in the translation memory.
+
+    Processed by the update_memory management command.
+    """
+    unitid = models.IntegerField(unique=True)
+
+    def __str__(self):
+        return '{0}'.format(self.unitid)
+
+
+def add_memory_update(unit_id):
+    """Queue unit to be stored in the translation memory."""
+    try:
+        with transaction.atomic():
+            MemoryUpdate.objects.create(unitid=unit_id)
+    except IntegrityError:
+        # Already queued
+        return
+
+
 @receiver(post_migrate)
 def create_index(sender=None, **kwargs):
     """Automatically creates storage directory."""
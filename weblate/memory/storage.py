@@ -21,13 +21,20 @@
 from __future__ import unicode_literals
 
 import contextlib
+import heapq
 
 import os.path
+import threading
+from uuid import uuid4
 
+from django.core.cache import cache
 from django.utils.encoding import force_text
 
-from translate.misc.xml_helpers import getXMLlang, getXMLspace
-from translate.storage.tmx import tmxfile
+from itertools import islice
+
+from lxml import etree
+
+from translate.misc.xml_helpers import getXMLlang, getXMLspace, getText
 
 from whoosh.fields import SchemaClass, TEXT, ID, STORED, NUMERIC
 from whoosh.filedb.filestore import FileStorage
@@ -38,22 +45,102 @@ from weblate.lang.models import Language
 from weblate.utils.data import data_dir
 from weblate.utils.search import Comparer
 
+VERSION_CACHE = 'memory-version'
+
 
 def setup_index():
     storage = FileStorage(data_dir('memory'))
     storage.create()
-    return storage.create_index(TMSchema())
+    index = storage.create_index(TMSchema())
+    update_memory_version()
+    return index
+
+
+def get_memory_version():
+    """Return identifier of the memory content.
+
+    It is changed on every memory update and used to invalidate cached
+    machine translation results.
+    """
+    version = cache.get(VERSION_CACHE)
+    if version is None:
+        version = update_memory_version()
+    return version
+
+
+def update_memory_version():
+    version = uuid4().hex[:16]
+    cache.set(VERSION_CACHE, version, None)
+    return version
 
 
 def get_node_data(unit, node):
     """Generic implementation of LISAUnit.gettarget."""
+    segment = next(node.iterdescendants('seg'), None)
+    if segment is None:
+        return getXMLlang(node), None
     return (
         getXMLlang(node),
-        unit.getNodeText(node, getXMLspace(unit.xmlelement, 'preserve'))
+        getText(segment, getXMLspace(unit, 'preserve'))
     )
 
 
+def parse_tmx(fileobj):
+    """Incrementally parse TMX file.
+
+    Yields tuples of source language code and dictionary of translations
+    for every translation unit. Already processed elements are discarded,
+    so the memory usage does not depend on file size.
+    """
+    # Parse bytes even from file opened in text mode
+    fileobj = getattr(fileobj, 'buffer', fileobj)
+    context = etree.iterparse(fileobj, events=('end',), tag=('header', 'tu'))
+    source_language = None
+    for dummy, element in context:
+        if element.tag == 'header':
+            source_language = element.get('srclang')
+        else:
+            translations = {}
+            for node in element.iterchildren('tuv'):
+                lang, text = get_node_data(element, node)
+                if text is not None:
+                    translations[lang] = text
+            # The unit can override source language from the header
+            yield element.get('srclang', source_language), translations
+        # Free memory used by already processed elements
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
 CATEGORY_FILE = 1
+CATEGORY_TRANSLATION = 2
+
+# Number of documents added to the index in single commit
+IMPORT_BATCH = 10000
+
+# Memory instances shared within a thread
+LOCAL = threading.local()
+
+# Minimal similarity of returned matches
+MIN_SIMILARITY = 30
+# Maximal number of fulltext matches considered
+MAX_MATCHES = 2000
+# Maximal number of candidates compared using Levenshtein distance
+MAX_CANDIDATES = 200
+# Size of n-grams used to pick candidates
+NGRAM_SIZE = 3
+
+
+def get_ngrams(text):
+    """Return set of character n-grams in text."""
+    text = text.lower()
+    if len(text) <= NGRAM_SIZE:
+        return {text}
+    return {
+        text[pos:pos + NGRAM_SIZE]
+        for pos in range(len(text) - NGRAM_SIZE + 1)
+    }
 
 
 class TMSchema(SchemaClass):
@@ -81,9 +168,24 @@ class TranslationMemory(object):
     def __del__(self):
         self.close()
 
+    @classmethod
+    def get_thread_instance(cls):
+        """Return instance shared by all callers within current thread.
+
+        Whoosh searchers are not thread safe, so the instance can not be
+        shared by whole process.
+        """
+        instance = getattr(LOCAL, 'memory', None)
+        if instance is None:
+            instance = LOCAL.memory = cls()
+        return instance
+
     def open_searcher(self):
+        """Open searcher or refresh it if the index has changed."""
         if self.searcher is None:
             self.searcher = self.index.searcher()
+        else:
+            self.searcher = self.searcher.refresh()
 
     def doc_count(self):
         self.open_searcher()
@@ -101,6 +203,7 @@ class TranslationMemory(object):
             yield writer
         finally:
             writer.commit()
+            update_memory_version()
 
     def get_language_code(self, code, langmap):
         language = Language.objects.auto_get_or_create(code)
@@ -110,44 +213,102 @@ class TranslationMemory(object):
             )
         return language.code
 
+    def add_documents(self, documents, replace=False):
+        """Add documents to the index in bounded batches.
+
+        With replace, existing translations of same string from same origin
+        are removed.
+        """
+        documents = iter(documents)
+        count = 0
+        while True:
+            batch = list(islice(documents, IMPORT_BATCH))
+            if not batch:
+                return count
+            with self.writer() as writer:
+                if replace:
+                    with writer.searcher() as searcher:
+                        for document in batch:
+                            self.delete_document(writer, searcher, document)
+                for document in batch:
+                    writer.add_document(**document)
+            count += len(batch)
+
+    def delete_document(self, writer, searcher, document):
+        """Delete stored translations of the document source string."""
+        terms = [
+            query.Term('origin', document['origin']),
+            query.Term('source_language', document['source_language']),
+            query.Term('target_language', document['target_language']),
+        ]
+        # The source is tokenized, so match words first and compare the
+        # stored string then
+        terms.extend([
+            query.Term('source', word)
+            for word in set(self.index.schema['source'].process_text(
+                document['source'], mode='query'
+            ))
+        ])
+        for docnum in searcher.docs_for_query(query.And(terms)):
+            fields = searcher.stored_fields(docnum)
+            if fields['source'] == document['source']:
+                writer.delete_document(docnum)
+
     def import_tmx(self, fileobj, langmap=None):
-        origin = force_text(os.path.basename(fileobj.name))
-        storage = tmxfile.parsefile(fileobj)
-        header = next(
-            storage.document.getroot().iterchildren(
-                storage.namespaced("header")
-            )
+        return self.add_documents(
+            self.parse_tmx_documents(fileobj, langmap)
         )
-        source_language_code = header.get('srclang')
-        source_language = self.get_language_code(source_language_code, langmap)
 
+    def parse_tmx_documents(self, fileobj, langmap=None):
+        """Generate memory documents from TMX file."""
+        origin = force_text(os.path.basename(fileobj.name))
         languages = {}
-        with self.writer() as writer:
-            for unit in storage.units:
-                # Parse translations (translate-toolkit does not care about
-                # languages here, it just picks first and second XML elements)
-                translations = {}
-                for node in unit.getlanguageNodes():
-                    lang, text = get_node_data(unit, node)
-                    translations[lang] = text
-                    if lang not in languages:
-                        languages[lang] = self.get_language_code(lang, langmap)
-
-                try:
-                    source = translations.pop(source_language_code)
-                except KeyError:
-                    # Skip if source language is not present
-                    continue
-
-                for lang, text in translations.items():
-                    writer.add_document(
-                        source_language=source_language,
-                        target_language=languages[lang],
-                        source=source,
-                        target=text,
-                        origin=origin,
-                        category=CATEGORY_FILE,
-                    )
+        for source_language_code, translations in parse_tmx(fileobj):
+            for lang in translations:
+                if lang not in languages:
+                    languages[lang] = self.get_language_code(lang, langmap)
+
+            try:
+                source = translations.pop(source_language_code)
+            except KeyError:
+                # Skip if source language is not present
+                continue
+
+            source_language = languages[source_language_code]
+            for lang, text in translations.items():
+                yield {
+                    'source_language': source_language,
+                    'target_language': languages[lang],
+                    'source': source,
+                    'target': text,
+                    'origin': origin,
+                    'category': CATEGORY_FILE,
+                }
+
+    def import_units(self, units):
+        """Store translations of given units in the memory."""
+        return self.add_documents(
+            (self.get_unit_document(unit) for unit in units),
+            replace=True
+        )
+
+    @staticmethod
+    def get_unit_document(unit):
+        component = unit.translation.component
+        return {
+            'source_language': component.project.source_language.code,
+            'target_language': unit.translation.language.code,
+            'source': unit.get_source_plurals()[0],
+            'target': unit.get_target_plurals()[0],
+            'origin': '/'.join((component.project.slug, component.slug)),
+            'category': CATEGORY_TRANSLATION,
+        }
+
+    def iterate_documents(self):
+        """Iterate over all stored documents."""
+        self.open_searcher()
+        for document in self.searcher.documents():
+            yield document
 
     def lookup(self, source_language, target_language, text):
         langfilter = query.And([
@@ -157,15 +318,39 @@ class TranslationMemory(object):
         self.open_searcher()
         text_query = self.parser.parse(text)
         matches = self.searcher.search(
-            text_query, filter=langfilter, limit=20000
+            text_query, filter=langfilter, limit=MAX_MATCHES
         )
 
-        for match in matches:
-            similarity = self.comparer.similarity(text, match['source'])
-            if similarity < 30:
+        # Pick candidates with most similar n-grams, this is only a
+        # heuristic, the similarity is not bounded by it
+        ngrams = get_ngrams(text)
+        candidates = []
+        for pos, match in enumerate(matches):
+            fields = match.fields()
+            source = fields['source']
+            # Dice coefficient of the n-gram sets
+            source_ngrams = get_ngrams(source)
+            score = (
+                2.0 * len(ngrams & source_ngrams) /
+                (len(ngrams) + len(source_ngrams))
+            )
+            # The position is there to avoid comparing fields on same score
+            item = (score, -pos, fields)
+            if len(candidates) < MAX_CANDIDATES:
+                heapq.heappush(candidates, item)
+            elif item > candidates[0]:
+                heapq.heapreplace(candidates, item)
+
+        # Calculate actual similarity on selected candidates
+        for dummy, dummy, fields in sorted(candidates, reverse=True):
+            similarity = self.comparer.similarity(text, fields['source'])
+            if similarity < MIN_SIMILARITY:
                 continue
             yield (
-                match['source'], match['target'], similarity, match['origin']
+                fields['source'],
+                fields['target'],
+                similarity,
+                fields['origin']
             )
 
     def delete(self, origin):
@@ -175,8 +360,8 @@ class TranslationMemory(object):
 
     def empty(self):
         """Recreates translation memory."""
+        self.close()
         self.index = setup_index()
-        self.searcher = None
 
     def get_origins(self):
         self.open_searcher()
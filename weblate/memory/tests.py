@@ -20,6 +20,9 @@
 from __future__ import unicode_literals
 
 import json
+import os
+import shutil
+import tempfile
 
 from django.test import TestCase
 from django.core.management import call_command
@@ -28,11 +31,14 @@ from django.core.management.base import CommandError
 from six import StringIO
 
 from weblate.memory.machine import WeblateMemory
+from weblate.memory.models import MemoryUpdate
 from weblate.memory.storage import (
-    TranslationMemory, setup_index, CATEGORY_FILE
+    TranslationMemory, setup_index, CATEGORY_FILE, MAX_CANDIDATES,
 )
+from weblate.trans.tests.test_views import ViewTestCase
 from weblate.trans.tests.utils import get_test_file
 from weblate.checks.tests.test_checks import MockUnit
+from weblate.utils.search import Comparer
 
 TEST_DOCUMENT = {
     'source_language': 'en',
@@ -71,6 +77,41 @@ class MemoryTest(TestCase):
         data = json.loads(output.getvalue())
         self.assertEqual(data, [TEST_DOCUMENT])
 
+    def test_dump_jsonl_command(self):
+        self.add_document()
+        output = StringIO()
+        call_command('dump_memory', format='jsonl', stdout=output)
+        self.assertEqual(
+            [json.loads(line) for line in output.getvalue().splitlines()],
+            [TEST_DOCUMENT]
+        )
+        self.do_import(output.getvalue(), 'memory.jsonl')
+        self.assertEqual(list(TranslationMemory().iterate_documents()), [
+            TEST_DOCUMENT, TEST_DOCUMENT
+        ])
+
+    def test_dump_tmx_command(self):
+        self.add_document()
+        output = StringIO()
+        call_command('dump_memory', format='tmx', stdout=output)
+        self.assertIn('<seg>Ahoj</seg>', output.getvalue())
+        setup_index()
+        self.do_import(output.getvalue(), 'memory.tmx')
+        document = dict(TEST_DOCUMENT, origin='memory.tmx')
+        self.assertEqual(
+            list(TranslationMemory().iterate_documents()), [document]
+        )
+
+    def do_import(self, content, name):
+        tempdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tempdir, name)
+            with open(filename, 'w') as handle:
+                handle.write(content)
+            call_command('import_memory', filename)
+        finally:
+            shutil.rmtree(tempdir)
+
     def test_delete_command_error(self):
         with self.assertRaises(CommandError):
             call_command('delete_memory')
@@ -124,6 +165,69 @@ class MemoryTest(TestCase):
             ]
         )
 
+    def test_machine_cache(self):
+        machine_translation = WeblateMemory()
+        self.assertEqual(
+            machine_translation.translate('cs', 'Hello', MockUnit(), None),
+            []
+        )
+        # Updating memory invalidates cached result
+        self.add_document()
+        self.assertEqual(
+            len(
+                machine_translation.translate('cs', 'Hello', MockUnit(), None)
+            ),
+            1
+        )
+
+    def test_thread_instance(self):
+        self.add_document()
+        memory = TranslationMemory.get_thread_instance()
+        self.assertIs(memory, TranslationMemory.get_thread_instance())
+        self.assertEqual(memory.doc_count(), 1)
+        searcher = memory.searcher
+        # Searcher is reused until the index is changed
+        self.assertEqual(memory.doc_count(), 1)
+        self.assertIs(searcher, memory.searcher)
+        self.add_document()
+        self.assertEqual(memory.doc_count(), 2)
+        self.assertEqual(
+            len(list(memory.lookup('en', 'cs', 'Hello'))), 2
+        )
+
+    def test_lookup(self):
+        memory = TranslationMemory()
+        with memory.writer() as writer:
+            for i in range(MAX_CANDIDATES + 100):
+                writer.add_document(
+                    source_language='en',
+                    target_language='cs',
+                    source='Hello world {0}'.format(i),
+                    target='Ahoj svete {0}'.format(i),
+                    origin='test',
+                    category=CATEGORY_FILE,
+                )
+            writer.add_document(
+                source_language='en',
+                target_language='cs',
+                source='Hello {0}'.format('x' * 100),
+                target='Ahoj',
+                origin='test',
+                category=CATEGORY_FILE,
+            )
+        memory = TranslationMemory()
+        results = list(memory.lookup('en', 'cs', 'Hello world 1'))
+        self.assertEqual(
+            results[0][:3], ('Hello world 1', 'Ahoj svete 1', 100)
+        )
+        self.assertLessEqual(len(results), MAX_CANDIDATES)
+        comparer = Comparer()
+        for source, target, similarity, origin in results:
+            self.assertTrue(source.startswith('Hello world'))
+            self.assertEqual(
+                similarity, comparer.similarity('Hello world 1', source)
+            )
+
     def test_delete(self):
         self.add_document()
         memory = TranslationMemory()
@@ -139,3 +243,52 @@ class MemoryTest(TestCase):
         self.add_document()
         memory = TranslationMemory()
         self.assertEqual(memory.get_origins(), ['test'])
+
+
+class MemoryUpdateTest(ViewTestCase):
+    def setUp(self):
+        super(MemoryUpdateTest, self).setUp()
+        setup_index()
+
+    def test_update(self):
+        self.change_unit('Nazdar svete!\n')
+        self.assertEqual(MemoryUpdate.objects.count(), 1)
+        # Saving same content does not queue anything
+        self.change_unit('Nazdar svete!\n')
+        self.assertEqual(MemoryUpdate.objects.count(), 1)
+        call_command('update_memory')
+        self.assertEqual(MemoryUpdate.objects.count(), 0)
+        memory = TranslationMemory()
+        self.assertEqual(
+            list(memory.lookup('en', 'cs', 'Hello, world!\n')),
+            [(
+                'Hello, world!\n',
+                'Nazdar svete!\n',
+                100,
+                'test/test',
+            )]
+        )
+
+    def test_update_replace(self):
+        self.change_unit('Nazdar svete!\n')
+        call_command('update_memory')
+        self.change_unit('Ahoj svete!\n')
+        call_command('update_memory')
+        memory = TranslationMemory()
+        self.assertEqual(memory.doc_count(), 1)
+        self.assertEqual(
+            list(memory.lookup('en', 'cs', 'Hello, world!\n')),
+            [(
+                'Hello, world!\n',
+                'Ahoj svete!\n',
+                100,
+                'test/test',
+            )]
+        )
+
+    def test_update_untranslated(self):
+        self.change_unit('Nazdar svete!\n')
+        self.change_unit('')
+        call_command('update_memory')
+        self.assertEqual(MemoryUpdate.objects.count(), 0)
+        self.assertEqual(TranslationMemory().doc_count(), 0)
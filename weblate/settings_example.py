@@ -631,6 +631,9 @@ NEARBY_MESSAGES = 5
 # Offload indexing
 OFFLOAD_INDEXING = False
 
+# Fulltext search backend
+SEARCH_BACKEND = 'weblate.trans.search.whooshsearch.WhooshSearch'
+
 # Use simple language codes for default language/country combinations
 SIMPLIFY_LANGUAGES = True
 
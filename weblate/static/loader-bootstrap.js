@@ -371,17 +371,38 @@ function failedMachineTranslation(jqXHR, textStatus, errorThrown) {
     );
 }
 
-function loadMachineTranslations(data, textStatus) {
-    decreaseLoading('#mt-loading');
-    data.forEach(function (el, idx) {
-        increaseLoading('#mt-loading');
-        $.ajax({
-            url: $('#js-translate').attr('href') + '?service=' + el,
-            success: processMachineTranslation,
-            error: failedMachineTranslation,
-            dataType: 'json'
+function loadMachineTranslations(url) {
+    /* The results are streamed as JSON lines as services answer */
+    var xhr = new XMLHttpRequest();
+    var offset = 0;
+
+    function processResponse() {
+        var lines = xhr.responseText.substring(offset).split('\n');
+        /* Last item is incomplete line or empty string */
+        offset = xhr.responseText.length - lines.pop().length;
+        lines.forEach(function (line) {
+            if (line !== '') {
+                increaseLoading('#mt-loading');
+                processMachineTranslation(JSON.parse(line));
+            }
         });
-    });
+    }
+
+    increaseLoading('#mt-loading');
+    xhr.open('GET', url);
+    xhr.onprogress = processResponse;
+    xhr.onload = function () {
+        if (xhr.status !== 200) {
+            failedMachineTranslation(xhr, xhr.statusText);
+            return;
+        }
+        processResponse();
+        decreaseLoading('#mt-loading');
+    };
+    xhr.onerror = function () {
+        failedMachineTranslation(xhr, 'error');
+    };
+    xhr.send();
 }
 
 function isNumber(n) {
@@ -617,13 +638,7 @@ $(function () {
             return;
         }
         machineTranslationLoaded = true;
-        increaseLoading('#mt-loading');
-        $.ajax({
-            url: $('#js-mt-services').attr('href'),
-            success: loadMachineTranslations,
-            error: failedMachineTranslation,
-            dataType: 'json'
-        });
+        loadMachineTranslations($('#js-translate-all').attr('href'));
     });
 
     /* Git commit tooltip */
@@ -22,7 +22,8 @@ from django.contrib import admin
 from django.utils.translation import ugettext_lazy as _
 
 from weblate.auth.models import User
-from weblate.trans.models import AutoComponentList, Unit
+from weblate.checks.runner import update_translation_checks
+from weblate.trans.models import AutoComponentList, Translation
 from weblate.trans.util import sort_choices
 
 from weblate.wladmin.models import WeblateModelAdmin
@@ -67,18 +68,11 @@ class ProjectAdmin(WeblateModelAdmin):
     def update_checks(self, request, queryset):
         """Recalculate checks for selected components."""
         cnt = 0
-        units = Unit.objects.filter(
-            translation__component__project__in=queryset
+        translations = Translation.objects.prefetch().filter(
+            component__project__in=queryset
         )
-        translations = {}
-        for unit in units.iterator():
-            unit.run_checks()
-            if unit.translation.id not in translations:
-                translations[unit.translation.id] = unit.translation
-            cnt += 1
-
-        for translation in translations.values():
-            translation.invalidate_cache()
+        for translation in translations:
+            cnt += update_translation_checks(translation)
         self.message_user(
             request, "Updated checks for {0:d} units.".format(cnt)
         )
@@ -125,13 +119,11 @@ class ComponentAdmin(WeblateModelAdmin):
     def update_checks(self, request, queryset):
         """Recalculate checks for selected components."""
         cnt = 0
-        units = Unit.objects.filter(
-            translation__component__in=queryset
+        translations = Translation.objects.prefetch().filter(
+            component__in=queryset
         )
-        for unit in units.iterator():
-            unit.run_checks()
-            unit.translation.invalidate_cache()
-            cnt += 1
+        for translation in translations:
+            cnt += update_translation_checks(translation)
         self.message_user(
             request,
             "Updated checks for {0:d} units.".format(cnt)
@@ -101,48 +101,42 @@ class AutoTranslate(object):
 
     def fetch_mt(self, engines, threshold):
         """Get the translations"""
+        units = list(self.get_units())
+        texts = [unit.get_source_plurals()[0] for unit in units]
+        max_quality = [threshold - 1] * len(units)
         translations = {}
 
-        for unit in self.get_units().iterator():
-            # a list to store all found translations
-            max_quality = threshold - 1
-            translation = None
+        # Run engines with higher maximal score first
+        engines = sorted(
+            engines,
+            key=lambda x: MACHINE_TRANSLATION_SERVICES[x].get_rank(),
+            reverse=True
+        )
+        for engine in engines:
+            translation_service = MACHINE_TRANSLATION_SERVICES[engine]
+
+            # Skip units where service can not provide better results.
+            # Typically we skip machine translation when we have
+            # a terminology match.
+            positions = [
+                pos for pos, quality in enumerate(max_quality)
+                if quality < translation_service.max_score
+            ]
+            if not positions:
+                continue
 
-            # Run engines with higher maximal score first
-            engines = sorted(
-                engines,
-                key=lambda x: MACHINE_TRANSLATION_SERVICES[x].get_rank(),
-                reverse=True
+            results = translation_service.translate_batch(
+                self.translation.language.code,
+                [texts[pos] for pos in positions],
+                [units[pos] for pos in positions],
+                self.user
             )
-            for engine in engines:
-                translation_service = MACHINE_TRANSLATION_SERVICES[engine]
-
-                # Skip service if it can not provide better results.
-                # Typically we skip machine translation when we have
-                # a terminology match.
-                if max_quality >= translation_service.max_score:
-                    continue
-
-                result = translation_service.translate(
-                    self.translation.language.code,
-                    unit.get_source_plurals()[0],
-                    unit,
-                    self.user
-                )
 
+            for pos, result in zip(positions, results):
                 for item in result:
-                    if item['quality'] > max_quality:
-                        max_quality = item['quality']
-                        translation = item['text']
-
-                # Break if we can't get better match
-                if max_quality == 100:
-                    break
-
-            if translation is None:
-                continue
-
-            translations[unit.pk] = translation
+                    if item['quality'] > max_quality[pos]:
+                        max_quality[pos] = item['quality']
+                        translations[units[pos].pk] = item['text']
 
         return translations
 
@@ -27,8 +27,6 @@ from django.db import transaction
 
 from social_django.models import Partial
 
-from whoosh.index import EmptyIndexError
-
 from weblate.auth.models import get_anonymous
 from weblate.checks.models import Check
 from weblate.trans.models import (
@@ -36,7 +34,7 @@ from weblate.trans.models import (
 )
 from weblate.lang.models import Language
 from weblate.screenshots.models import Screenshot
-from weblate.trans.search import get_target_index, clean_search_unit
+from weblate.trans.search import cleanup_indexes
 from weblate.utils.state import STATE_TRANSLATED
 
 
@@ -92,21 +90,7 @@ class Command(BaseCommand):
 
     def cleanup_fulltext(self):
         """Remove stale units from fulltext"""
-        with transaction.atomic():
-            languages = list(Language.objects.have_translation().values_list(
-                'code', flat=True
-            ))
-        # We operate only on target indexes as they will have all IDs anyway
-        for lang in languages:
-            index = get_target_index(lang)
-            try:
-                fields = index.reader().all_stored_fields()
-            except EmptyIndexError:
-                continue
-            for item in fields:
-                if Unit.objects.filter(pk=item['pk']).exists():
-                    continue
-                clean_search_unit(item['pk'], lang)
+        cleanup_indexes()
 
     def cleanup_database(self):
         """Cleanup the database"""
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from time import sleep
+
+from django.conf import settings
+
+from weblate.trans.management.commands import WeblateCommand
+from weblate.trans.models import RepositoryJob
+
+
+class Command(WeblateCommand):
+    help = 'performs queued repository operations'
+
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--limit',
+            action='store',
+            type=int,
+            dest='limit',
+            default=100,
+            help='number of jobs to process in one run'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            dest='loop',
+            default=False,
+            help='keep waiting for new jobs'
+        )
+        parser.add_argument(
+            '--interval',
+            action='store',
+            type=int,
+            dest='interval',
+            default=5,
+            help='seconds to wait for new jobs in loop mode'
+        )
+
+    def handle(self, *args, **options):
+        RepositoryJob.objects.fail_stale(settings.REPOSITORY_JOB_TIMEOUT)
+        while True:
+            processed = self.process_jobs(options['limit'])
+            if not options['loop']:
+                return
+            if not processed:
+                sleep(options['interval'])
+
+    def process_jobs(self, limit):
+        """Process queued jobs, returns number of processed ones."""
+        for processed in range(limit):
+            job = RepositoryJob.objects.claim()
+            if job is None:
+                return processed
+            job.run()
+        return limit
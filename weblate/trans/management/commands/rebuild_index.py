@@ -20,11 +20,8 @@
 
 from weblate.trans.management.commands import WeblateComponentCommand
 from weblate.trans.search import (
-    get_source_index, get_target_index,
-    update_source_unit_index, update_target_unit_index,
-    clean_indexes,
+    clean_indexes, index_units, optimize_indexes,
 )
-from weblate.lang.models import Language
 from weblate.memory.storage import TranslationMemory
 
 
@@ -52,12 +49,7 @@ class Command(WeblateComponentCommand):
         """Optimize index structures"""
         memory = TranslationMemory()
         memory.index.optimize()
-        index = get_source_index()
-        index.optimize()
-        languages = Language.objects.have_translation()
-        for lang in languages:
-            index = get_target_index(lang.code)
-            index.optimize()
+        optimize_indexes()
 
     def handle(self, *args, **options):
         # Optimize index
@@ -68,25 +60,5 @@ class Command(WeblateComponentCommand):
         if options['clean']:
             clean_indexes()
 
-        # Open writer
-        source_writer = get_source_index().writer()
-        target_writers = {}
-
-        try:
-            # Process all units
-            for unit in self.iterate_units(**options):
-                lang = unit.translation.language.code
-                # Lazy open writer
-                if lang not in target_writers:
-                    target_writers[lang] = get_target_index(lang).writer()
-                # Update target index
-                if unit.translation:
-                    update_target_unit_index(target_writers[lang], unit)
-                # Update source index
-                update_source_unit_index(source_writer, unit)
-
-        finally:
-            # Close all writers
-            source_writer.commit()
-            for code in target_writers:
-                target_writers[code].commit()
+        # Process all units
+        index_units(self.iterate_units(**options))
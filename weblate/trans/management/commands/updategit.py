@@ -19,11 +19,24 @@
 #
 
 from weblate.trans.management.commands import WeblateComponentCommand
+from weblate.trans.scheduler import update_components
 
 
 class Command(WeblateComponentCommand):
     help = 'updates git repos'
 
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            dest='workers',
+            default=4,
+            help='Number of repositories to fetch concurrently'
+        )
+
     def handle(self, *args, **options):
-        for component in self.get_components(*args, **options):
-            component.do_update()
+        update_components(
+            self.get_components(*args, **options),
+            workers=max(1, options['workers']),
+        )
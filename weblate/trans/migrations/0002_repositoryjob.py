@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.0.13 on 2026-10-17 14:10
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('trans', '0001_squashed_0143_auto_20180609_1655'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RepositoryJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operation', models.CharField(choices=[('commit', 'Commit'), ('pull', 'Update'), ('push', 'Push'), ('reset', 'Reset')], max_length=10)),
+                ('method', models.CharField(blank=True, default='', max_length=10)),
+                ('state', models.IntegerField(choices=[(0, 'Queued'), (1, 'Running'), (2, 'Done'), (3, 'Failed')], db_index=True, default=0)),
+                ('result', models.NullBooleanField()),
+                ('message', models.TextField(blank=True, default='')),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('started', models.DateTimeField(null=True)),
+                ('finished', models.DateTimeField(null=True)),
+                ('component', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='trans.Component')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='trans.Project')),
+                ('translation', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='trans.Translation')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['pk'],
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 2.0.13 on 2026-10-17 16:02
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trans', '0002_repositoryjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='component',
+            name='synced_revision',
+            field=models.CharField(
+                blank=True, default='', editable=False, max_length=100
+            ),
+        ),
+    ]
@@ -42,6 +42,7 @@ from weblate.trans.models.whiteboard import WhiteboardMessage
 from weblate.trans.models.componentlist import (
     ComponentList, AutoComponentList,
 )
+from weblate.trans.models.job import RepositoryJob
 from weblate.trans.signals import user_pre_delete
 from weblate.utils.decorators import disable_for_loaddata
 
@@ -49,7 +50,7 @@ __all__ = [
     'Project', 'Component', 'Translation', 'Unit', 'Suggestion',
     'Comment', 'Vote', 'IndexUpdate', 'Change', 'Dictionary', 'Source',
     'WhiteboardMessage', 'ComponentList',
-    'WeblateConf', 'ContributorAgreement',
+    'WeblateConf', 'ContributorAgreement', 'RepositoryJob',
 ]
 
 
@@ -68,6 +69,15 @@ def delete_object_dir(sender, instance, **kwargs):
         shutil.rmtree(project_path)
 
 
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Component)
+@receiver(post_delete, sender=Translation)
+@receiver(post_delete, sender=ComponentList)
+def delete_object_stats(sender, instance, **kwargs):
+    """Handler to remove stored stats on object deletion."""
+    instance.stats.delete()
+
+
 @receiver(post_save, sender=Source)
 @disable_for_loaddata
 def update_source(sender, instance, **kwargs):
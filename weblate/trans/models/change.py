@@ -155,6 +155,12 @@ class ChangeManager(models.Manager):
             user = None
         return super(ChangeManager, self).create(user=user, **kwargs)
 
+    def bulk_create(self, objs, *args, **kwargs):
+        """Wrapper to fill in related objects same as save does."""
+        for change in objs:
+            change.fill_related()
+        return super(ChangeManager, self).bulk_create(objs, *args, **kwargs)
+
 
 @python_2_unicode_compatible
 class Change(models.Model, UserDisplayMixin):
@@ -404,7 +410,8 @@ class Change(models.Model, UserDisplayMixin):
             return self.details['username']
         return ''
 
-    def save(self, *args, **kwargs):
+    def fill_related(self):
+        """Fill in denormalized relations based on the most specific one."""
         if self.unit:
             self.translation = self.unit.translation
         if self.translation:
@@ -414,4 +421,7 @@ class Change(models.Model, UserDisplayMixin):
             self.project = self.component.project
         if self.dictionary:
             self.project = self.dictionary.project
+
+    def save(self, *args, **kwargs):
+        self.fill_related()
         super(Change, self).save(*args, **kwargs)
@@ -415,6 +415,11 @@ class Component(models.Model, URLMixin, PathMixin):
         ),
     )
 
+    # Repository revision all translations were last loaded from
+    synced_revision = models.CharField(
+        max_length=100, default='', blank=True, editable=False
+    )
+
     objects = ComponentQuerySet.as_manager()
 
     is_lockable = True
@@ -601,13 +606,17 @@ class Component(models.Model, URLMixin, PathMixin):
             self.repository.configure_branch(self.branch)
 
     @perform_on_link
-    def do_update(self, request=None, method=None):
-        """Wrapper for doing repository update"""
+    def do_update(self, request=None, method=None, fetch=True):
+        """Wrapper for doing repository update
+
+        The fetch can be disabled in case remote repository was already
+        fetched, see weblate.trans.scheduler.
+        """
         # Hold lock all time here to avoid somebody writing between commit
         # and merge/rebase.
         with self.repository.lock:
             # pull remote
-            if not self.update_remote_branch():
+            if fetch and not self.update_remote_branch():
                 return False
 
             # do we have something to merge?
@@ -626,9 +635,9 @@ class Component(models.Model, URLMixin, PathMixin):
             # update local branch
             ret = self.update_branch(request, method=method)
 
-        # create translation objects for all files
+        # create translation objects for changed files
         try:
-            self.create_translations(request=request)
+            self.create_translations(request=request, incremental=True)
         except ParseError:
             ret = False
 
@@ -911,12 +920,55 @@ class Component(models.Model, URLMixin, PathMixin):
 
         return sorted(matches)
 
+    def get_changed_files(self, revision):
+        """Return set of files changed in the repository since revision.
+
+        None is returned if the list can not be obtained.
+        """
+        if not revision:
+            return None
+        try:
+            return set(self.repository.list_changed_files(revision))
+        except (RepositoryException, NotImplementedError) as error:
+            self.log_info('could not list changed files: %s', error)
+            return None
+
     def create_translations(self, force=False, langs=None, request=None,
-                            changed_template=False):
-        """Load translations from VCS."""
+                            changed_template=False, incremental=False):
+        """Load translations from VCS.
+
+        With incremental only translations for files changed since last
+        completely loaded revision are loaded, created or removed.
+        """
         translations = set()
         languages = set()
         matches = self.get_mask_matches()
+        try:
+            revision = self.repository.last_revision
+        except RepositoryException:
+            revision = ''
+        changed = None
+        if incremental and not force:
+            changed = self.get_changed_files(self.synced_revision)
+        if (changed is not None and self.has_template() and
+                self.template in changed):
+            # Template change affects all translations
+            changed = None
+        if changed is not None:
+            matches = [path for path in matches if path in changed]
+            existing = self.translation_set.values_list(
+                'id', 'filename', 'language__code'
+            )
+            # Only translations for changed files can be removed
+            removable = [
+                pk for pk, filename, code in existing if filename in changed
+            ]
+            # Languages of translations which are not going to be updated
+            languages.update(
+                code for pk, filename, code in existing
+                if filename not in changed
+            )
+        blob_hashes = self.get_blob_hashes(matches)
         for pos, path in enumerate(matches):
             with transaction.atomic():
                 code = self.get_lang_code(path)
@@ -936,7 +988,8 @@ class Component(models.Model, URLMixin, PathMixin):
                     self.log_error('duplicate language found: %s', lang.code)
                     continue
                 translation = Translation.objects.check_sync(
-                    self, lang, code, path, force, request=request
+                    self, lang, code, path, force, request=request,
+                    blob_hashes=blob_hashes
                 )
                 translations.add(translation.id)
                 languages.add(lang.code)
@@ -951,6 +1004,8 @@ class Component(models.Model, URLMixin, PathMixin):
         # Delete possibly no longer existing translations
         if langs is None:
             todelete = self.translation_set.exclude(id__in=translations)
+            if changed is not None:
+                todelete = todelete.filter(id__in=removable)
             if todelete.exists():
                 with transaction.atomic():
                     self.log_info(
@@ -965,10 +1020,31 @@ class Component(models.Model, URLMixin, PathMixin):
                 'updating linked project %s',
                 component
             )
-            component.create_translations(force, langs, request=request)
+            component.create_translations(
+                force, langs, request=request, incremental=incremental
+            )
+
+        # Remember revision for following incremental loads, these have to
+        # reload files not processed due to failure as well
+        if langs is None and revision != self.synced_revision:
+            self.synced_revision = revision
+            Component.objects.filter(pk=self.pk).update(
+                synced_revision=revision
+            )
 
         self.log_info('updating completed')
 
+    def get_blob_hashes(self, filenames):
+        """Return mapping of filenames to VCS blob hashes.
+
+        The template is included as well as it is part of revision of
+        every translation.
+        """
+        filenames = set(filenames)
+        if self.has_template():
+            filenames.add(self.template)
+        return self.repository.get_object_hashes(filenames)
+
     def get_lang_code(self, path):
         """Parse language code from path."""
         # Parse filename
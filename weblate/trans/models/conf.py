@@ -55,6 +55,12 @@ class WeblateConf(AppConf):
     # Whether to run hooks in background
     BACKGROUND_HOOKS = True
 
+    # Whether to queue repository operations from web
+    BACKGROUND_REPOSITORY = False
+
+    # Seconds after which running repository job is considered stale
+    REPOSITORY_JOB_TIMEOUT = 3600
+
     # Number of nearby messages to show in each direction
     NEARBY_MESSAGES = 5
 
@@ -67,6 +73,9 @@ class WeblateConf(AppConf):
     # Offload indexing
     OFFLOAD_INDEXING = False
 
+    # Fulltext search backend
+    SEARCH_BACKEND = 'weblate.trans.search.whooshsearch.WhooshSearch'
+
     # List of quality checks
     CHECK_LIST = (
         'weblate.checks.same.SameCheck',
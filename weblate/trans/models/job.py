@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+from __future__ import unicode_literals
+
+import sys
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.encoding import python_2_unicode_compatible, force_text
+from django.utils.translation import ugettext as _, ugettext_lazy
+
+from filelock import Timeout
+
+from weblate.trans.models.component import Component, MERGE_CHOICES
+from weblate.trans.models.translation import Translation
+from weblate.utils.errors import report_error
+
+JOB_OPERATIONS = {
+    'commit': 'commit_pending',
+    'pull': 'do_update',
+    'push': 'do_push',
+    'reset': 'do_reset',
+}
+JOB_METHODS = frozenset(choice[0] for choice in MERGE_CHOICES)
+
+
+class JobMessages(list):
+    """Message storage collecting messages from repository operations."""
+    def add(self, level, message, extra_tags=''):
+        self.append(force_text(message))
+
+
+class JobRequest(object):
+    """Request like object to run repository operations outside of HTTP
+    request.
+    """
+    def __init__(self, user):
+        self.user = user
+        self._messages = JobMessages()
+
+
+class RepositoryJobManager(models.Manager):
+    def enqueue(self, obj, operation, user=None, method=None):
+        """Queue repository operation on project, component or translation.
+
+        Returns already queued job if there is identical one.
+        """
+        if method and method not in JOB_METHODS:
+            raise ValueError('Invalid update method: {0}'.format(method))
+        if isinstance(obj, Translation):
+            target = {
+                'project': obj.component.project,
+                'component': obj.component,
+                'translation': obj,
+            }
+        elif isinstance(obj, Component):
+            target = {
+                'project': obj.project,
+                'component': obj,
+                'translation': None,
+            }
+        else:
+            target = {
+                'project': obj,
+                'component': None,
+                'translation': None,
+            }
+        with transaction.atomic():
+            job = self.filter(
+                state=RepositoryJob.STATE_QUEUED,
+                operation=operation,
+                method=method or '',
+                **target
+            ).first()
+            if job is None:
+                job = self.create(
+                    operation=operation,
+                    method=method or '',
+                    user=user,
+                    **target
+                )
+        return job
+
+    def claim(self):
+        """Return next queued job and mark it as running.
+
+        Returns None if there is no queued job.
+        """
+        for job in self.filter(state=RepositoryJob.STATE_QUEUED)[:10]:
+            # Make sure no other worker has claimed the job meanwhile
+            updated = self.filter(
+                pk=job.pk, state=RepositoryJob.STATE_QUEUED
+            ).update(
+                state=RepositoryJob.STATE_RUNNING, started=timezone.now()
+            )
+            if updated:
+                job.refresh_from_db()
+                return job
+        return None
+
+    def fail_stale(self, timeout):
+        """Mark jobs running longer than timeout seconds as failed.
+
+        These were left behind by worker which was terminated while
+        processing them. Returns number of failed jobs.
+        """
+        now = timezone.now()
+        return self.filter(
+            state=RepositoryJob.STATE_RUNNING,
+            started__lt=now - timedelta(seconds=timeout),
+        ).update(
+            state=RepositoryJob.STATE_FAILED,
+            result=False,
+            message=_('The job was interrupted.'),
+            finished=now,
+        )
+
+
+@python_2_unicode_compatible
+class RepositoryJob(models.Model):
+    STATE_QUEUED = 0
+    STATE_RUNNING = 1
+    STATE_DONE = 2
+    STATE_FAILED = 3
+
+    STATE_CHOICES = (
+        (STATE_QUEUED, ugettext_lazy('Queued')),
+        (STATE_RUNNING, ugettext_lazy('Running')),
+        (STATE_DONE, ugettext_lazy('Done')),
+        (STATE_FAILED, ugettext_lazy('Failed')),
+    )
+
+    OPERATION_CHOICES = (
+        ('commit', ugettext_lazy('Commit')),
+        ('pull', ugettext_lazy('Update')),
+        ('push', ugettext_lazy('Push')),
+        ('reset', ugettext_lazy('Reset')),
+    )
+
+    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
+    method = models.CharField(max_length=10, blank=True, default='')
+    project = models.ForeignKey(
+        'Project', on_delete=models.deletion.CASCADE
+    )
+    component = models.ForeignKey(
+        'Component', null=True, on_delete=models.deletion.CASCADE
+    )
+    translation = models.ForeignKey(
+        'Translation', null=True, on_delete=models.deletion.CASCADE
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True,
+        on_delete=models.deletion.SET_NULL
+    )
+    state = models.IntegerField(
+        choices=STATE_CHOICES, default=STATE_QUEUED, db_index=True
+    )
+    result = models.NullBooleanField()
+    message = models.TextField(blank=True, default='')
+    timestamp = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True)
+    finished = models.DateTimeField(null=True)
+
+    objects = RepositoryJobManager()
+
+    class Meta(object):
+        app_label = 'trans'
+        ordering = ['pk']
+
+    def __str__(self):
+        return '{0}: {1}'.format(
+            self.get_operation_display(), self.get_object()
+        )
+
+    def get_object(self):
+        """Return project, component or translation to operate on."""
+        if self.translation is not None:
+            return self.translation
+        if self.component is not None:
+            return self.component
+        return self.project
+
+    def run(self):
+        """Perform the repository operation and store its outcome."""
+        request = JobRequest(self.user)
+        obj = self.get_object()
+        kwargs = {}
+        if self.operation == 'pull' and self.method:
+            kwargs['method'] = self.method
+        try:
+            result = getattr(obj, JOB_OPERATIONS[self.operation])(
+                request, **kwargs
+            )
+            # With False the operation is supposed to report errors
+            self.result = result is None or bool(result)
+            self.state = self.STATE_DONE
+        except Timeout as error:
+            request._messages.append(_(
+                'Failed to lock the repository, '
+                'another operation in progress.'
+            ))
+            report_error(error, sys.exc_info())
+            self.result = False
+            self.state = self.STATE_FAILED
+        except Exception as error:
+            request._messages.append(force_text(error))
+            report_error(error, sys.exc_info())
+            self.result = False
+            self.state = self.STATE_FAILED
+        self.message = '\n'.join(request._messages)
+        self.finished = timezone.now()
+        self.save(update_fields=['result', 'state', 'message', 'finished'])
+        return self.result
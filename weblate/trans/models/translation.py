@@ -20,10 +20,12 @@
 
 from __future__ import unicode_literals
 
+from collections import OrderedDict
 import os
 import codecs
 
 from django.db import models, transaction
+from django.db.models.signals import post_save
 from django.db.models.aggregates import Max
 from django.utils.translation import ugettext as _
 from django.utils.encoding import python_2_unicode_compatible, force_text
@@ -36,14 +38,17 @@ from weblate.lang.models import Language, Plural
 from weblate.formats import ParseError
 from weblate.formats.auto import try_load
 from weblate.checks import CHECKS
+from weblate.checks.runner import CheckRunner
 from weblate.trans.models.unit import (
     Unit, STATE_TRANSLATED, STATE_FUZZY, STATE_APPROVED,
 )
 from weblate.utils.stats import TranslationStats
 from weblate.utils.render import render_template
+from weblate.trans.models.source import Source
 from weblate.trans.models.suggestion import Suggestion
+from weblate.trans.search import update_index_units
 from weblate.trans.signals import (
-    vcs_pre_commit, vcs_post_commit, store_post_load
+    vcs_pre_commit, vcs_post_commit, store_post_load, unit_pre_create,
 )
 from weblate.utils.site import get_site_url
 from weblate.trans.util import split_plural
@@ -54,7 +59,7 @@ from weblate.trans.checklists import TranslationChecklist
 
 class TranslationManager(models.Manager):
     def check_sync(self, component, lang, code, path, force=False,
-                   request=None):
+                   request=None, blob_hashes=None):
         """Parse translation meta info and updates translation object"""
         translation, dummy = self.get_or_create(
             language=lang,
@@ -70,7 +75,9 @@ class TranslationManager(models.Manager):
             translation.filename = path
             translation.language_code = code
             translation.save(update_fields=['filename', 'language_code'])
-        translation.check_sync(force, request=request)
+        translation.check_sync(
+            force, request=request, blob_hashes=blob_hashes
+        )
 
         return translation
 
@@ -225,7 +232,8 @@ class Translation(models.Model, URLMixin, LoggerMixin):
         except Exception as exc:
             self.component.handle_parse_error(exc, self)
 
-    def check_sync(self, force=False, request=None, change=None):
+    def check_sync(self, force=False, request=None, change=None,
+                   blob_hashes=None):
         """Check whether database is in sync with git and possibly updates"""
 
         if change is None:
@@ -236,7 +244,12 @@ class Translation(models.Model, URLMixin, LoggerMixin):
             user = request.user
 
         # Check if we're not already up to date
-        if self.revision != self.get_git_blob_hash():
+        revision = self.get_git_blob_hash(blob_hashes)
+        if self.revision != revision and blob_hashes:
+            # Hashes from the index differ from the stored content hashes
+            # for files using git content filters
+            revision = self.get_git_blob_hash()
+        if self.revision != revision:
             reason = 'revision has changed'
         elif force:
             reason = 'check forced'
@@ -249,72 +262,112 @@ class Translation(models.Model, URLMixin, LoggerMixin):
             reason,
         )
 
-        # List of created units (used for cleanup and duplicates detection)
-        created_units = set()
-
         # Store plural
         plural = self.store.get_plural(self.language)
         if plural != self.plural:
             self.plural = plural
             self.save(update_fields=['plural'])
 
-        # Was there change?
-        was_new = False
+        # Preload existing units, all changes are done in memory and
+        # stored in bulk once whole file has been processed
+        existing = {unit.id_hash: unit for unit in self.unit_set.all()}
+        # Units to create and update keyed by id_hash
+        created = OrderedDict()
+        updated = OrderedDict()
+        # Units seen in the file (used for cleanup and duplicates detection)
+        seen = set()
+        duplicates = []
         # Position of current unit
-        pos = 1
-
-        # Select all current units for update
-        self.unit_set.select_for_update()
+        pos = 0
 
         for unit in self.store.all_units():
             if not unit.is_translatable():
                 continue
 
-            newunit, is_new = Unit.objects.update_from_unit(
-                self, unit, pos
-            )
-
-            # Check if unit is worth notification:
-            # - new and untranslated
-            # - newly not translated
-            # - newly fuzzy
-            was_new = (
-                was_new or
-                (
-                    newunit.state < STATE_TRANSLATED and
-                    (newunit.state != newunit.old_unit.state or is_new)
-                )
-            )
-
             # Update position
             pos += 1
 
-            # Check for possible duplicate units
-            if newunit.id in created_units:
-                self.log_error(
-                    'duplicate string to translate: %s (%s)',
-                    newunit,
-                    repr(newunit.source)
-                )
-                Change.objects.create(
-                    unit=newunit,
-                    action=Change.ACTION_DUPLICATE_STRING,
-                    user=user,
-                    author=user
-                )
+            id_hash = unit.get_id_hash()
 
-            # Store current unit ID
-            created_units.add(newunit.id)
+            if id_hash in existing:
+                newunit = existing[id_hash]
+                is_new = False
+            elif id_hash in created:
+                newunit = created[id_hash]
+                is_new = True
+            else:
+                newunit = Unit(
+                    translation=self,
+                    id_hash=id_hash,
+                    content_hash=unit.get_content_hash(),
+                    source=unit.get_source(),
+                    context=unit.get_context(),
+                )
+                is_new = True
+
+            changes = newunit.load_unit_data(unit, pos, is_new)
+
+            if is_new:
+                created[id_hash] = newunit
+            elif changes is not None:
+                if id_hash in updated:
+                    # Merge with changes done by duplicate string
+                    previous = updated[id_hash]
+                    changes = (
+                        previous[0] and changes[0],
+                        previous[1] and changes[1],
+                        previous[2] or changes[2],
+                    )
+                updated[id_hash] = changes
 
-        # Following query can get huge, so we should find better way
-        # to delete stale units, probably sort of garbage collection
+            # Check for possible duplicate units
+            if id_hash in seen:
+                duplicates.append(newunit)
 
-        # We should also do cleanup on source strings tracking objects
+            # Store current unit ID
+            seen.add(id_hash)
 
         # Delete stale units
-        self.unit_set.exclude(
-            id__in=created_units
-        ).delete()
+        stale = [
+            unit.pk for id_hash, unit in existing.items()
+            if id_hash not in seen
+        ]
+        if stale:
+            self.unit_set.filter(pk__in=stale).delete()
+
+        new_sources = self.sync_units(created, updated, existing)
+
+        # Check if unit is worth notification:
+        # - new and untranslated
+        # - newly not translated
+        # - newly fuzzy
+        was_new = any(
+            unit.state < STATE_TRANSLATED for unit in created.values()
+        ) or any(
+            existing[id_hash].state < STATE_TRANSLATED and
+            existing[id_hash].state != existing[id_hash].old_unit.state
+            for id_hash in updated
+        )
+
+        # Store change entries for new source strings and duplicates
+        changes = [
+            Change(unit=unit, action=Change.ACTION_NEW_SOURCE)
+            for unit in new_sources
+        ]
+        author = user if user is not None and user.is_authenticated else None
+        for unit in duplicates:
+            self.log_error(
+                'duplicate string to translate: %s (%s)',
+                unit,
+                repr(unit.source)
+            )
+            changes.append(Change(
+                unit=unit,
+                action=Change.ACTION_DUPLICATE_STRING,
+                user=author,
+                author=author
+            ))
+        Change.objects.bulk_create(changes)
 
         # Update revision and stats
         self.invalidate_cache()
@@ -333,6 +386,85 @@ class Translation(models.Model, URLMixin, LoggerMixin):
             from weblate.accounts.notifications import notify_new_string
             notify_new_string(self)
 
+    def sync_units(self, created, updated, existing):
+        """Store units changed while parsing the file in bulk.
+
+        Checks, fulltext index and flags are updated once all units are
+        stored. Returns list of units for which source string tracking
+        has been created.
+        """
+        changed = list(created.values()) + [
+            existing[id_hash] for id_hash in updated
+        ]
+
+        # Ensure we track source strings
+        sources = {
+            source.id_hash: source
+            for source in self.component.source_set.all()
+        }
+        new_sources = [
+            unit for unit in changed if unit.id_hash not in sources
+        ]
+        sources.update({
+            source.id_hash: source
+            for source in Source.objects.bulk_create([
+                Source(id_hash=unit.id_hash, component=self.component)
+                for unit in new_sources
+            ])
+        })
+        for unit in changed:
+            unit.priority = sources[unit.id_hash].priority
+
+        # Create new units
+        for unit in created.values():
+            unit_pre_create.send(sender=Unit, unit=unit)
+            unit.num_words = unit.get_num_words()
+        Unit.objects.bulk_create(created.values())
+        if created and next(iter(created.values())).pk is None:
+            # Database backend does not return IDs from bulk insert
+            ids = dict(self.unit_set.values_list('id_hash', 'id'))
+            for unit in created.values():
+                unit.pk = ids[unit.id_hash]
+                unit._state.adding = False
+                unit._state.db = self._state.db
+        for unit in created.values():
+            post_save.send(
+                sender=Unit, instance=unit, created=True,
+                update_fields=None, raw=False, using=self._state.db
+            )
+
+        # Update existing units, Django does not provide bulk update
+        for id_hash, changes in updated.items():
+            existing[id_hash].save(
+                backend=True,
+                same_content=changes[0],
+                same_state=changes[1],
+                batch=True,
+            )
+
+        # Update checks and flags
+        runner = CheckRunner(self)
+        for unit in created.values():
+            runner.add(unit, False, True)
+        for id_hash, changes in updated.items():
+            if not changes[0] or not changes[1]:
+                runner.add(existing[id_hash], changes[1])
+        runner.run()
+        for id_hash, changes in updated.items():
+            if changes[2]:
+                existing[id_hash].update_flags()
+
+        # Update fulltext index
+        update_index_units(
+            list(created.values()) + [
+                existing[id_hash]
+                for id_hash, changes in updated.items() if not changes[0]
+            ],
+            self.language.code
+        )
+
+        return new_sources
+
     def get_last_remote_commit(self):
         return self.component.get_last_remote_commit()
 
@@ -348,19 +480,28 @@ class Translation(models.Model, URLMixin, LoggerMixin):
     def can_push(self):
         return self.component.can_push()
 
-    def get_git_blob_hash(self):
-        """Return current VCS blob hash for file."""
-        ret = self.component.repository.get_object_hash(self.get_filename())
+    def get_git_blob_hash(self, blob_hashes=None):
+        """Return current VCS blob hash for file.
+
+        The blob_hashes can contain hashes looked up in advance for whole
+        component by Component.get_blob_hashes.
+        """
+        if blob_hashes is None:
+            blob_hashes = {}
+        repository = self.component.repository
+
+        ret = blob_hashes.get(self.filename)
+        if ret is None:
+            ret = repository.get_object_hash(self.get_filename())
 
         if not self.component.has_template():
             return ret
 
-        return ','.join([
-            ret,
-            self.component.repository.get_object_hash(
-                self.component.template
-            )
-        ])
+        template = blob_hashes.get(self.component.template)
+        if template is None:
+            template = repository.get_object_hash(self.component.template)
+
+        return ','.join([ret, template])
 
     def store_hash(self):
         """Store current hash in database."""
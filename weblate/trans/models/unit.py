@@ -23,7 +23,6 @@ from __future__ import unicode_literals
 from copy import copy
 import functools
 import traceback
-import multiprocessing
 
 from django.conf import settings
 from django.db import models, transaction
@@ -36,11 +35,15 @@ import six
 
 from weblate.checks import CHECKS
 from weblate.checks.models import Check
+from weblate.memory.models import add_memory_update
 from weblate.trans.models.source import Source
 from weblate.trans.models.comment import Comment
 from weblate.trans.models.suggestion import Suggestion
 from weblate.trans.models.change import Change
-from weblate.trans.search import update_index_unit, fulltext_search, more_like
+from weblate.trans.search import (
+    update_index_unit, search_units, more_like, get_backend,
+)
+from weblate.trans.search.workers import get_pool
 from weblate.trans.signals import unit_pre_create
 from weblate.trans.mixins import LoggerMixin
 from weblate.trans.util import (
@@ -71,14 +74,6 @@ SIMPLE_FILTERS = {
 SEARCH_FILTERS = ('source', 'target', 'context', 'location', 'comment')
 
 
-def more_like_queue(pk, source, top, queue):
-    """
-    Multiprocess wrapper around more_like.
-    """
-    result = more_like(pk, source, top)
-    queue.put(result)
-
-
 class UnitManager(models.Manager):
     @staticmethod
     def update_from_unit(translation, unit, pos):
@@ -272,37 +267,32 @@ class UnitQuerySet(models.QuerySet):
 
             result = base.filter(query)
         else:
-            langs = set(self.values_list(
-                'translation__language__code', flat=True
-            ))
-            result = base.filter(
-                pk__in=fulltext_search(
-                    params['q'],
-                    langs,
-                    params
-                )
+            if translation is not None:
+                langs = {translation.language.code}
+            elif language is not None:
+                langs = {language.code}
+            elif params.get('lang'):
+                langs = set(params['lang'])
+            else:
+                langs = set(self.order_by().values_list(
+                    'translation__language__code', flat=True
+                ).distinct())
+            result = search_units(
+                base,
+                params['q'],
+                langs,
+                params,
+                translation
             )
         return result
 
     def more_like_this(self, unit, top=5):
         """Find closely similar units."""
-        if settings.MT_WEBLATE_LIMIT >= 0:
-            queue = multiprocessing.Queue()
-            proc = multiprocessing.Process(
-                target=more_like_queue,
-                args=(unit.pk, unit.source, top, queue)
+        # Database based backends would need connection in every worker
+        if settings.MT_WEBLATE_LIMIT >= 0 and get_backend().separate_index:
+            more_results = get_pool().more_like(
+                unit.pk, unit.source, top, settings.MT_WEBLATE_LIMIT
             )
-            proc.start()
-            proc.join(settings.MT_WEBLATE_LIMIT)
-            if proc.is_alive():
-                proc.terminate()
-
-            if queue.empty():
-                raise Exception(
-                    'Request for more like {0} timed out.'.format(unit.pk)
-                )
-
-            more_results = queue.get()
         else:
             more_results = more_like(unit.pk, unit.source, top)
 
@@ -450,8 +440,13 @@ class Unit(models.Model, LoggerMixin):
             return STATE_APPROVED
         return STATE_TRANSLATED
 
-    def update_from_unit(self, unit, pos, created):
-        """Update Unit from ttkit unit."""
+    def load_unit_data(self, unit, pos, created):
+        """Load data from ttkit unit without saving them.
+
+        Returns None if there is no change, otherwise tuple of flags
+        indicating whether content and state are same and whether content
+        hash has been changed.
+        """
         # Get unit attributes
         location = unit.get_locations()
         flags = unit.get_flags()
@@ -496,13 +491,8 @@ class Unit(models.Model, LoggerMixin):
                 pos == self.position and
                 content_hash == self.content_hash and
                 previous_source == self.previous_source):
-            return
+            return None
 
-        # Ensure we track source string
-        source_info, source_created = Source.objects.get_or_create(
-            id_hash=self.id_hash,
-            component=self.translation.component
-        )
         contentsum_changed = self.content_hash != content_hash
 
         # Store updated values
@@ -515,12 +505,27 @@ class Unit(models.Model, LoggerMixin):
         self.comment = comment
         self.content_hash = content_hash
         self.previous_source = previous_source
-        self.priority = source_info.priority
 
         # Sanitize number of plurals
         if self.is_plural():
             self.target = join_plural(self.get_target_plurals())
 
+        return same_content, same_state, contentsum_changed
+
+    def update_from_unit(self, unit, pos, created):
+        """Update Unit from ttkit unit."""
+        changes = self.load_unit_data(unit, pos, created)
+        if changes is None:
+            return
+        same_content, same_state, contentsum_changed = changes
+
+        # Ensure we track source string
+        source_info, source_created = Source.objects.get_or_create(
+            id_hash=self.id_hash,
+            component=self.translation.component
+        )
+        self.priority = source_info.priority
+
         if created:
             unit_pre_create.send(sender=self.__class__, unit=self)
 
@@ -539,9 +544,17 @@ class Unit(models.Model, LoggerMixin):
                 unit=self,
             )
         if contentsum_changed:
-            self.update_has_failing_check(recurse=False)
-            self.update_has_comment()
-            self.update_has_suggestion()
+            self.update_flags()
+
+    def update_flags(self):
+        """Update cached flags after content hash change."""
+        self.update_has_failing_check(recurse=False)
+        self.update_has_comment()
+        self.update_has_suggestion()
+
+    def get_num_words(self):
+        """Return number of words in source string."""
+        return len(self.get_source_plurals()[0].split())
 
     def is_plural(self):
         """Check whether message is plural."""
@@ -635,14 +648,24 @@ class Unit(models.Model, LoggerMixin):
         elif self.state == STATE_EMPTY and translation:
             self.state = STATE_TRANSLATED
 
+        # Make sure stats are calculated before the change
+        old_translated = self.translation.stats.translated
+
         # Save updated unit to database
         self.save(backend=True)
 
-        old_translated = self.translation.stats.translated
+        # Queue newly translated string for the translation memory
+        if (self.translated and not self.translation.is_template and
+                (self.old_unit.state < STATE_TRANSLATED or
+                 self.old_unit.target != self.target)):
+            add_memory_update(self.id)
 
         if change_action not in (Change.ACTION_UPLOAD, Change.ACTION_AUTO):
             # Update translation stats
-            self.translation.invalidate_cache()
+            if self.translation.is_template:
+                self.translation.invalidate_cache()
+            else:
+                self.translation.stats.update_unit(self.old_unit, self)
 
             # Update user stats
             user.profile.translated += 1
@@ -764,10 +787,13 @@ class Unit(models.Model, LoggerMixin):
         )
 
     def save(self, same_content=False, same_state=False, force_insert=False,
-             backend=False, **kwargs):
+             backend=False, batch=False, **kwargs):
         """
         Wrapper around save to warn when save did not come from
         git backend (eg. commit or by parsing file).
+
+        With batch set, checks and fulltext index are not updated, this
+        is up to the caller to do for whole batch of units.
         """
         # Warn if request is not coming from backend
         if not backend:
@@ -778,11 +804,15 @@ class Unit(models.Model, LoggerMixin):
 
         # Store number of words
         if not same_content or not self.num_words:
-            self.num_words = len(self.get_source_plurals()[0].split())
+            self.num_words = self.get_num_words()
 
         # Actually save the unit
         super(Unit, self).save(**kwargs)
 
+        # Checks and index are updated by caller for whole batch
+        if batch:
+            return
+
         # Update checks if content or fuzzy flag has changed
         if not same_content or not same_state:
             self.run_checks(same_state, same_content, force_insert)
@@ -992,7 +1022,12 @@ class Unit(models.Model, LoggerMixin):
 
         if recurse:
             for unit in Unit.objects.same(self):
+                # Share stats object with this unit
+                if unit.translation_id == self.translation_id:
+                    unit.translation = self.translation
+                old_unit = copy(unit)
                 unit.update_has_failing_check(False)
+                unit.translation.stats.update_unit(old_unit, unit)
 
     def update_has_suggestion(self):
         """Update flag counting suggestions."""
@@ -1053,9 +1088,13 @@ class Unit(models.Model, LoggerMixin):
     @cached_property
     def all_flags(self):
         """Return union of own and component flags."""
+        return self.get_all_flags(self.source_info.check_flags)
+
+    def get_all_flags(self, check_flags):
+        """Return union of own, given source and component flags."""
         flags = set(
             self.flags.split(',') +
-            self.source_info.check_flags.split(',') +
+            check_flags.split(',') +
             self.translation.component.all_flags
         )
         flags.discard('')
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Updating of multiple component repositories."""
+
+from __future__ import unicode_literals
+
+import sys
+import threading
+
+from django.db import connection
+
+from six.moves.queue import Queue, Empty
+
+from weblate.utils.errors import report_error
+
+
+def get_repository_components(components):
+    """Return list of components with distinct repositories.
+
+    Components linking to other component repository are replaced by the
+    linked component, as updating it updates all linked ones as well.
+    """
+    result = []
+    seen = set()
+    for component in components:
+        if component.is_repo_link:
+            component = component.linked_component
+        if component.pk in seen:
+            continue
+        seen.add(component.pk)
+        result.append(component)
+    return result
+
+
+def fetch_thread(queue, fetched):
+    """Thread fetching remote repositories of queued components."""
+    try:
+        while True:
+            try:
+                component = queue.get_nowait()
+            except Empty:
+                return
+            try:
+                if component.update_remote_branch():
+                    fetched.add(component.pk)
+            except Exception as error:
+                component.log_error('failed to fetch repository: %s', error)
+                report_error(error, sys.exc_info())
+    finally:
+        connection.close()
+
+
+def fetch_components(components, workers):
+    """Fetch remote repositories of components concurrently.
+
+    Returns set of primary keys of components which were fetched.
+    """
+    queue = Queue()
+    fetched = set()
+    for component in components:
+        # Make sure repository is configured prior to threads access it
+        component.repository
+        queue.put(component)
+
+    threads = [
+        threading.Thread(target=fetch_thread, args=(queue, fetched))
+        for dummy in range(min(workers, len(components)))
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return fetched
+
+
+def update_components(components, workers=1, method=None):
+    """Update repositories of components.
+
+    Remote repositories are fetched by a pool of workers, merging and
+    loading of translations is then done for one component at time.
+
+    Returns dictionary mapping component primary keys to update result.
+    """
+    components = get_repository_components(components)
+    fetched = fetch_components(components, workers)
+    result = {}
+    for component in components:
+        if component.pk not in fetched:
+            result[component.pk] = False
+            continue
+        result[component.pk] = component.do_update(
+            method=method, fetch=False
+        )
+    return result
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+"""Fulltext search.
+
+The actual work is done by the backend configured in
+:setting:`SEARCH_BACKEND`, this module provides common interface to it and
+handles offloading of the index updates.
+"""
+
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_migrate
+from django.db.utils import IntegrityError
+from django.dispatch import receiver
+
+from weblate.utils.classloader import load_class
+
+BACKENDS = {}
+
+# Number of search results matched against the database at once
+CHUNK_SIZE = 500
+
+
+def get_backend():
+    """Return configured search backend."""
+    name = settings.SEARCH_BACKEND
+    if name not in BACKENDS:
+        BACKENDS[name] = load_class(name, 'SEARCH_BACKEND')()
+    return BACKENDS[name]
+
+
+@receiver(post_migrate)
+def setup_index(sender=None, **kwargs):
+    """Prepare search backend storage."""
+    if sender.label == 'trans':
+        get_backend().setup()
+
+
+def clean_indexes():
+    """Clean all indexes."""
+    get_backend().clean()
+
+
+def optimize_indexes():
+    """Optimize index structures."""
+    get_backend().optimize()
+
+
+def cleanup_indexes():
+    """Remove stale units from fulltext."""
+    get_backend().cleanup()
+
+
+def update_index(units):
+    """Update fulltext index for given set of units."""
+    get_backend().update_index(units)
+
+
+def index_units(units):
+    """Index units from any language."""
+    get_backend().index_units(units)
+
+
+def add_index_update(unit_id, to_delete, language_code):
+    from weblate.trans.models.search import IndexUpdate
+    try:
+        with transaction.atomic():
+            IndexUpdate.objects.create(
+                unitid=unit_id,
+                to_delete=to_delete,
+                language_code=language_code,
+            )
+    except IntegrityError:
+        try:
+            update = IndexUpdate.objects.get(unitid=unit_id)
+            if to_delete and not update.to_delete:
+                update.to_delete = True
+                update.save()
+        except IndexUpdate.DoesNotExist:
+            # It did exist, but was deleted meanwhile
+            return
+
+
+def update_index_unit(unit):
+    """Add single unit to index."""
+    update_index_units([unit], unit.translation.language.code)
+
+
+def update_index_units(units, language_code):
+    """Add list of units from single language to index."""
+    backend = get_backend()
+    if not units or not backend.separate_index:
+        return
+
+    # Should this happen in background?
+    if settings.OFFLOAD_INDEXING:
+        for unit in units:
+            add_index_update(unit.id, False, language_code)
+        return
+
+    backend.update_units(units, language_code)
+
+
+def fulltext_search(query, langs, params, translation=None):
+    """Perform fulltext search in given areas.
+
+    Returns set or queryset of primary keys.
+    """
+    return get_backend().fulltext_search(query, langs, params, translation)
+
+
+def search_units(units, query, langs, params, translation=None):
+    """Filter units queryset by fulltext search.
+
+    Database based backends are simply used as a subquery, for others
+    the lazily evaluated FulltextResults are returned.
+    """
+    backend = get_backend()
+    if not backend.separate_index:
+        return units.filter(
+            pk__in=backend.fulltext_search(query, langs, params, translation)
+        )
+    return FulltextResults(
+        units,
+        lambda: backend.search(query, langs, params, translation),
+        lambda: backend.count(query, langs, params, translation),
+    )
+
+
+class FulltextResults(object):
+    """Lazy results of fulltext search.
+
+    The matches are fetched from the index page by page in order of
+    relevance and matched against the units queryset in chunks, so only
+    the part of the results which is actually used is loaded. It
+    implements subset of the queryset API used by the views.
+
+    Until all matches are fetched, the count is estimated from number of
+    hits in the index. When ordered by database fields, all matches have
+    to be fetched to sort them.
+    """
+    ordered = True
+
+    def __init__(self, queryset, search, count, ordering=None):
+        self.queryset = queryset
+        self.search = search
+        self.count_hits = count
+        self.ordering = ordering
+        self.matches = None
+        self.matched = []
+        self.dropped = 0
+        self.hits = None
+        self.exhausted = False
+
+    def clone(self, queryset, ordering):
+        return FulltextResults(
+            queryset, self.search, self.count_hits, ordering
+        )
+
+    def filter(self, *args, **kwargs):
+        return self.clone(
+            self.queryset.filter(*args, **kwargs), self.ordering
+        )
+
+    def exclude(self, *args, **kwargs):
+        return self.clone(
+            self.queryset.exclude(*args, **kwargs), self.ordering
+        )
+
+    def order_by(self, *fields):
+        return self.clone(self.queryset, fields)
+
+    def fetch(self, count=None):
+        """Fetch results until there is at least count of them."""
+        if self.ordering:
+            count = None
+        if self.matches is None:
+            self.matches = self.search()
+        while not self.exhausted:
+            if count is not None and len(self.matched) >= count:
+                return
+            chunk = list(islice(self.matches, CHUNK_SIZE))
+            if not chunk:
+                self.exhausted = True
+                break
+            found = set(
+                self.queryset.filter(pk__in=chunk).values_list('pk', flat=True)
+            )
+            self.matched.extend([pk for pk in chunk if pk in found])
+            self.dropped += len(chunk) - len(found)
+        if self.ordering and self.exhausted:
+            self.sort()
+
+    def sort(self):
+        """Sort matches by ordering fields, only ascending is supported."""
+        fields = [field for field in self.ordering if field != 'pk']
+        fields.append('pk')
+        rows = []
+        for start in range(0, len(self.matched), CHUNK_SIZE):
+            rows.extend(
+                self.queryset.filter(
+                    pk__in=self.matched[start:start + CHUNK_SIZE]
+                ).values_list(*fields)
+            )
+        rows.sort()
+        self.matched = [row[-1] for row in rows]
+        self.ordering = None
+
+    def get_units(self, pks):
+        units = self.queryset.in_bulk(pks)
+        return [units[pk] for pk in pks if pk in units]
+
+    def count(self):
+        if self.ordering:
+            self.fetch()
+        if self.exhausted:
+            return len(self.matched)
+        if self.hits is None:
+            self.hits = self.count_hits()
+        return max(self.hits - self.dropped, len(self.matched))
+
+    def exists(self):
+        self.fetch(1)
+        return bool(self.matched)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.stop is None or key.stop < 0 or (key.start or 0) < 0:
+                self.fetch()
+            else:
+                self.fetch(key.stop)
+            return self.get_units(self.matched[key])
+        if key < 0:
+            self.fetch()
+        else:
+            self.fetch(key + 1)
+        return self.get_units([self.matched[key]])[0]
+
+    def __iter__(self):
+        offset = 0
+        while True:
+            self.fetch(offset + CHUNK_SIZE)
+            pks = self.matched[offset:offset + CHUNK_SIZE]
+            if not pks:
+                return
+            for unit in self.get_units(pks):
+                yield unit
+            offset += len(pks)
+
+    def iterator(self):
+        return iter(self)
+
+    def values_list(self, *fields, **kwargs):
+        """Return list of matching primary keys.
+
+        Only flat list of primary keys is supported.
+        """
+        if fields not in (('pk',), ('id',)) or not kwargs.get('flat'):
+            raise ValueError('Only flat list of primary keys is supported')
+        self.fetch()
+        return list(self.matched)
+
+
+def more_like(pk, source, top=5):
+    """Find similar units."""
+    return get_backend().more_like(pk, source, top)
+
+
+def clean_search_unit(pk, lang):
+    """Cleanup search index on unit deletion."""
+    backend = get_backend()
+    if not backend.separate_index:
+        return
+    if settings.OFFLOAD_INDEXING:
+        add_index_update(pk, True, lang)
+    else:
+        backend.delete_search_unit(pk, lang)
+
+
+def delete_search_unit(pk, lang):
+    get_backend().delete_search_unit(pk, lang)
+
+
+def delete_search_units(source_units, languages):
+    """Delete fulltext index for given set of units."""
+    get_backend().delete_search_units(source_units, languages)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+"""Base class for fulltext search backends."""
+
+from __future__ import unicode_literals
+
+
+class BaseSearch(object):
+    """Fulltext search backend interface."""
+    # Whether the backend maintains separate index which needs updating
+    separate_index = True
+
+    def setup(self):
+        """Prepare backend storage, called after database migration."""
+        return
+
+    def clean(self):
+        """Remove all indexed data."""
+        return
+
+    def optimize(self):
+        """Optimize index structures."""
+        return
+
+    def cleanup(self):
+        """Remove stale units from the index."""
+        return
+
+    def update_index(self, units):
+        """Update index for given queryset of units."""
+        raise NotImplementedError()
+
+    def update_units(self, units, language_code):
+        """Update index for list of units from single language."""
+        raise NotImplementedError()
+
+    def index_units(self, units):
+        """Index units from any language, used to rebuild the index."""
+        raise NotImplementedError()
+
+    def fulltext_search(self, query, langs, params, translation=None):
+        """Perform fulltext search in given areas.
+
+        Returns set of primary keys or queryset of primary keys.
+        """
+        raise NotImplementedError()
+
+    def search(self, query, langs, params, translation=None):
+        """Perform fulltext search in given areas.
+
+        Returns iterator over primary keys ordered by relevance, the
+        backend should fetch them lazily.
+        """
+        return iter(self.fulltext_search(query, langs, params, translation))
+
+    def count(self, query, langs, params, translation=None):
+        """Return number of hits of fulltext search.
+
+        The number can be estimate, but it should not be lower than
+        actual number of matches.
+        """
+        return len(self.fulltext_search(query, langs, params, translation))
+
+    def more_like(self, pk, source, top=5):
+        """Find units with similar source string."""
+        raise NotImplementedError()
+
+    def delete_search_unit(self, pk, lang):
+        """Remove single unit from index."""
+        raise NotImplementedError()
+
+    def delete_search_units(self, source_units, languages):
+        """Remove units from index.
+
+        The source_units is set of unit ids and languages is dictionary
+        of sets of unit ids for every language code.
+        """
+        raise NotImplementedError()
+
+    @staticmethod
+    def get_search_params(params):
+        """Return dictionary of fields to search in."""
+        search = {
+            'source': False,
+            'context': False,
+            'target': False,
+            'comment': False,
+            'location': False,
+        }
+        search.update(params)
+        return search
+
+    @staticmethod
+    def filter_similar(pk, results):
+        """Filter similar units based on score.
+
+        Returns units with score above half of the best match excluding
+        current unit.
+        """
+        if not results:
+            return []
+        # Normalize scores to 0-100
+        max_score = max([h[1] for h in results])
+        scores = {h[0]: h[1] * 100 / max_score for h in results}
+
+        # Filter results with score above 50 and not current unit
+        return [h[0] for h in results if scores[h[0]] > 50 and h[0] != pk]
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+"""Database based full text search."""
+
+from __future__ import unicode_literals
+
+import re
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from weblate.trans.models import Unit
+from weblate.trans.search.base import BaseSearch
+
+SOURCE_FIELDS = ('source', 'context', 'location')
+TARGET_FIELDS = ('target', 'comment')
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class SubQuery(RawSQL):
+    """Raw subquery, the IN lookup adds parenthesis on its own."""
+    def as_sql(self, compiler, connection):
+        return self.sql, self.params
+
+
+SQLITE_SETUP = (
+    '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS trans_unit_fts USING fts5(
+        source, context, location, target, comment,
+        content='trans_unit', content_rowid='id'
+    )
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trans_unit_fts_insert
+    AFTER INSERT ON trans_unit BEGIN
+        INSERT INTO trans_unit_fts(
+            rowid, source, context, location, target, comment
+        ) VALUES (
+            new.id, new.source, new.context, new.location, new.target,
+            new.comment
+        );
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trans_unit_fts_delete
+    AFTER DELETE ON trans_unit BEGIN
+        INSERT INTO trans_unit_fts(
+            trans_unit_fts, rowid, source, context, location, target, comment
+        ) VALUES (
+            'delete', old.id, old.source, old.context, old.location,
+            old.target, old.comment
+        );
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trans_unit_fts_update
+    AFTER UPDATE OF source, context, location, target, comment ON trans_unit
+    BEGIN
+        INSERT INTO trans_unit_fts(
+            trans_unit_fts, rowid, source, context, location, target, comment
+        ) VALUES (
+            'delete', old.id, old.source, old.context, old.location,
+            old.target, old.comment
+        );
+        INSERT INTO trans_unit_fts(
+            rowid, source, context, location, target, comment
+        ) VALUES (
+            new.id, new.source, new.context, new.location, new.target,
+            new.comment
+        );
+    END
+    ''',
+)
+SQLITE_OBJECTS = frozenset((
+    'trans_unit_fts', 'trans_unit_fts_insert', 'trans_unit_fts_delete',
+    'trans_unit_fts_update',
+))
+SQLITE_REBUILD = (
+    "INSERT INTO trans_unit_fts(trans_unit_fts) VALUES('rebuild')"
+)
+
+POSTGRESQL_SETUP = [
+    """
+    CREATE INDEX IF NOT EXISTS trans_unit_{0}_fts ON trans_unit
+    USING GIN (to_tsvector('simple'::regconfig, COALESCE({0}, '')))
+    """.format(field)
+    for field in SOURCE_FIELDS + TARGET_FIELDS
+]
+
+POSTGRESQL_TRIGRAM_SETUP = (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX IF NOT EXISTS trans_unit_source_trgm ON trans_unit '
+    'USING GIN (source gin_trgm_ops)',
+)
+
+
+def get_words(text, limit=None):
+    """Return unique words from the text."""
+    result = []
+    for word in WORD_RE.findall(text.lower()):
+        if word not in result:
+            result.append(word)
+    return result[:limit]
+
+
+def get_fts_query(fields, words, operator):
+    """Build SQLite FTS5 query matching words in given columns."""
+    return '{{{0}}}: ({1})'.format(
+        ' '.join(fields),
+        ' {0} '.format(operator).join('"{0}"'.format(word) for word in words)
+    )
+
+
+class DatabaseSearch(BaseSearch):
+    """Fulltext search using database native indexes.
+
+    PostgreSQL uses text search vectors and trigram similarity, SQLite the
+    FTS5 extension. Other databases fall back to substring matching.
+
+    The indexes are maintained by the database, so there is no need to
+    update them.
+    """
+    separate_index = False
+
+    def setup(self):
+        if connection.vendor == 'postgresql':
+            self.setup_postgresql()
+        elif connection.vendor == 'sqlite':
+            self.setup_sqlite()
+
+    @staticmethod
+    def setup_postgresql():
+        with connection.cursor() as cursor:
+            for sql in POSTGRESQL_SETUP:
+                cursor.execute(sql)
+        # Trigram extension might not be available or creating it
+        # might require more privileges
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                for sql in POSTGRESQL_TRIGRAM_SETUP:
+                    cursor.execute(sql)
+        except DatabaseError:
+            pass
+
+    @staticmethod
+    def get_sqlite_objects():
+        """Return names of existing FTS table and triggers."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT name FROM sqlite_master '
+                'WHERE name LIKE \'trans_unit_fts%\''
+            )
+            return SQLITE_OBJECTS.intersection(
+                row[0] for row in cursor.fetchall()
+            )
+
+    def setup_sqlite(self):
+        """Create FTS table and triggers maintaining it.
+
+        The index is rebuilt when any of them was missing as it might be
+        outdated. Returns whether FTS is available.
+        """
+        existing = self.get_sqlite_objects()
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                for sql in SQLITE_SETUP:
+                    cursor.execute(sql)
+                if existing != SQLITE_OBJECTS:
+                    cursor.execute(SQLITE_REBUILD)
+        except DatabaseError:
+            # FTS5 extension is not available
+            return False
+        return True
+
+    def has_sqlite_fts(self):
+        """Check whether FTS table is available."""
+        return 'trans_unit_fts' in self.get_sqlite_objects()
+
+    def clean(self):
+        if connection.vendor == 'sqlite' and self.setup_sqlite():
+            with connection.cursor() as cursor:
+                cursor.execute(SQLITE_REBUILD)
+
+    def optimize(self):
+        if connection.vendor == 'sqlite' and self.setup_sqlite():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO trans_unit_fts(trans_unit_fts) "
+                    "VALUES('optimize')"
+                )
+
+    def update_index(self, units):
+        return
+
+    def update_units(self, units, language_code):
+        return
+
+    def index_units(self, units):
+        return
+
+    def delete_search_unit(self, pk, lang):
+        return
+
+    def delete_search_units(self, source_units, languages):
+        return
+
+    def match(self, fields, query):
+        """Return filter matching query in any of the fields."""
+        vendor = connection.vendor
+        if vendor == 'postgresql':
+            from django.contrib.postgres.search import (
+                SearchQuery, SearchVector,
+            )
+            result = Q()
+            for field in fields:
+                result |= Q(pk__in=Unit.objects.annotate(
+                    vector=SearchVector(field, config='simple')
+                ).filter(
+                    vector=SearchQuery(query, config='simple')
+                ).values('pk'))
+            return result
+        if vendor == 'sqlite' and self.has_sqlite_fts():
+            words = get_words(query)
+            if not words:
+                return Q(pk__in=[])
+            return Q(pk__in=SubQuery(
+                'SELECT rowid FROM trans_unit_fts '
+                'WHERE trans_unit_fts MATCH %s',
+                (get_fts_query(fields, words, 'AND'),)
+            ))
+        result = Q()
+        for field in fields:
+            result |= Q(**{'{0}__icontains'.format(field): query})
+        return result
+
+    def fulltext_search(self, query, langs, params, translation=None):
+        search = self.get_search_params(params)
+        source = [field for field in SOURCE_FIELDS if search[field]]
+        target = [field for field in TARGET_FIELDS if search[field]]
+        if not source and not target:
+            return set()
+
+        result = Q()
+        if source:
+            result |= self.match(source, query)
+        if target:
+            result |= (
+                self.match(target, query) &
+                Q(translation__language__code__in=langs)
+            )
+        units = Unit.objects.filter(result)
+        if translation is not None:
+            units = units.filter(translation=translation)
+        return units.values_list('pk', flat=True)
+
+    def more_like(self, pk, source, top=5):
+        vendor = connection.vendor
+        if vendor == 'postgresql':
+            from django.contrib.postgres.search import TrigramSimilarity
+            try:
+                with transaction.atomic():
+                    results = list(Unit.objects.annotate(
+                        similarity=TrigramSimilarity('source', source)
+                    ).filter(
+                        source__trigram_similar=source
+                    ).order_by(
+                        '-similarity'
+                    ).values_list(
+                        'pk', 'similarity'
+                    )[:top])
+            except DatabaseError:
+                # The pg_trgm extension is not installed
+                return []
+        elif vendor == 'sqlite' and self.has_sqlite_fts():
+            words = get_words(source, 10)
+            if not words:
+                return []
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT rowid, -bm25(trans_unit_fts) FROM trans_unit_fts '
+                    'WHERE trans_unit_fts MATCH %s '
+                    'ORDER BY bm25(trans_unit_fts) LIMIT %s',
+                    (get_fts_query(['source'], words, 'OR'), top)
+                )
+                results = cursor.fetchall()
+        else:
+            return []
+        return self.filter_similar(pk, results)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+"""Storage for search results used while translating."""
+
+from array import array
+from itertools import islice
+from uuid import uuid4
+
+from django.core.cache import cache
+
+# Number of unit ids stored in single cache entry
+BLOCK_SIZE = 1000
+
+# How long are the results kept
+RESULTS_TIMEOUT = 86400
+
+
+class StoredResults(object):
+    """List of unit ids stored in the cache.
+
+    Only the token identifying the results needs to be kept in the
+    session. The ids are stored as compact arrays split into blocks, so
+    accessing result at given offset loads single block only.
+
+    When the loader is given, only the first block is stored upfront and
+    further blocks are loaded on demand by calling it with id of last unit
+    in the previous block (or None for the first block) and number of ids
+    to return.
+    """
+    def __init__(self, token, count, loader=None):
+        self.token = token
+        self.count = count
+        self.loader = loader
+        self.blocks = {}
+
+    @staticmethod
+    def get_key(token, block=None):
+        if block is None:
+            return 'search-results-{0}'.format(token)
+        return 'search-results-{0}-{1}'.format(token, block)
+
+    @classmethod
+    def store(cls, ids, count=None, loader=None):
+        """Store iterable of ids and returns the results object.
+
+        With the count given only the first block of ids is consumed.
+        """
+        token = uuid4().hex
+        ids = iter(ids)
+        stored = 0
+        block = 0
+        while count is None or block == 0:
+            data = array('L', islice(ids, BLOCK_SIZE))
+            if not data:
+                break
+            cache.set(cls.get_key(token, block), data, RESULTS_TIMEOUT)
+            stored += len(data)
+            block += 1
+        if count is None:
+            count = stored
+        cache.set(cls.get_key(token), count, RESULTS_TIMEOUT)
+        return cls(token, count, loader)
+
+    @classmethod
+    def load(cls, token, loader=None):
+        """Return stored results or None if these have expired."""
+        count = cache.get(cls.get_key(token))
+        if count is None:
+            return None
+        return cls(token, count, loader)
+
+    def delete(self):
+        keys = [self.get_key(self.token)]
+        keys.extend([
+            self.get_key(self.token, block)
+            for block in range((self.count + BLOCK_SIZE - 1) // BLOCK_SIZE)
+        ])
+        cache.delete_many(keys)
+
+    def get_cached_block(self, block):
+        if block not in self.blocks:
+            data = cache.get(self.get_key(self.token, block))
+            if data is None:
+                return None
+            self.blocks[block] = data
+        return self.blocks[block]
+
+    def get_block(self, block):
+        data = self.get_cached_block(block)
+        if data is not None:
+            return data
+        if self.loader is None:
+            raise KeyError('Search results have expired')
+        # Find last available block and load the following ones
+        start = block
+        while start > 0 and self.get_cached_block(start - 1) is None:
+            start -= 1
+        for current in range(start, block + 1):
+            if current == 0:
+                after = None
+            else:
+                previous = self.blocks[current - 1]
+                if not previous:
+                    raise KeyError('Search results have changed')
+                after = previous[-1]
+            data = array('L', self.loader(after, BLOCK_SIZE))
+            cache.set(
+                self.get_key(self.token, current), data, RESULTS_TIMEOUT
+            )
+            self.blocks[current] = data
+        return self.blocks[block]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, key):
+        """Return id at given position or list of ids for slice."""
+        if isinstance(key, slice):
+            return [
+                self[offset] for offset in range(*key.indices(self.count))
+            ]
+        if not 0 <= key < self.count:
+            raise IndexError('Offset out of range')
+        data = self.get_block(key // BLOCK_SIZE)
+        if key % BLOCK_SIZE >= len(data):
+            # Less results were loaded than originally counted
+            raise KeyError('Search results have changed')
+        return data[key % BLOCK_SIZE]
+
+    def index(self, value):
+        """Return position of the id in results."""
+        for block in range((self.count + BLOCK_SIZE - 1) // BLOCK_SIZE):
+            data = self.get_block(block)
+            if value in data:
+                return block * BLOCK_SIZE + data.index(value)
+        raise ValueError('Not found in results')
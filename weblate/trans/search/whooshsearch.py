@@ -0,0 +1,460 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+
+"""Whoosh based full text search."""
+
+import functools
+import heapq
+import re
+import shutil
+import threading
+
+from whoosh.fields import SchemaClass, TEXT, NUMERIC, ID
+from whoosh.filedb.filestore import FileStorage
+from whoosh.index import EmptyIndexError
+from whoosh.query import And, Or, Term
+from whoosh.writing import AsyncWriter, BufferedWriter
+from whoosh import qparser
+
+from django.utils.encoding import force_text
+
+from weblate.lang.models import Language
+from weblate.trans.search.base import BaseSearch
+from weblate.utils.data import data_dir
+
+STORAGE = FileStorage(data_dir('whoosh'))
+
+# Number of results fetched from the index at once
+PAGE_SIZE = 500
+
+TARGET_TOC = re.compile(r'^_target-(.*)_[0-9]+\.toc$')
+
+# Opened indexes, shared by whole process
+INDEXES = {}
+CACHE_LOCK = threading.Lock()
+# Open searchers, these are not thread safe so are kept per thread
+SEARCHERS = threading.local()
+# Bumped whenever cached searchers should be discarded
+GENERATION = [0]
+
+
+class TargetSchema(SchemaClass):
+    """Fultext index schema for target strings."""
+    pk = NUMERIC(stored=True, unique=True)
+    translation = NUMERIC()
+    target = TEXT()
+    comment = TEXT()
+
+
+class SourceSchema(SchemaClass):
+    """Fultext index schema for source and context strings."""
+    pk = NUMERIC(stored=True, unique=True)
+    translation = NUMERIC()
+    language = ID()
+    source = TEXT()
+    context = TEXT()
+    location = TEXT()
+
+
+def clean_indexes():
+    """Clean all indexes."""
+    reset_indexes()
+    shutil.rmtree(data_dir('whoosh'))
+    create_index()
+
+
+def create_index():
+    """Automatically creates storage directory."""
+    STORAGE.create()
+
+
+def create_source_index():
+    """Create source string index."""
+    create_index()
+    return STORAGE.create_index(SourceSchema(), 'source')
+
+
+def create_target_index(lang):
+    """Create traget string index for given language."""
+    create_index()
+    return STORAGE.create_index(TargetSchema(), 'target-{0}'.format(lang))
+
+
+def update_source_unit_index(writer, unit):
+    """Update source index for given unit."""
+    writer.update_document(
+        pk=unit.pk,
+        translation=unit.translation_id,
+        language=force_text(unit.translation.language.code),
+        source=force_text(unit.source),
+        context=force_text(unit.context),
+        location=force_text(unit.location),
+    )
+
+
+def update_target_unit_index(writer, unit):
+    """Update target index for given unit."""
+    writer.update_document(
+        pk=unit.pk,
+        translation=unit.translation_id,
+        target=force_text(unit.target),
+        comment=force_text(unit.comment),
+    )
+
+
+def migrate_index(index, fields):
+    """Fix up schema of index created by older versions."""
+    for name, field in fields:
+        if name not in index.schema:
+            index.add_field(name, field)
+    if 'pk' not in index.schema:
+        index.add_field('pk', NUMERIC(stored=True, unique=True))
+    if 'checksum' in index.schema:
+        index.remove_field('checksum')
+
+
+def open_index(name, create, fields):
+    """Return index object, opening it on first use.
+
+    The opened index is cached for the whole process, so checking for
+    existence and schema fixups are done only once.
+    """
+    key = (STORAGE.folder, name)
+    with CACHE_LOCK:
+        if key not in INDEXES:
+            try:
+                exists = STORAGE.index_exists(name)
+            except OSError:
+                create_index()
+                exists = False
+            if not exists:
+                create()
+            index = STORAGE.open_index(name)
+            migrate_index(index, fields)
+            INDEXES[key] = index
+        return INDEXES[key]
+
+
+def get_source_index():
+    """Return source index object."""
+    return open_index(
+        'source',
+        create_source_index,
+        (
+            ('location', TEXT()),
+            ('translation', NUMERIC()),
+            ('language', ID()),
+        ),
+    )
+
+
+def get_target_index(lang):
+    """Return target index object."""
+    return open_index(
+        'target-{0}'.format(lang),
+        lambda: create_target_index(lang),
+        (('comment', TEXT()), ('translation', NUMERIC())),
+    )
+
+
+def get_searcher(index):
+    """Return searcher for given index.
+
+    Searchers are kept open per thread and refreshed only when the index
+    generation changes.
+    """
+    if getattr(SEARCHERS, 'generation', None) != GENERATION[0]:
+        close_searchers()
+        SEARCHERS.generation = GENERATION[0]
+    searchers = SEARCHERS.searchers
+    key = (index.storage.folder, index.indexname)
+    if key in searchers:
+        searchers[key] = searchers[key].refresh()
+    else:
+        searchers[key] = index.searcher()
+    return searchers[key]
+
+
+def close_searchers():
+    """Close searchers opened by current thread."""
+    for searcher in getattr(SEARCHERS, 'searchers', {}).values():
+        searcher.close()
+    SEARCHERS.searchers = {}
+
+
+def reset_indexes():
+    """Forget all opened indexes and searchers."""
+    with CACHE_LOCK:
+        INDEXES.clear()
+        GENERATION[0] += 1
+    close_searchers()
+
+
+def get_terms(query, params, search, schema):
+    """Parse query for searching in given fields."""
+    queries = []
+    for param in params:
+        if search[param]:
+            parser = qparser.QueryParser(param, schema)
+            queries.append(
+                parser.parse(query)
+            )
+    return functools.reduce(lambda x, y: x | y, queries)
+
+
+def base_search(index, terms, restrict=None):
+    """Wrapper for fulltext search.
+
+    Yields tuples of negated score and primary key, fetching the results
+    from the index page by page.
+    """
+    searcher = get_searcher(index)
+    pagenum = 1
+    while True:
+        page = searcher.search_page(
+            terms, pagenum, pagelen=PAGE_SIZE, filter=restrict
+        )
+        for hit in page:
+            yield (-hit.score, hit['pk'])
+        if page.is_last_page():
+            return
+        pagenum += 1
+
+
+def base_count(index, terms, restrict=None):
+    """Return number of hits in the index without loading them."""
+    searcher = get_searcher(index)
+    return len(searcher.search(
+        terms, limit=None, filter=restrict, scored=False, sortedby=None
+    ))
+
+
+class WhooshSearch(BaseSearch):
+    """Fulltext search using Whoosh file based indexes.
+
+    There is one index for source strings and one target index for
+    every language.
+    """
+    def setup(self):
+        create_index()
+        # Open (and migrate) indexes upfront
+        get_source_index()
+        for name in STORAGE.list():
+            match = TARGET_TOC.match(name)
+            if match:
+                get_target_index(match.group(1))
+
+    def clean(self):
+        clean_indexes()
+
+    def optimize(self):
+        get_source_index().optimize()
+        for lang in Language.objects.have_translation():
+            get_target_index(lang.code).optimize()
+
+    def cleanup(self):
+        from weblate.trans.models import Unit
+        from weblate.trans.search import clean_search_unit
+        # We operate only on target indexes as they will have all IDs anyway
+        for lang in Language.objects.have_translation():
+            index = get_target_index(lang.code)
+            try:
+                fields = index.reader().all_stored_fields()
+            except EmptyIndexError:
+                continue
+            for item in fields:
+                if Unit.objects.filter(pk=item['pk']).exists():
+                    continue
+                clean_search_unit(item['pk'], lang.code)
+
+    def update_index(self, units):
+        languages = Language.objects.have_translation()
+
+        # Update source index
+        units = units.select_related('translation__language')
+        if units.exists():
+            index = get_source_index()
+            writer = BufferedWriter(index)
+            try:
+                for unit in units.iterator():
+                    update_source_unit_index(writer, unit)
+            finally:
+                writer.close()
+
+        # Update per language indices
+        for lang in languages:
+            language_units = units.filter(
+                translation__language=lang
+            ).exclude(
+                target=''
+            )
+
+            if language_units.exists():
+                index = get_target_index(lang.code)
+                writer = BufferedWriter(index)
+                try:
+
+                    for unit in language_units.iterator():
+                        update_target_unit_index(writer, unit)
+                finally:
+                    writer.close()
+
+    def update_units(self, units, language_code):
+        # Update source
+        index = get_source_index()
+        with AsyncWriter(index) as writer:
+            for unit in units:
+                update_source_unit_index(writer, unit)
+
+        # Update target
+        targets = [unit for unit in units if unit.target]
+        if targets:
+            index = get_target_index(language_code)
+            with AsyncWriter(index) as writer:
+                for unit in targets:
+                    update_target_unit_index(writer, unit)
+
+    def index_units(self, units):
+        source_writer = get_source_index().writer()
+        target_writers = {}
+
+        try:
+            # Process all units
+            for unit in units:
+                lang = unit.translation.language.code
+                # Lazy open writer
+                if lang not in target_writers:
+                    target_writers[lang] = get_target_index(lang).writer()
+                # Update target index
+                if unit.translation:
+                    update_target_unit_index(target_writers[lang], unit)
+                # Update source index
+                update_source_unit_index(source_writer, unit)
+
+        finally:
+            # Close all writers
+            source_writer.commit()
+            for code in target_writers:
+                target_writers[code].commit()
+
+    def fulltext_search(self, query, langs, params, translation=None):
+        return set(self.search(query, langs, params, translation))
+
+    def get_queries(self, query, langs, params, translation=None):
+        """Return list of indexes and parsed queries to search in."""
+        search = self.get_search_params(params)
+        result = []
+
+        if translation is not None:
+            target_restrict = Term('translation', translation.pk)
+        else:
+            target_restrict = None
+
+        if search['source'] or search['context'] or search['location']:
+            source_restrict = Or([Term('language', lang) for lang in langs])
+            if target_restrict is not None:
+                source_restrict = And([source_restrict, target_restrict])
+            result.append((
+                get_source_index(),
+                get_terms(
+                    query,
+                    ('source', 'context', 'location'),
+                    search,
+                    SourceSchema()
+                ),
+                source_restrict
+            ))
+
+        if search['target'] or search['comment']:
+            terms = get_terms(
+                query, ('target', 'comment'), search, TargetSchema()
+            )
+            for lang in langs:
+                result.append(
+                    (get_target_index(lang), terms, target_restrict)
+                )
+
+        return result
+
+    def search(self, query, langs, params, translation=None):
+        results = [
+            base_search(*item)
+            for item in self.get_queries(query, langs, params, translation)
+        ]
+
+        # Merge results from all indexes ordered by score
+        seen = set()
+        for dummy, pk in heapq.merge(*results):
+            if pk not in seen:
+                seen.add(pk)
+                yield pk
+
+    def count(self, query, langs, params, translation=None):
+        return sum(
+            base_count(*item)
+            for item in self.get_queries(query, langs, params, translation)
+        )
+
+    def more_like(self, pk, source, top=5):
+        searcher = get_searcher(get_source_index())
+        # Extract key terms
+        kts = searcher.key_terms_from_text(
+            'source', source,
+            numterms=10,
+            normalize=False
+        )
+        # Create an Or query from the key terms
+        query = Or(
+            [Term('source', word, boost=weight) for word, weight in kts]
+        )
+
+        # Grab fulltext results
+        results = [
+            (h['pk'], h.score) for h in searcher.search(query, limit=top)
+        ]
+        return self.filter_similar(pk, results)
+
+    def delete_search_unit(self, pk, lang):
+        try:
+            for index in (get_source_index(), get_target_index(lang)):
+                with AsyncWriter(index) as writer:
+                    writer.delete_by_term('pk', pk)
+        except IOError:
+            return
+
+    def delete_search_units(self, source_units, languages):
+        # Update source index
+        index = get_source_index()
+        writer = index.writer()
+        try:
+            for pk in source_units:
+                writer.delete_by_term('pk', pk)
+        finally:
+            writer.commit()
+
+        for lang, units in languages.items():
+            index = get_target_index(lang)
+            writer = index.writer()
+            try:
+                for pk in units:
+                    writer.delete_by_term('pk', pk)
+            finally:
+                writer.commit()
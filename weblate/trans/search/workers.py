@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2012 - 2018 Michal Čihař <michal@cihar.com>
+#
+# This file is part of Weblate <https://weblate.org/>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Bounded pool of workers looking up similar strings.
+
+The lookups are done in threads kept for whole process, so every worker
+keeps the fulltext index open and there is no need to fork on every
+request. Requests exceeding the queue size are rejected immediately,
+so the load is not piling up when the workers can not keep up.
+"""
+
+from __future__ import unicode_literals
+
+import os
+import threading
+
+from django.conf import settings
+
+import six
+
+from weblate.trans.search import more_like
+
+POOL_LOCK = threading.Lock()
+POOL = [None]
+
+
+class MoreLikeRequest(object):
+    """Single lookup request processed by the pool."""
+    def __init__(self, pk, source, top):
+        self.pk = pk
+        self.source = source
+        self.top = top
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.done = threading.Event()
+
+    def process(self):
+        try:
+            self.result = more_like(self.pk, self.source, self.top)
+        except Exception as error:
+            self.error = error
+        finally:
+            self.done.set()
+
+
+class MoreLikePool(object):
+    """Pool of threads processing more like this lookups."""
+    def __init__(self, workers, queue_size):
+        self.queue = six.moves.queue.Queue(queue_size)
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.timeouts = 0
+        self.rejected = 0
+        self.threads = [
+            threading.Thread(target=self.worker) for dummy in range(workers)
+        ]
+        for thread in self.threads:
+            thread.daemon = True
+            thread.start()
+
+    def worker(self):
+        while True:
+            request = self.queue.get()
+            # The caller is not waiting for the result anymore
+            if not request.cancelled:
+                request.process()
+            self.queue.task_done()
+
+    def increase(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def more_like(self, pk, source, top, timeout):
+        """Find similar units using the pool.
+
+        Raises exception when the request does not fit into the queue or
+        is not processed within timeout.
+        """
+        request = MoreLikeRequest(pk, source, top)
+        try:
+            self.queue.put_nowait(request)
+        except six.moves.queue.Full:
+            self.increase('rejected')
+            raise Exception(
+                'Request for more like {0} rejected, queue is full.'.format(
+                    pk
+                )
+            )
+        if not request.done.wait(timeout):
+            # Skip processing if it is still in the queue
+            request.cancelled = True
+            self.increase('timeouts')
+            raise Exception(
+                'Request for more like {0} timed out.'.format(pk)
+            )
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def get_stats(self):
+        return {
+            'workers': len(self.threads),
+            'queue': self.queue.qsize(),
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+        }
+
+
+def get_pool():
+    """Return pool shared by whole process.
+
+    The pool is created on first use, forked processes get their own
+    as the worker threads do not survive fork.
+    """
+    with POOL_LOCK:
+        if POOL[0] is None or POOL[0].pid != os.getpid():
+            POOL[0] = MoreLikePool(
+                settings.MT_WEBLATE_WORKERS, settings.MT_WEBLATE_QUEUE
+            )
+        return POOL[0]
+
+
+def get_pool_stats():
+    """Return statistics of the pool in current process."""
+    with POOL_LOCK:
+        pool = POOL[0]
+    if pool is None or pool.pid != os.getpid():
+        return {'workers': 0, 'queue': 0, 'timeouts': 0, 'rejected': 0}
+    return pool.get_stats()
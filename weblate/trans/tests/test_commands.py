@@ -20,17 +20,19 @@
 
 """Test for management commands."""
 
+from datetime import timedelta
 from unittest import SkipTest
 
 from six import StringIO
 
 from django.test import TestCase
+from django.utils import timezone
 from django.core.management import call_command
 from django.core.management.base import CommandError
 
 from weblate.trans.tests.test_models import RepoTestCase
 from weblate.trans.models import (
-    Translation, Component, Suggestion, IndexUpdate
+    Translation, Component, Suggestion, IndexUpdate, RepositoryJob,
 )
 from weblate.runner import main
 from weblate.trans.tests.utils import get_test_file, create_test_user
@@ -481,6 +483,50 @@ class UpdateGitTest(CheckGitTest):
     command_name = 'updategit'
     expected_string = ''
 
+    def test_workers(self):
+        self.do_test(
+            all=True,
+            workers=1,
+        )
+
+
+class ProcessRepositoryJobsTest(RepoTestCase):
+    def test_process(self):
+        component = self.create_component()
+        job = RepositoryJob.objects.enqueue(component, 'pull')
+        call_command('process_repository_jobs')
+        job.refresh_from_db()
+        self.assertEqual(job.state, RepositoryJob.STATE_DONE)
+        self.assertTrue(job.result)
+        self.assertIsNone(RepositoryJob.objects.claim())
+
+    def test_stale(self):
+        component = self.create_component()
+        stale = RepositoryJob.objects.enqueue(component, 'push')
+        running = RepositoryJob.objects.enqueue(component, 'commit')
+        RepositoryJob.objects.filter(pk=stale.pk).update(
+            state=RepositoryJob.STATE_RUNNING,
+            started=timezone.now() - timedelta(days=1),
+        )
+        RepositoryJob.objects.filter(pk=running.pk).update(
+            state=RepositoryJob.STATE_RUNNING,
+            started=timezone.now(),
+        )
+        call_command('process_repository_jobs')
+        stale.refresh_from_db()
+        self.assertEqual(stale.state, RepositoryJob.STATE_FAILED)
+        self.assertFalse(stale.result)
+        self.assertIsNotNone(stale.finished)
+        running.refresh_from_db()
+        self.assertEqual(running.state, RepositoryJob.STATE_RUNNING)
+
+    def test_invalid_method(self):
+        component = self.create_component()
+        with self.assertRaises(ValueError):
+            RepositoryJob.objects.enqueue(component, 'pull', method='bad')
+        job = RepositoryJob.objects.enqueue(component, 'pull', method='rebase')
+        self.assertEqual(job.method, 'rebase')
+
 
 class RebuildIndexTest(CheckGitTest):
     command_name = 'rebuild_index'
@@ -29,6 +29,7 @@ from weblate.formats import ParseError
 from weblate.trans.models import (
     Project, Component, Unit, Suggestion,
 )
+from weblate.trans.scheduler import update_components
 from weblate.trans.tests.test_models import RepoTestCase
 from weblate.trans.tests.test_views import ViewTestCase
 from weblate.utils.state import STATE_TRANSLATED
@@ -335,6 +336,21 @@ class ComponentDeleteTest(RepoTestCase):
         self.assertFalse(os.path.exists(project.full_path))
 
 
+class ComponentUpdateTest(RepoTestCase):
+    """Updating of multiple components testing."""
+    def test_update_link(self):
+        link_component = self.create_link()
+        component = link_component.linked_component
+        result = update_components([link_component, component], workers=2)
+        self.assertEqual(result, {component.pk: True})
+
+    def test_update_failed(self):
+        component = self.create_component()
+        shutil.rmtree(self.git_repo_path)
+        result = update_components([component], workers=2)
+        self.assertEqual(result, {component.pk: False})
+
+
 class ComponentChangeTest(RepoTestCase):
     """Component object change testing."""
     def test_rename(self):
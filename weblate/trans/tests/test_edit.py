@@ -23,10 +23,12 @@
 from __future__ import unicode_literals
 import time
 
+from django.core.cache import cache
 from django.urls import reverse
 
 from weblate.trans.tests.test_views import ViewTestCase
 from weblate.trans.models import Change
+from weblate.trans.search.results import StoredResults
 from weblate.utils.hash import hash_to_checksum
 from weblate.utils.state import STATE_TRANSLATED, STATE_FUZZY
 
@@ -462,6 +464,21 @@ class ZenViewTest(ViewTestCase):
         )
         self.assertContains(response, 'Please choose a valid filter type.')
 
+    def test_zen_expired(self):
+        url = reverse('zen', kwargs=self.kw_translation)
+        self.client.get(url)
+        keys = [
+            key for key in self.client.session.keys()
+            if key.startswith('search_')
+        ]
+        self.assertEqual(len(keys), 1)
+        # Pretend there were more results than what can be loaded now
+        token = self.client.session[keys[0]]['token']
+        cache.set(StoredResults.get_key(token), 100)
+        response = self.client.get(url, {'offset': '1'}, follow=True)
+        self.assertContains(response, 'The search results have expired.')
+        self.assertNotIn(keys[0], self.client.session)
+
     def test_load_zen(self):
         response = self.client.get(
             reverse('load_zen', kwargs=self.kw_translation)
@@ -22,8 +22,10 @@
 
 from __future__ import unicode_literals
 
+from django.test.utils import override_settings
 from django.urls import reverse
 
+from weblate.trans.models import RepositoryJob
 from weblate.trans.tests.test_views import ViewTestCase
 
 
@@ -78,6 +80,41 @@ class GitNoChangeProjectTest(ViewTestCase):
         )
         self.assertContains(response, self.STATUS_CHECK)
 
+    @override_settings(BACKGROUND_REPOSITORY=True)
+    def test_queued(self):
+        for operation in ('commit', 'update', 'update'):
+            response = self.client.post(
+                self.get_test_url(operation)
+            )
+            self.assertRedirects(response, self.get_expected_redirect())
+        # Identical pending operations are merged
+        self.assertEqual(RepositoryJob.objects.count(), 2)
+        job = RepositoryJob.objects.get(operation='pull')
+        self.assertEqual(
+            job.get_object().get_absolute_url(),
+            getattr(self, '{0}_url'.format(self.TEST_TYPE))
+        )
+        response = self.client.get(
+            reverse('job_status', kwargs={'job_id': job.pk})
+        )
+        self.assertFalse(response.json()['finished'])
+
+    @override_settings(BACKGROUND_REPOSITORY=True)
+    def test_queued_method(self):
+        url = self.get_test_url('update')
+        self.client.post(url + '?method=rebase')
+        self.client.post(url + '?method=invalid')
+        self.assertEqual(
+            set(RepositoryJob.objects.values_list('method', flat=True)),
+            {'rebase', ''}
+        )
+        self.assertTrue(job.run())
+        response = self.client.get(
+            reverse('job_status', kwargs={'job_id': job.pk})
+        )
+        self.assertTrue(response.json()['finished'])
+        self.assertTrue(response.json()['result'])
+
 
 class GitNoChangeComponentTest(GitNoChangeProjectTest):
     """Testing of component git manipulations."""
@@ -87,6 +87,20 @@ class JSViewsTest(FixtureTestCase):
         )
         self.assertEqual(response.status_code, 400)
 
+    def test_translate_all(self):
+        self.ensure_dummy_mt()
+        unit = self.get_unit()
+        response = self.client.get(
+            reverse('js-translate-all', kwargs={'unit_id': unit.id}),
+        )
+        self.assertEqual(response['X-Accel-Buffering'], 'no')
+        content = b''.join(response.streaming_content).decode('utf-8')
+        data = [json.loads(line) for line in content.splitlines()]
+        services = {item['service']: item for item in data}
+        self.assertEqual(len(data), len(MACHINE_TRANSLATION_SERVICES))
+        self.assertEqual(services['Dummy']['responseStatus'], 200)
+        self.assertEqual(len(services['Dummy']['translations']), 2)
+
     def test_get_unit_changes(self):
         unit = self.get_unit()
         response = self.client.get(
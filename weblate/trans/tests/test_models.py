@@ -24,21 +24,24 @@
 import shutil
 import os
 
+from django.core.cache import cache
 from django.core.management.color import no_style
 from django.db import connection
 from django.http.request import HttpRequest
 from django.test import TestCase, LiveServerTestCase
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.core.exceptions import ValidationError
 
 from weblate.auth.models import User, Group
 from weblate.checks.models import Check
 from weblate.trans.models import (
     Project, Source, Unit, WhiteboardMessage, ComponentList, AutoComponentList,
-    Component,
+    Component, Translation,
 )
 from weblate.lang.models import Language
+from weblate.trans.search.workers import MoreLikePool
 from weblate.trans.tests.utils import RepoTestMixin, create_test_user
+from weblate.utils.models import StatsData
 from weblate.utils.state import STATE_TRANSLATED
 
 
@@ -76,6 +79,35 @@ class RepoTestCase(BaseTestCase, RepoTestMixin):
 class ProjectTest(RepoTestCase):
     """Project object testing."""
 
+    def get_cold_stats(self, project):
+        """Calculate project stats on cold cache."""
+        cache.clear()
+        StatsData.objects.all().delete()
+        project = Project.objects.get(pk=project.pk)
+        with CaptureQueriesContext(connection) as context:
+            result = {
+                stats.language.code: stats.get_data()
+                for stats in project.stats.get_language_stats()
+            }
+            project.stats.ensure_basic()
+            result[None] = project.stats.get_data()
+        return result, len(context)
+
+    def test_stats(self):
+        component = self.create_component()
+        project = component.project
+        result, queries = self.get_cold_stats(project)
+        translation = component.translation_set.get(language_code='cs')
+        self.assertEqual(result['cs']['all'], translation.stats.all)
+        self.assertEqual(result[None]['all'], component.stats.all)
+        # Number of queries does not depend on number of components
+        self._create_component(
+            'po', 'po-link/*.po', name='Test2', project=project
+        )
+        result, more_queries = self.get_cold_stats(project)
+        self.assertEqual(result['cs']['all'], 2 * translation.stats.all)
+        self.assertEqual(queries, more_queries)
+
     def test_create(self):
         project = self.create_project()
         self.assertTrue(os.path.exists(project.full_path))
@@ -178,6 +210,129 @@ class TranslationTest(RepoTestCase):
         self.assertEqual(translation.stats.all, 0)
         self.assertEqual(translation.stats.all_words, 0)
 
+    def test_persistent_stats(self):
+        """Stats survive cache flush."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code='cs')
+        self.assertEqual(translation.stats.all, 4)
+        expected = component.stats.all
+        cache.clear()
+        # Units are not counted, only stored stats are used
+        translation.unit_set.all().delete()
+        translation = component.translation_set.get(language_code='cs')
+        self.assertEqual(translation.stats.all, 4)
+        component = Component.objects.get(pk=component.pk)
+        self.assertEqual(component.stats.all, expected)
+        # Invalidation removes stored stats
+        translation.invalidate_cache()
+        translation = component.translation_set.get(language_code='cs')
+        self.assertEqual(translation.stats.all, 0)
+        # Deleting object removes stored stats
+        key = translation.stats.cache_key
+        self.assertTrue(StatsData.objects.filter(key=key).exists())
+        translation.delete()
+        self.assertFalse(StatsData.objects.filter(key=key).exists())
+
+    def test_stats_delta(self):
+        """Incremental stats update matches full calculation."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code='cs')
+        objects = (
+            translation,
+            component,
+            component.project,
+            translation.language,
+        )
+        for obj in objects:
+            obj.stats.ensure_basic()
+        request = HttpRequest()
+        request.user = create_test_user()
+        unit = translation.unit_set.get(source='Hello, world!\n')
+        unit.translate(request, 'Nazdar svete!', STATE_TRANSLATED)
+        self.assertTrue(unit.has_failing_check)
+        self.assertEqual(translation.stats.translated, 1)
+        self.assertEqual(translation.stats.allchecks, 1)
+        # Stats were updated, not invalidated
+        for obj in objects:
+            self.assertTrue(
+                StatsData.objects.filter(key=obj.stats.cache_key).exists()
+            )
+        data = [obj.stats.get_data() for obj in objects]
+        translation.invalidate_cache()
+        for obj, values in zip(objects, data):
+            # Use fresh object to avoid reusing in memory stats
+            stats = obj.__class__.objects.get(pk=obj.pk).stats
+            stats.ensure_basic()
+            expected = stats.get_data()
+            for key, value in values.items():
+                self.assertEqual(value, expected[key], key)
+
+    def test_stats_delta_concurrent(self):
+        """Delta is applied to current data, not to stale local copy."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code='cs')
+        translation.stats.ensure_basic()
+        first = Translation.objects.get(pk=translation.pk).stats
+        second = Translation.objects.get(pk=translation.pk).stats
+        first.ensure_basic()
+        second.ensure_basic()
+        first.apply_delta({'translated': 1})
+        second.apply_delta({'translated': 1})
+        stats = Translation.objects.get(pk=translation.pk).stats
+        self.assertEqual(stats.translated, 2)
+
+    def test_stats_delta_locked(self):
+        """Stats are invalidated when lock can not be acquired."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code='cs')
+        stats = translation.stats
+        stats.ensure_basic()
+        cache.set('{}-lock'.format(stats.cache_key), True)
+        stats.apply_delta({'translated': 1})
+        self.assertFalse(
+            StatsData.objects.filter(key=stats.cache_key).exists()
+        )
+
+    def test_blob_hash(self):
+        """Stored revision matches hashes looked up for component."""
+        component = self.create_component()
+        translation = component.translation_set.get(language_code='cs')
+        blob_hashes = component.get_blob_hashes([translation.filename])
+        self.assertEqual(
+            translation.revision,
+            translation.get_git_blob_hash(blob_hashes)
+        )
+        self.assertEqual(
+            translation.revision,
+            translation.get_git_blob_hash()
+        )
+        # Index hash differs from content hash with git content filters
+        blob_hashes[translation.filename] = '0' * 40
+        changes = translation.change_set.count()
+        translation.check_sync(blob_hashes=blob_hashes)
+        self.assertEqual(translation.change_set.count(), changes)
+
+    def test_sync(self):
+        component = self.create_component()
+        translation = component.translation_set.get(language_code='cs')
+        units = set(translation.unit_set.values_list('id', flat=True))
+        # Forced parsing without changes keeps units
+        translation.check_sync(force=True)
+        self.assertEqual(
+            units, set(translation.unit_set.values_list('id', flat=True))
+        )
+        # Stale unit is removed and missing one created
+        unit = translation.unit_set.all()[0]
+        translation.unit_set.filter(pk=unit.pk).update(id_hash=1)
+        translation.check_sync(force=True)
+        self.assertEqual(translation.unit_set.count(), 4)
+        self.assertFalse(translation.unit_set.filter(id_hash=1).exists())
+        new_unit = translation.unit_set.get(id_hash=unit.id_hash)
+        self.assertNotEqual(new_unit.pk, unit.pk)
+        self.assertEqual(new_unit.source, unit.source)
+        self.assertEqual(new_unit.position, unit.position)
+        self.assertEqual(new_unit.num_words, unit.num_words)
+
     def test_commit_groupping(self):
         component = self.create_component()
         translation = component.translation_set.get(language_code='cs')
@@ -336,6 +491,40 @@ class UnitTest(ModelTestCase):
         unit = Unit.objects.all()[0]
         self.assertEqual(Unit.objects.more_like_this(unit).count(), 0)
 
+    def test_more_like_pool(self):
+        unit = Unit.objects.all()[0]
+        pool = MoreLikePool(1, 1)
+        self.assertEqual(
+            list(pool.more_like(unit.pk, unit.source, 5, 15)), []
+        )
+        self.assertEqual(
+            pool.get_stats(),
+            {'workers': 1, 'queue': 0, 'timeouts': 0, 'rejected': 0}
+        )
+
+    def test_more_like_pool_overload(self):
+        unit = Unit.objects.all()[0]
+        # There is no worker to process the queue
+        pool = MoreLikePool(0, 1)
+        self.assertRaisesMessage(
+            Exception,
+            'Request for more like {0} timed out.'.format(unit.pk),
+            pool.more_like,
+            unit.pk, unit.source, 5, 0
+        )
+        self.assertRaisesMessage(
+            Exception,
+            'Request for more like {0} rejected, queue is full.'.format(
+                unit.pk
+            ),
+            pool.more_like,
+            unit.pk, unit.source, 5, 0
+        )
+        self.assertEqual(
+            pool.get_stats(),
+            {'workers': 0, 'queue': 1, 'timeouts': 1, 'rejected': 1}
+        )
+
 
 class WhiteboardMessageTest(ModelTestCase):
     """Test(s) for WhiteboardMessage model."""
@@ -117,6 +117,24 @@ class MultiRepoTest(ViewTestCase):
         self.assertFalse(translation.repo_needs_commit())
         translation.component.do_push(self.request)
 
+    def push_file(self, filename, content=None):
+        """Add, replace or remove file in remote repository."""
+        repository = self.component.repository
+        with repository.lock:
+            if content is None:
+                repository.remove([filename], 'Remove {0}'.format(filename))
+            else:
+                fullname = os.path.join(self.component.full_path, filename)
+                with open(fullname, 'w') as handle:
+                    handle.write(content)
+                repository.commit(
+                    'Update {0}'.format(filename),
+                    'TEST <test@example.net>',
+                    timezone.now(),
+                    [filename]
+                )
+        self.component.do_push(self.request)
+
     def test_propagate(self):
         """Test handling of propagating."""
         # Do changes in first repo
@@ -237,6 +255,62 @@ class MultiRepoTest(ViewTestCase):
         )
         self.assertEqual(translation.stats.all, 1)
 
+    def test_added_translation(self):
+        """Test adding new translation file in remote repo."""
+        self.push_file(self._filemask.replace('*', 'sk'), MINIMAL_PO)
+
+        self.component2.do_update(self.request)
+
+        translation = self.component2.translation_set.get(
+            language_code='sk'
+        )
+        self.assertEqual(translation.stats.all, 1)
+        self.assertTrue(
+            self.component2.translation_set.filter(
+                language_code='cs'
+            ).exists()
+        )
+
+    def test_removed_translation(self):
+        """Test removing translation file in remote repo."""
+        self.push_file(self._filemask.replace('*', 'cs'))
+
+        self.component2.do_update(self.request)
+
+        self.assertFalse(
+            self.component2.translation_set.filter(
+                language_code='cs'
+            ).exists()
+        )
+        self.assertTrue(
+            self.component2.translation_set.filter(
+                language_code='de'
+            ).exists()
+        )
+
+    def test_incomplete_update(self):
+        """Test loading files changed in previous incomplete update."""
+        previous = self.component2.synced_revision
+        self.push_file(self._filemask.replace('*', 'sk'), MINIMAL_PO)
+        self.component2.do_update(self.request)
+        self.assertNotEqual(self.component2.synced_revision, previous)
+
+        # Simulate update failed before loading the file
+        self.component2.translation_set.filter(language_code='sk').delete()
+        self.component2.synced_revision = previous
+        Component.objects.filter(pk=self.component2.pk).update(
+            synced_revision=previous
+        )
+
+        self.push_file('README.test', 'Test')
+        self.component2.do_update(self.request)
+
+        self.assertTrue(
+            self.component2.translation_set.filter(
+                language_code='sk'
+            ).exists()
+        )
+
 
 class GitBranchMultiRepoTest(MultiRepoTest):
     _vcs = 'git'
@@ -27,15 +27,21 @@ import shutil
 from unittest import TestCase
 from whoosh.filedb.filestore import FileStorage
 from whoosh.fields import Schema, ID, TEXT
+from django.db import connection
 from django.urls import reverse
 from django.test.utils import override_settings
 from django.http import QueryDict
 
 from weblate.accounts.ratelimit import reset_rate_limit
 from weblate.trans.tests.test_views import ViewTestCase
-from weblate.trans.search import update_index_unit, fulltext_search
-import weblate.trans.search
-from weblate.trans.models import IndexUpdate
+from weblate.trans.search import (
+    update_index_unit, fulltext_search, get_backend, more_like,
+    FulltextResults,
+)
+from weblate.trans.search.results import StoredResults
+from weblate.trans.views.edit import get_search_loader
+import weblate.trans.search.whooshsearch
+from weblate.trans.models import IndexUpdate, Unit
 from weblate.trans.tests.utils import TempDirMixin
 from weblate.utils.state import STATE_FUZZY, STATE_TRANSLATED
 
@@ -304,6 +310,22 @@ class SearchViewTest(ViewTestCase):
             response,
             'Thank you for using Weblate.',
         )
+        # Session holds only token of stored results
+        stored = [
+            value for key, value in self.client.session.items()
+            if key.startswith('search_')
+        ]
+        self.assertEqual(len(stored), 1)
+        self.assertNotIn('ids', stored[0])
+        results = StoredResults.load(stored[0]['token'])
+        self.assertEqual(len(results), 2)
+        # Expired results are searched again
+        results.delete()
+        response = self.client.get(self.translate_url, params)
+        self.assertContains(
+            response,
+            'Thank you for using Weblate.',
+        )
 
     def test_search_checksum(self):
         unit = self.translation.unit_set.get(
@@ -404,19 +426,242 @@ class SearchBackendTest(ViewTestCase):
         update = IndexUpdate.objects.all()[0]
         self.assertTrue(update.source, True)
 
+    def test_restrict(self):
+        translation = self.get_translation()
+        expected = set(Unit.objects.filter(
+            source='Hello, world!\n',
+            translation__language__code__in=('cs', 'de'),
+        ).values_list('pk', flat=True))
+        self.assertEqual(len(expected), 2)
+        self.assertEqual(
+            fulltext_search('hello', ['cs', 'de'], {'source': True}),
+            expected
+        )
+        self.assertEqual(
+            fulltext_search(
+                'hello', ['cs', 'de'], {'source': True}, translation
+            ),
+            {self.get_unit().pk}
+        )
+
+    def test_results(self):
+        params = {'q': 'world', 'search': 'ftx', 'type': 'all'}
+        params['source'] = params['target'] = True
+        units = Unit.objects.all()
+        results = units.search(params)
+        self.assertIsInstance(results, FulltextResults)
+        # Only needed results are fetched
+        backup = weblate.trans.search.CHUNK_SIZE
+        weblate.trans.search.CHUNK_SIZE = 1
+        try:
+            self.assertEqual(results[:1][0].source, 'Hello, world!\n')
+            self.assertEqual(len(results.matched), 1)
+        finally:
+            weblate.trans.search.CHUNK_SIZE = backup
+        self.assertFalse(results.exhausted)
+        expected = set(units.filter(
+            source='Hello, world!\n'
+        ).values_list('pk', flat=True))
+        # Count is estimated from the index without fetching the results
+        self.assertGreaterEqual(results.count(), len(expected))
+        self.assertFalse(results.exhausted)
+        self.assertEqual(set(results.values_list('pk', flat=True)), expected)
+        self.assertEqual(results.count(), len(expected))
+        self.assertEqual(set([unit.pk for unit in results]), expected)
+        # Filtering is applied to fulltext results
+        self.assertEqual(
+            [unit.pk for unit in results.filter(
+                translation=self.get_translation()
+            )],
+            [self.get_unit().pk]
+        )
+        # Ordering by database fields
+        ordered = units.filter(
+            source='Hello, world!\n'
+        ).order_by('position', 'pk').values_list('pk', flat=True)
+        self.assertEqual(
+            results.order_by('position', 'pk').values_list('pk', flat=True),
+            list(ordered)
+        )
+
+    def test_search_loader(self):
+        params = {'q': 'world', 'search': 'ftx', 'type': 'all'}
+        params['source'] = params['target'] = True
+        units = Unit.objects.order_by('priority', 'position', 'pk')
+        # Sorted fulltext results are stored at once
+        self.assertIsNone(
+            get_search_loader(units.search(params).order_by(
+                'priority', 'position', 'pk'
+            ))
+        )
+        loader = get_search_loader(units)
+        self.assertEqual(
+            list(loader(None, 2)),
+            list(units.values_list('id', flat=True)[:2])
+        )
+
+    @override_settings(OFFLOAD_INDEXING=False)
+    def test_searcher_cache(self):
+        whooshsearch = weblate.trans.search.whooshsearch
+        index = whooshsearch.get_target_index('cs')
+        self.assertIs(index, whooshsearch.get_target_index('cs'))
+        searcher = whooshsearch.get_searcher(index)
+        self.assertIs(searcher, whooshsearch.get_searcher(index))
+        self.assertEqual(
+            fulltext_search('nazdar', ['cs'], {'target': True}),
+            set()
+        )
+        # Index update is visible in refreshed searcher
+        self.do_index_update()
+        self.assertEqual(
+            fulltext_search('nazdar', ['cs'], {'target': True}),
+            {self.get_unit().pk}
+        )
+        self.assertIsNot(searcher, whooshsearch.get_searcher(index))
+
+
+@override_settings(
+    SEARCH_BACKEND='weblate.trans.search.database.DatabaseSearch'
+)
+class DatabaseSearchViewTest(SearchViewTest):
+    """Search views using database backend."""
+    def setUp(self):
+        get_backend().setup()
+        super(DatabaseSearchViewTest, self).setUp()
+
+
+@override_settings(
+    SEARCH_BACKEND='weblate.trans.search.database.DatabaseSearch'
+)
+class DatabaseSearchTest(ViewTestCase):
+    def setUp(self):
+        super(DatabaseSearchTest, self).setUp()
+        get_backend().setup()
+
+    def test_search(self):
+        unit = self.get_unit()
+        self.assertEqual(
+            set(fulltext_search('hello', ['cs'], {'source': True})),
+            set(Unit.objects.filter(
+                source='Hello, world!\n'
+            ).values_list('pk', flat=True))
+        )
+        self.assertEqual(
+            set(fulltext_search('nazdar', ['cs'], {'target': True})),
+            set()
+        )
+        self.edit_unit('Hello, world!\n', 'Nazdar svete!\n')
+        self.assertEqual(
+            set(fulltext_search('nazdar', ['cs'], {'target': True})),
+            {unit.pk}
+        )
+        self.assertEqual(
+            set(fulltext_search('nazdar', ['de'], {'target': True})),
+            set()
+        )
+        self.assertEqual(
+            set(fulltext_search('nazdar', ['cs'], {'source': True})),
+            set()
+        )
+
+    def test_more_like(self):
+        unit = self.get_unit()
+        similar = Unit.objects.filter(
+            source=unit.source
+        ).exclude(
+            pk=unit.pk
+        ).values_list('pk', flat=True)
+        result = more_like(unit.pk, unit.source, 100)
+        self.assertNotIn(unit.pk, result)
+        self.assertEqual(set(result), set(similar))
+        self.assertEqual(
+            list(Unit.objects.more_like_this(unit)),
+            []
+        )
+        self.edit_unit('Hello, world!\n', 'Nazdar svete!\n')
+        other = Unit.objects.filter(
+            source=unit.source,
+            translation__language_code='cs',
+        ).exclude(
+            pk=unit.pk
+        )
+        self.assertEqual(
+            list(Unit.objects.more_like_this(unit)),
+            list(other)
+        )
+
+    def test_setup_triggers(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Not supported')
+        backend = get_backend()
+        if not backend.has_sqlite_fts():
+            self.skipTest('FTS5 not available')
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER trans_unit_fts_update')
+        self.edit_unit('Hello, world!\n', 'Nazdar svete!\n')
+        backend.setup()
+        self.assertEqual(
+            set(fulltext_search('nazdar', ['cs'], {'target': True})),
+            {self.get_unit().pk}
+        )
+        self.edit_unit('Hello, world!\n', 'Ahoj svete!\n')
+        self.assertEqual(
+            set(fulltext_search('ahoj', ['cs'], {'target': True})),
+            {self.get_unit().pk}
+        )
+
+
+class StoredResultsTest(TestCase):
+    def test_store(self):
+        results = StoredResults.store(range(1, 2500))
+        self.assertEqual(len(results), 2499)
+        results = StoredResults.load(results.token)
+        self.assertEqual(len(results), 2499)
+        self.assertEqual(results[0], 1)
+        self.assertEqual(results[1500], 1501)
+        self.assertEqual(results[998:1002], [999, 1000, 1001, 1002])
+        self.assertEqual(results.index(2001), 2000)
+        self.assertEqual(len(results.blocks), 3)
+        self.assertRaises(IndexError, lambda: results[2499])
+        self.assertRaises(ValueError, results.index, 2500)
+        results.delete()
+        self.assertIsNone(StoredResults.load(results.token))
+
+    def test_loader(self):
+        def loader(after, limit):
+            start = 1 if after is None else after + 1
+            return range(start, min(start + limit, 2500))
+
+        results = StoredResults.store(loader(None, 1000), 2499, loader)
+        self.assertEqual(len(results), 2499)
+        # Only first block is stored upfront
+        self.assertIsNone(results.get_cached_block(1))
+        results = StoredResults.load(results.token, loader)
+        self.assertEqual(results[1500], 1501)
+        self.assertEqual(results[2498], 2499)
+        self.assertEqual(results.index(2001), 2000)
+        # Without loader the missing blocks can not be loaded
+        results = StoredResults.store(loader(None, 1000), 2499)
+        self.assertRaises(KeyError, lambda: results[1500])
+
+    def test_empty(self):
+        results = StoredResults.store([])
+        self.assertFalse(results)
+        self.assertEqual(results[:10], [])
+
 
 class SearchMigrationTest(TestCase, TempDirMixin):
     """Search index migration testing"""
     def setUp(self):
         self.create_temp()
-        self.backup = weblate.trans.search.STORAGE
+        self.backup = weblate.trans.search.whooshsearch.STORAGE
         self.storage = FileStorage(self.tempdir)
-        weblate.trans.search.STORAGE = self.storage
+        weblate.trans.search.whooshsearch.STORAGE = self.storage
         self.storage.create()
 
     def tearDown(self):
         self.remove_temp()
-        weblate.trans.search.STORAGE = self.backup
+        weblate.trans.search.whooshsearch.STORAGE = self.backup
 
     def do_test(self, source, target):
         if source is not None:
@@ -424,13 +669,15 @@ class SearchMigrationTest(TestCase, TempDirMixin):
         if target is not None:
             self.storage.create_index(target, 'target-cs')
 
-        sindex = weblate.trans.search.get_source_index()
+        sindex = weblate.trans.search.whooshsearch.get_source_index()
         self.assertIsNotNone(sindex)
-        tindex = weblate.trans.search.get_target_index('cs')
+        tindex = weblate.trans.search.whooshsearch.get_target_index('cs')
         self.assertIsNotNone(tindex)
         writer = sindex.writer()
         writer.update_document(
             pk=1,
+            translation=1,
+            language='cs',
             source="source",
             context="context",
             location="location",
@@ -439,6 +686,7 @@ class SearchMigrationTest(TestCase, TempDirMixin):
         writer = tindex.writer()
         writer.update_document(
             pk=1,
+            translation=1,
             target="target",
             comment="comment"
         )
@@ -458,8 +706,8 @@ class SearchMigrationTest(TestCase, TempDirMixin):
         self.do_test(None, None)
 
     def test_current(self):
-        source = weblate.trans.search.SourceSchema
-        target = weblate.trans.search.TargetSchema
+        source = weblate.trans.search.whooshsearch.SourceSchema
+        target = weblate.trans.search.whooshsearch.TargetSchema
         self.do_test(source, target)
 
     def test_2_4(self):
@@ -32,6 +32,7 @@ from django.utils.encoding import force_text
 from django.http import HttpResponseRedirect, HttpResponse, JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
+from django.db.models import Q
 from django.template.loader import render_to_string
 
 from weblate.utils.docs import get_doc_url
@@ -49,6 +50,10 @@ from weblate.trans.views.helper import (
 from weblate.checks import CHECKS
 from weblate.trans.util import join_plural, render, redirect_next
 from weblate.trans.autotranslate import AutoTranslate
+from weblate.trans.search import FulltextResults
+from weblate.trans.search.results import (
+    StoredResults, BLOCK_SIZE, RESULTS_TIMEOUT,
+)
 from weblate.utils.hash import hash_to_checksum
 
 
@@ -113,10 +118,42 @@ def cleanup_session(session):
         if not key.startswith('search_'):
             continue
         value = session[key]
-        if not isinstance(value, dict) or value['ttl'] < now:
+        if (not isinstance(value, dict) or value['ttl'] < now
+                or 'token' not in value):
             del session[key]
 
 
+def get_search_loader(allunits):
+    """Return function loading search results following given unit.
+
+    The results are ordered by position, so the following units can be
+    looked up without relying on offset, which would be shifted when
+    units stop matching the search.
+
+    Fulltext results are sorted only once all matches are fetched from
+    the index, these are stored at once and None is returned.
+    """
+    if isinstance(allunits, FulltextResults):
+        return None
+
+    def loader(after, limit):
+        units = allunits
+        if after is not None:
+            last = Unit.objects.filter(pk=after).values_list(
+                'priority', 'position'
+            ).first()
+            if last is None:
+                raise KeyError('Search results have changed')
+            priority, position = last
+            units = units.filter(
+                Q(priority__gt=priority) |
+                Q(priority=priority, position__gt=position) |
+                Q(priority=priority, position=position, pk__gt=after)
+            )
+        return units.values_list('id', flat=True)[:limit]
+    return loader
+
+
 def search(translation, request):
     """Perform search or returns cached search results."""
     # Possible new search
@@ -134,23 +171,36 @@ def search(translation, request):
     search_url = form.urlencode()
     session_key = 'search_{0}_{1}'.format(translation.pk, search_url)
 
-    if session_key in request.session and 'offset' in request.GET:
-        search_result.update(request.session[session_key])
-        return search_result
-
     allunits = translation.unit_set.search(
         form.cleaned_data,
         translation=translation,
-    )
+    ).order_by('priority', 'position', 'pk')
+    loader = get_search_loader(allunits)
+
+    stored = request.session.get(session_key)
+    if stored and 'token' in stored and 'offset' in request.GET:
+        results = StoredResults.load(stored['token'], loader)
+        # The results might have expired from the cache
+        if results is not None:
+            search_result.update(stored)
+            search_result['ids'] = results
+            return search_result
 
     search_query = form.get_search_query()
     name = form.get_name()
 
-    # Grab unit IDs
-    unit_ids = list(allunits.values_list('id', flat=True))
+    if loader is None:
+        results = StoredResults.store(allunits.values_list('id', flat=True))
+    else:
+        # Store first block of unit IDs, rest is loaded on demand
+        results = StoredResults.store(
+            allunits.values_list('id', flat=True)[:BLOCK_SIZE],
+            allunits.count(),
+            loader
+        )
 
     # Check empty search results
-    if not unit_ids:
+    if not results:
         messages.warning(request, _('No string matched your search!'))
         return redirect(translation)
 
@@ -162,15 +212,22 @@ def search(translation, request):
         'url': search_url,
         'key': session_key,
         'name': force_text(name),
-        'ids': unit_ids,
-        'ttl': int(time.time()) + 86400,
+        'token': results.token,
+        'ttl': int(time.time()) + RESULTS_TIMEOUT,
     }
     request.session[session_key] = store_result
 
     search_result.update(store_result)
+    search_result['ids'] = results
     return search_result
 
 
+def reset_search(request, search_result):
+    """Remove search results which can not be used anymore."""
+    request.session.pop(search_result['key'], None)
+    search_result['ids'].delete()
+
+
 def perform_suggestion(unit, form, request):
     """Handle suggesion saving."""
     if form.cleaned_data['target'][0] == '':
@@ -479,6 +536,10 @@ def translate(request, project, component, lang):
         try:
             unit = translation.unit_set.get(id_hash=search_result['checksum'])
             offset = search_result['ids'].index(unit.id) + 1
+        except KeyError:
+            reset_search(request, search_result)
+            messages.warning(request, _('The search results have expired.'))
+            return redirect(translation)
         except (Unit.DoesNotExist, ValueError):
             messages.warning(request, _('No string matched your search!'))
             return redirect(translation)
@@ -487,7 +548,7 @@ def translate(request, project, component, lang):
     if not 0 < offset <= num_results:
         messages.info(request, _('The translation has come to an end.'))
         # Delete search
-        del request.session[search_result['key']]
+        reset_search(request, search_result)
         # Redirect to translation
         return redirect(translation)
 
@@ -542,6 +603,10 @@ def translate(request, project, component, lang):
     # Grab actual unit
     try:
         unit = translation.unit_set.get(pk=search_result['ids'][offset - 1])
+    except KeyError:
+        reset_search(request, search_result)
+        messages.warning(request, _('The search results have expired.'))
+        return redirect(translation)
     except Unit.DoesNotExist:
         # Can happen when using SID for other translation
         messages.error(request, _('Invalid search string!'))
@@ -699,9 +764,14 @@ def get_zen_unitdata(translation, request):
     offset = search_result['offset'] - 1
     search_result['last_section'] = offset + 20 >= len(search_result['ids'])
 
-    units = translation.unit_set.filter(
-        pk__in=search_result['ids'][offset:offset + 20]
-    )
+    try:
+        ids = search_result['ids'][offset:offset + 20]
+    except KeyError:
+        reset_search(request, search_result)
+        messages.warning(request, _('The search results have expired.'))
+        return redirect(translation), None
+
+    units = translation.unit_set.filter(pk__in=ids)
 
     unitdata = [
         {
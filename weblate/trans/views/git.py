@@ -20,14 +20,19 @@
 
 import sys
 
+from django.conf import settings
 from django.utils.translation import ugettext as _
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
 from django.views.decorators.http import require_POST
 
 from filelock import Timeout
 
 from weblate.utils import messages
+from weblate.trans.models import RepositoryJob
+from weblate.trans.models.job import JOB_METHODS
 from weblate.trans.views.helper import (
     get_project, get_component, get_translation
 )
@@ -54,8 +59,22 @@ def execute_locked(request, obj, message, call, *args, **kwargs):
     return redirect_param(obj, '#repository')
 
 
+def queue_operation(request, obj, operation, method=None):
+    """Helper function to queue repository operation."""
+    job = RepositoryJob.objects.enqueue(
+        obj, operation, request.user, method
+    )
+    messages.info(
+        request,
+        _('Repository operation has been scheduled as job %d.') % job.pk
+    )
+    return redirect_param(obj, '#repository')
+
+
 def perform_commit(request, obj):
     """Helper function to do the repository commmit."""
+    if settings.BACKGROUND_REPOSITORY:
+        return queue_operation(request, obj, 'commit')
     return execute_locked(
         request,
         obj,
@@ -67,18 +86,26 @@ def perform_commit(request, obj):
 
 def perform_update(request, obj):
     """Helper function to do the repository update."""
+    method = request.GET.get('method')
+    if method not in JOB_METHODS:
+        # Use merge style configured for the component
+        method = None
+    if settings.BACKGROUND_REPOSITORY:
+        return queue_operation(request, obj, 'pull', method)
     return execute_locked(
         request,
         obj,
         _('All repositories were updated.'),
         obj.do_update,
         request,
-        method=request.GET.get('method'),
+        method=method,
     )
 
 
 def perform_push(request, obj):
     """Helper function to do the repository push."""
+    if settings.BACKGROUND_REPOSITORY:
+        return queue_operation(request, obj, 'push')
     return execute_locked(
         request,
         obj,
@@ -90,6 +117,8 @@ def perform_push(request, obj):
 
 def perform_reset(request, obj):
     """Helper function to do the repository reset."""
+    if settings.BACKGROUND_REPOSITORY:
+        return queue_operation(request, obj, 'reset')
     return execute_locked(
         request,
         obj,
@@ -246,3 +275,23 @@ def remove_translation(request, project, component, lang):
         obj.remove,
         user=request.user,
     )
+
+
+@login_required
+def job_status(request, job_id):
+    """Return status of queued repository operation."""
+    job = get_object_or_404(RepositoryJob, pk=job_id)
+
+    if not request.user.has_perm('meta:vcs.status', job.project):
+        raise PermissionDenied()
+
+    return JsonResponse({
+        'id': job.pk,
+        'operation': job.operation,
+        'state': job.get_state_display(),
+        'finished': job.state in (
+            RepositoryJob.STATE_DONE, RepositoryJob.STATE_FAILED
+        ),
+        'result': job.result,
+        'message': job.message,
+    })
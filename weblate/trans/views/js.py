@@ -18,9 +18,14 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+import json
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
+from django.core.serializers.json import DjangoJSONEncoder
 from django.http import (
     HttpResponse, HttpResponseBadRequest, Http404, JsonResponse,
+    StreamingHttpResponse,
 )
 from django.core.exceptions import PermissionDenied
 from django.utils.encoding import force_text
@@ -30,6 +35,7 @@ from weblate.checks.models import Check
 from weblate.screenshots.forms import ScreenshotForm
 from weblate.trans.models import Unit, Change
 from weblate.machinery import MACHINE_TRANSLATION_SERVICES
+from weblate.machinery.runner import translate_services
 from weblate.trans.views.helper import (
     get_project, get_component, get_translation
 )
@@ -40,12 +46,38 @@ from weblate.utils.hash import checksum_to_hash
 from weblate.trans.util import sort_objects
 
 
-def translate(request, unit_id):
-    """AJAX handler for translating."""
+def get_mt_response(unit, translation_service, result):
+    """Format machine translation result or exception for JSON."""
+    response = {
+        'responseStatus': 200,
+        'service': translation_service.name,
+        'responseDetails': '',
+        'translations': [],
+        'lang': unit.translation.language.code,
+        'dir': unit.translation.language.direction,
+    }
+    if isinstance(result, Exception):
+        response['responseStatus'] = 500
+        response['responseDetails'] = '{0}: {1}'.format(
+            result.__class__.__name__,
+            str(result)
+        )
+    else:
+        response['translations'] = result
+    return response
+
+
+def get_mt_unit(request, unit_id):
     unit = get_object_or_404(Unit, pk=int(unit_id))
     request.user.check_access(unit.translation.component.project)
     if not request.user.has_perm('machinery.view', unit.translation):
         raise PermissionDenied()
+    return unit
+
+
+def translate(request, unit_id):
+    """AJAX handler for translating."""
+    unit = get_mt_unit(request, unit_id)
 
     service_name = request.GET.get('service', 'INVALID')
 
@@ -54,33 +86,51 @@ def translate(request, unit_id):
 
     translation_service = MACHINE_TRANSLATION_SERVICES[service_name]
 
-    # Error response
-    response = {
-        'responseStatus': 500,
-        'service': translation_service.name,
-        'responseDetails': '',
-        'translations': [],
-        'lang': unit.translation.language.code,
-        'dir': unit.translation.language.direction,
-    }
-
     try:
-        response['translations'] = translation_service.translate(
+        result = translation_service.translate(
             unit.translation.language.code,
             unit.get_source_plurals()[0],
             unit,
             request.user
         )
-        response['responseStatus'] = 200
     except Exception as exc:
-        response['responseDetails'] = '{0}: {1}'.format(
-            exc.__class__.__name__,
-            str(exc)
-        )
+        result = exc
 
     return JsonResponse(
-        data=response,
+        data=get_mt_response(unit, translation_service, result),
+    )
+
+
+def translate_all(request, unit_id):
+    """AJAX handler for translating using all services at once.
+
+    The results are streamed as JSON lines in the order services answer,
+    so that the client can show them without waiting for slower ones.
+    """
+    unit = get_mt_unit(request, unit_id)
+
+    results = translate_services(
+        list(MACHINE_TRANSLATION_SERVICES.values()),
+        unit.translation.language.code,
+        unit.get_source_plurals()[0],
+        unit,
+        request.user,
+        settings.MT_DEADLINE,
+    )
+
+    def stream_results():
+        for translation_service, result in results:
+            yield json.dumps(
+                get_mt_response(unit, translation_service, result),
+                cls=DjangoJSONEncoder,
+            ) + '\n'
+
+    response = StreamingHttpResponse(
+        stream_results(), content_type='application/x-ndjson'
     )
+    # Disable buffering in nginx so that partial results reach the client
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 def get_unit_changes(request, unit_id):
@@ -484,6 +484,13 @@ urlpatterns = [
         name='reset_translation',
     ),
 
+    # VCS manipulation - queued operation status
+    url(
+        r'^job/(?P<job_id>[0-9]+)/$',
+        weblate.trans.views.git.job_status,
+        name='job_status',
+    ),
+
     # VCS manipulation - remove
     url(
         r'^remove/' + TRANSLATION + '$',
@@ -767,6 +774,11 @@ urlpatterns = [
         weblate.trans.views.js.translate,
         name='js-translate',
     ),
+    url(
+        r'^js/translate-all/(?P<unit_id>[0-9]+)/$',
+        weblate.trans.views.js.translate_all,
+        name='js-translate-all',
+    ),
     url(
         r'^js/changes/(?P<unit_id>[0-9]+)/$',
         weblate.trans.views.js.get_unit_changes,
@@ -17,3 +17,23 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
+from __future__ import unicode_literals
+
+from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+
+from weblate.utils.fields import JSONField
+
+
+@python_2_unicode_compatible
+class StatsData(models.Model):
+    """Persistent storage for statistics.
+
+    Acts as a backend for the stats cache, see weblate.utils.stats.
+    """
+    key = models.CharField(max_length=100, unique=True)
+    data = JSONField()
+    timestamp = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return self.key
@@ -20,14 +20,18 @@
 
 from __future__ import unicode_literals
 
+from collections import defaultdict
 from copy import copy
+import time
 
 from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
 from django.db.models import Sum, Count
 from django.utils.functional import cached_property
 
 from weblate.trans.filter import get_filter_choice
+from weblate.utils.models import StatsData
 from weblate.utils.query import conditional_sum
 from weblate.utils.state import (
     STATE_TRANSLATED, STATE_FUZZY, STATE_APPROVED, STATE_EMPTY,
@@ -49,6 +53,15 @@ BASIC_KEYS = frozenset(
     list(BASICS)
 )
 SOURCE_KEYS = frozenset(list(BASIC_KEYS) + ['source_strings', 'source_words'])
+DELTA_KEYS = frozenset(
+    list(BASICS) +
+    ['{}_words'.format(x) for x in BASICS] +
+    ['source_strings', 'source_words']
+)
+CACHE_TIMEOUT = 30 * 86400
+LOCK_TIMEOUT = 10
+LOCK_ATTEMPTS = 20
+LOCK_DELAY = 0.05
 
 
 def prefetch_stats(queryset):
@@ -63,6 +76,113 @@ def prefetch_stats(queryset):
     return queryset
 
 
+def load_persistent(keys):
+    """Load stats from the database and populate cache with them."""
+    result = dict(
+        StatsData.objects.filter(key__in=keys).values_list('key', 'data')
+    )
+    if result:
+        cache.set_many(result, CACHE_TIMEOUT)
+    return result
+
+
+def get_basic_aggregates():
+    """Return aggregates to calculate basic stats over units."""
+    return {
+        'all': Count('id'),
+        'all_words': Sum('num_words'),
+        'fuzzy': conditional_sum(1, state=STATE_FUZZY),
+        'fuzzy_words': conditional_sum('num_words', state=STATE_FUZZY),
+        'translated': conditional_sum(1, state__gte=STATE_TRANSLATED),
+        'translated_words': conditional_sum(
+            'num_words', state__gte=STATE_TRANSLATED
+        ),
+        'nottranslated': conditional_sum(1, state=STATE_EMPTY),
+        'nottranslated_words': conditional_sum(
+            'num_words', state=STATE_EMPTY
+        ),
+        'approved': conditional_sum(1, state__gte=STATE_APPROVED),
+        'approved_words': conditional_sum(
+            'num_words', state__gte=STATE_APPROVED
+        ),
+        'allchecks': conditional_sum(1, has_failing_check=True),
+        'allchecks_words': conditional_sum(
+            'num_words', has_failing_check=True
+        ),
+        'suggestions': conditional_sum(1, has_suggestion=True),
+        'suggestions_words': conditional_sum(
+            'num_words', has_suggestion=True
+        ),
+        'comments': conditional_sum(1, has_comment=True),
+        'comments_words': conditional_sum('num_words', has_comment=True),
+        'approved_suggestions': conditional_sum(
+            1, state__gte=STATE_APPROVED, has_suggestion=True
+        ),
+        'approved_suggestions_words': conditional_sum(
+            'num_words', state__gte=STATE_APPROVED, has_suggestion=True
+        ),
+    }
+
+
+def save_stats(stats):
+    """Save several stats to cache and database at once."""
+    data = {item.cache_key: item.get_data() for item in stats}
+    if not data:
+        return
+    cache.set_many(data, CACHE_TIMEOUT)
+    keys = list(data.keys())
+    try:
+        with transaction.atomic():
+            # Chunk the lookups to fit into query parameters limits
+            for start in range(0, len(keys), 500):
+                StatsData.objects.filter(
+                    key__in=keys[start:start + 500]
+                ).delete()
+            StatsData.objects.bulk_create(
+                [
+                    StatsData(key=key, data=value)
+                    for key, value in data.items()
+                ],
+                batch_size=500
+            )
+    except IntegrityError:
+        # Saved concurrently by other process, the cache is still valid
+        pass
+
+
+def get_unit_counts(unit):
+    """Return contribution of single unit to the basic stats."""
+    translated = unit.state >= STATE_TRANSLATED
+    approved = unit.state >= STATE_APPROVED
+    matches = {
+        'all': True,
+        'fuzzy': unit.state == STATE_FUZZY,
+        'translated': translated,
+        'approved': approved,
+        'untranslated': not translated,
+        'allchecks': unit.has_failing_check,
+        'suggestions': unit.has_suggestion,
+        'comments': unit.has_comment,
+        'approved_suggestions': approved and unit.has_suggestion,
+    }
+    result = {}
+    for key, match in matches.items():
+        result[key] = 1 if match else 0
+        result['{}_words'.format(key)] = unit.num_words if match else 0
+    return result
+
+
+def get_unit_delta(old, new):
+    """Return difference in basic stats caused by unit change."""
+    old_counts = get_unit_counts(old)
+    new_counts = get_unit_counts(new)
+    return {
+        key: value - old_counts[key]
+        for key, value in new_counts.items()
+        if value != old_counts[key]
+    }
+
+
 class BaseStats(object):
     """Caching statistics calculator."""
     basic_keys = BASIC_KEYS
@@ -76,6 +196,12 @@ class BaseStats(object):
     def is_loaded(self):
         return self._data is not None
 
+    @property
+    def has_basic(self):
+        if self._data is None:
+            self._data = self.load()
+        return 'all' in self._data
+
     def set_data(self, data):
         self._data = data
 
@@ -87,6 +213,9 @@ class BaseStats(object):
         if not lookup:
             return
         data = cache.get_many(lookup.keys())
+        missing = set(lookup.keys()) - set(data.keys())
+        if missing:
+            data.update(load_persistent(missing))
         for item, value in data.items():
             lookup[item].set_data(value)
         for item in set(lookup.keys()) - set(data.keys()):
@@ -117,16 +246,68 @@ class BaseStats(object):
         return self._data[name]
 
     def load(self):
-        return cache.get(self.cache_key, {})
+        data = cache.get(self.cache_key)
+        if data is None:
+            data = load_persistent([self.cache_key]).get(self.cache_key, {})
+        return data
 
     def save(self):
-        """Save stats to cache."""
-        cache.set(self.cache_key, self._data, 30 * 86400)
+        """Save stats to cache and database."""
+        cache.set(self.cache_key, self._data, CACHE_TIMEOUT)
+        StatsData.objects.update_or_create(
+            key=self.cache_key,
+            defaults={'data': self._data}
+        )
 
     def invalidate(self, language=None):
-        """Invalidate local and cache data."""
+        """Invalidate local, cache and database data."""
         self._data = {}
         cache.delete(self.cache_key)
+        StatsData.objects.filter(key=self.cache_key).delete()
+
+    def apply_delta(self, delta, language=None):
+        """Incrementally update basic stats.
+
+        Only already calculated stats are updated, missing ones will be
+        calculated on next access. The update is done under per object
+        lock to avoid losing concurrent updates.
+        """
+        if not delta:
+            return
+        lock_key = '{}-lock'.format(self.cache_key)
+        for dummy in range(LOCK_ATTEMPTS):
+            if cache.add(lock_key, True, LOCK_TIMEOUT):
+                break
+            time.sleep(LOCK_DELAY)
+        else:
+            # Somebody else is updating the stats for too long, drop them
+            # to be calculated again instead of risking lost update
+            BaseStats.invalidate(self)
+            return
+        try:
+            # Always work on current data, other process might have applied
+            # delta since we've loaded them
+            self._data = self.load()
+            if 'all' not in self._data:
+                return
+            # Keep only counts which can be updated, rest is calculated
+            # again when needed
+            self._data = {
+                key: value for key, value in self._data.items()
+                if key in DELTA_KEYS
+            }
+            for key, value in delta.items():
+                self._data[key] += value
+            self.calculate_basic_percents()
+            self.save()
+        finally:
+            cache.delete(lock_key)
+
+    def delete(self):
+        """Remove stored data for deleted object."""
+        self._data = {}
+        cache.delete(self.cache_key)
+        StatsData.objects.filter(key=self.cache_key).delete()
 
     def store(self, key, value):
         if self._data is None:
@@ -143,9 +324,7 @@ class BaseStats(object):
     def ensure_basic(self, save=True):
         """Ensure we have basic stats."""
         # Prefetch basic stats at once
-        if self._data is None:
-            self._data = self.load()
-        if 'all' not in self._data:
+        if not self.has_basic:
             self.prefetch_basic()
             if save:
                 self.save()
@@ -197,6 +376,12 @@ class DummyTranslationStats(BaseStats):
     def load(self):
         return {}
 
+    def invalidate(self, language=None):
+        return
+
+    def apply_delta(self, delta, language=None):
+        return
+
     def calculate_item(self, item):
         return 0
 
@@ -213,49 +398,32 @@ class TranslationStats(BaseStats):
         )
         self._object.language.stats.invalidate()
 
+    def apply_delta(self, delta, language=None):
+        super(TranslationStats, self).apply_delta(delta)
+        self._object.component.stats.apply_delta(
+            delta, language=self._object.language
+        )
+        self._object.language.stats.apply_delta(delta)
+
+    def update_unit(self, old, new):
+        """Update stats based on changed unit."""
+        if old.num_words != new.num_words:
+            # Source stats can not be updated incrementally
+            self._object.invalidate_cache()
+        else:
+            self.apply_delta(get_unit_delta(old, new))
+
     @property
     def language(self):
         return self._object.language
 
     def prefetch_basic(self):
-        stats = self._object.unit_set.aggregate(
-            all=Count('id'),
-            all_words=Sum('num_words'),
-            fuzzy=conditional_sum(1, state=STATE_FUZZY),
-            fuzzy_words=conditional_sum(
-                'num_words', state=STATE_FUZZY
-            ),
-            translated=conditional_sum(1, state__gte=STATE_TRANSLATED),
-            translated_words=conditional_sum(
-                'num_words', state__gte=STATE_TRANSLATED
-            ),
-            nottranslated=conditional_sum(1, state=STATE_EMPTY),
-            nottranslated_words=conditional_sum(
-                'num_words', state=STATE_EMPTY
-            ),
-            approved=conditional_sum(1, state__gte=STATE_APPROVED),
-            approved_words=conditional_sum(
-                'num_words', state__gte=STATE_APPROVED
-            ),
-            allchecks=conditional_sum(1, has_failing_check=True),
-            allchecks_words=conditional_sum(
-                'num_words', has_failing_check=True
-            ),
-            suggestions=conditional_sum(1, has_suggestion=True),
-            suggestions_words=conditional_sum(
-                1, has_suggestion=True
-            ),
-            comments=conditional_sum(1, has_comment=True),
-            comments_words=conditional_sum(
-                'num_words', has_comment=True,
-            ),
-            approved_suggestions=conditional_sum(
-                1, state__gte=STATE_APPROVED, has_suggestion=True
-            ),
-            approved_suggestions_words=conditional_sum(
-                'num_words', state__gte=STATE_APPROVED, has_suggestion=True
-            ),
+        self.store_basic(
+            self._object.unit_set.aggregate(**get_basic_aggregates())
         )
+
+    def store_basic(self, stats):
+        """Store result of basic aggregates."""
         for key, value in stats.items():
             self.store(key, value)
 
@@ -345,6 +513,12 @@ class ComponentStats(LanguageStats):
         for clist in self._object.componentlist_set.all():
             clist.stats.invalidate()
 
+    def apply_delta(self, delta, language=None):
+        super(ComponentStats, self).apply_delta(delta)
+        self._object.project.stats.apply_delta(delta, language=language)
+        for clist in self._object.componentlist_set.all():
+            clist.stats.apply_delta(delta)
+
     def get_language_stats(self):
         for translation in self.translation_set:
             yield TranslationStats(translation)
@@ -393,10 +567,63 @@ class ProjectStats(BaseStats):
             for lang in self._object.get_languages():
                 self.get_single_language_stats(lang).invalidate()
 
+    def apply_delta(self, delta, language=None):
+        super(ProjectStats, self).apply_delta(delta)
+        if language:
+            self.get_single_language_stats(language).apply_delta(delta)
+
+    def delete(self):
+        super(ProjectStats, self).delete()
+        StatsData.objects.filter(
+            key__startswith='{}-'.format(self.cache_key)
+        ).delete()
+
     @cached_property
     def component_set(self):
         return prefetch_stats(self._object.component_set.all())
 
+    @cached_property
+    def translation_set(self):
+        """Return all translations in a project with basic stats.
+
+        The missing translation stats are calculated using single query
+        grouped by translation.
+        """
+        from weblate.trans.models import Translation, Unit
+        result = prefetch_stats(list(
+            Translation.objects.filter(component__project=self._object)
+        ))
+        missing = {
+            translation.pk: translation.stats
+            for translation in result if not translation.stats.has_basic
+        }
+        if missing:
+            aggregates = get_basic_aggregates()
+            keys = list(missing.keys())
+            stats = []
+            # Chunk the lookups to fit into query parameters limits
+            for start in range(0, len(keys), 500):
+                stats.extend(Unit.objects.filter(
+                    translation_id__in=keys[start:start + 500]
+                ).order_by().values('translation').annotate(**aggregates))
+            for item in stats:
+                missing[item.pop('translation')].store_basic(item)
+            # Translations without units
+            for translation_stats in missing.values():
+                if not translation_stats.has_basic:
+                    translation_stats.store_basic(
+                        {key: 0 for key in aggregates}
+                    )
+            save_stats(missing.values())
+        return result
+
+    def group_translations(self, attribute):
+        """Group project translations by given attribute."""
+        result = defaultdict(list)
+        for translation in self.translation_set:
+            result[getattr(translation, attribute)].append(translation)
+        return result
+
     def get_single_language_stats(self, language):
         return ProjectLanguageStats(self._object, language)
 
@@ -404,9 +631,28 @@ class ProjectStats(BaseStats):
         result = []
         for language in self._object.get_languages():
             result.append(self.get_single_language_stats(language))
-        return prefetch_stats(result)
+        prefetch_stats(result)
+        missing = [stats for stats in result if not stats.has_basic]
+        if missing:
+            translations = self.group_translations('language_id')
+            for stats in missing:
+                stats.translation_set = translations[stats.language.pk]
+                stats.ensure_basic(save=False)
+            save_stats(missing)
+        return result
 
     def prefetch_basic(self):
+        missing = [
+            component for component in self.component_set
+            if not component.stats.has_basic
+        ]
+        if missing:
+            translations = self.group_translations('component_id')
+            for component in missing:
+                component.stats.translation_set = translations[component.pk]
+                component.stats.ensure_basic(save=False)
+            save_stats([component.stats for component in missing])
+
         stats = {item: 0 for item in self.basic_keys}
         for component in self.component_set:
             stats_obj = component.stats
@@ -182,9 +182,14 @@ class Repository(object):
         # On Windows we pass Unicode object, on others UTF-8 encoded bytes
         if sys.platform != "win32":
             args = [arg.encode('utf-8') for arg in args]
-        self.last_output = self._popen(
-            args, self.path, fullcmd=fullcmd, local=self.local
-        )
+        try:
+            self.last_output = self._popen(
+                args, self.path, fullcmd=fullcmd, local=self.local
+            )
+        finally:
+            # Operations holding the lock can change revisions
+            if needs_lock:
+                self.clean_revision_cache()
         return self.last_output
 
     def clean_revision_cache(self):
@@ -340,6 +345,19 @@ class Repository(object):
 
         return objhash.hexdigest()
 
+    def get_object_hashes(self, paths):
+        """Return mapping of paths to hashes of objects in the VCS.
+
+        Paths which can not be hashed are not included in the result.
+        """
+        result = {}
+        for path in paths:
+            try:
+                result[path] = self.get_object_hash(path)
+            except (IOError, OSError, ValueError):
+                continue
+        return result
+
     def configure_remote(self, pull_url, push_url, branch):
         """Configure remote repository."""
         raise NotImplementedError()
@@ -356,6 +374,13 @@ class Repository(object):
         """Return content of file at given revision."""
         raise NotImplementedError()
 
+    def list_changed_files(self, revision):
+        """Return list of files changed between revision and current one.
+
+        Renamed files are listed under both old and new name.
+        """
+        raise NotImplementedError()
+
     @staticmethod
     def get_examples_paths():
         """Generator of possible paths for examples."""
@@ -20,31 +20,122 @@
 """Git based version control system abstraction for Weblate needs."""
 
 from __future__ import unicode_literals
+from collections import OrderedDict
 import email.utils
 import os
 import os.path
+import subprocess
+import threading
 
 from dateutil import parser
 
 from defusedxml import ElementTree
 
 from django.conf import settings
+from django.core.cache import cache
 from django.utils.functional import cached_property
 
 from weblate.trans.util import get_clean_env
 from weblate.vcs.ssh import get_wrapper_filename
 from weblate.vcs.base import Repository, RepositoryException
 
+CAT_FILE_LOCK = threading.Lock()
+CAT_FILES = OrderedDict()
+CAT_FILE_LIMIT = 50
+
+
+class GitCatFile(object):
+    """Long running git cat-file process serving object lookups."""
+    def __init__(self, path, env):
+        self.path = path
+        self.pid = os.getpid()
+        self.inode = self.get_inode(path)
+        self.lock = threading.Lock()
+        with open(os.devnull, 'wb') as devnull:
+            self.process = subprocess.Popen(
+                ['git', 'cat-file', '--batch'],
+                cwd=path,
+                env=env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=devnull,
+            )
+
+    @staticmethod
+    def get_inode(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_dev, stat.st_ino)
+
+    def is_valid(self):
+        """Check whether process can still serve the repository.
+
+        The process is not usable in forked children and once the
+        repository has been removed or recreated in place.
+        """
+        return (
+            self.pid == os.getpid() and
+            self.process.poll() is None and
+            self.inode == self.get_inode(self.path)
+        )
+
+    def close(self):
+        """Terminate the process, unless it belongs to parent process."""
+        if self.pid != os.getpid():
+            return
+        try:
+            self.process.stdin.close()
+            self.process.stdout.close()
+            self.process.wait()
+        except (IOError, OSError):
+            pass
+
+    def query(self, name):
+        """Return hash, type and content of object or None if missing."""
+        if '\n' in name:
+            return None
+        with self.lock:
+            self.process.stdin.write(name.encode('utf-8') + b'\n')
+            self.process.stdin.flush()
+            header = self.process.stdout.readline().split()
+            if not header:
+                raise IOError('git cat-file has terminated')
+            if header[-1] in (b'missing', b'ambiguous'):
+                return None
+            objhash, objtype, size = header
+            data = self.process.stdout.read(int(size) + 1)[:-1]
+        return objhash.decode('ascii'), objtype.decode('ascii'), data
+
+
+def get_cat_file(path, env):
+    """Return cat-file process for given repository path."""
+    with CAT_FILE_LOCK:
+        cat_file = CAT_FILES.pop(path, None)
+        if cat_file is not None and not cat_file.is_valid():
+            cat_file.close()
+            cat_file = None
+        if cat_file is None:
+            cat_file = GitCatFile(path, env)
+        # Keep the most recently used at the end
+        CAT_FILES[path] = cat_file
+        while len(CAT_FILES) > CAT_FILE_LIMIT:
+            CAT_FILES.popitem(last=False)[1].close()
+        return cat_file
+
+
+def drop_cat_file(path):
+    """Stop cat-file process for given repository path."""
+    with CAT_FILE_LOCK:
+        cat_file = CAT_FILES.pop(path, None)
+    if cat_file is not None:
+        cat_file.close()
+
 
 class GitRepository(Repository):
     """Repository implementation for Git."""
     _cmd = 'git'
-    _cmd_last_revision = [
-        'log', '-n', '1', '--format=format:%H', 'HEAD'
-    ]
-    _cmd_last_remote_revision = [
-        'log', '-n', '1', '--format=format:%H', '@{upstream}'
-    ]
     _cmd_update_remote = ['fetch', 'origin']
     _cmd_push = ['push', 'origin']
     name = 'Git'
@@ -159,6 +250,52 @@ class GitRepository(Repository):
         status = self.execute(cmd, needs_lock=False)
         return status != ''
 
+    def get_object_hashes(self, paths):
+        """Return mapping of paths to hashes of objects in the VCS.
+
+        Hashes of files not modified in the working tree are taken from
+        the index using single git invocation, content of remaining files
+        is hashed.
+        """
+        resolved = {}
+        for path in paths:
+            try:
+                resolved[path] = self.resolve_symlinks(path)
+            except ValueError:
+                continue
+        if not resolved:
+            return {}
+        output = self.execute(
+            [
+                'ls-files', '--cached', '--modified', '--stage', '-t', '-z',
+                '--'
+            ] + sorted(set(resolved.values())),
+            needs_lock=False
+        )
+        staged = {}
+        changed = set()
+        for item in output.split('\0'):
+            if not item:
+                continue
+            info, name = item.split('\t', 1)
+            tag, mode, objhash, stage = info.split()
+            # Symlinks, merge conflicts or modified files
+            if tag != 'H' or mode == '120000' or stage != '0':
+                changed.add(name)
+            else:
+                staged[name] = objhash
+        result = {}
+        remaining = []
+        for path, name in resolved.items():
+            if name in staged and name not in changed:
+                result[path] = staged[name]
+            else:
+                remaining.append(path)
+        result.update(
+            super(GitRepository, self).get_object_hashes(remaining)
+        )
+        return result
+
     def show(self, revision):
         """Helper method to get content of revision.
 
@@ -221,21 +358,83 @@ class GitRepository(Repository):
             needs_lock=False
         )
 
+    def cat_file(self, name):
+        """Look up object using persistent git cat-file process.
+
+        Returns tuple of object hash, type and content or None if there
+        is no such object.
+        """
+        env = {} if self.local else get_clean_env()
+        try:
+            return get_cat_file(self.path, env).query(name)
+        except (IOError, OSError, ValueError):
+            # Restart the process and retry once
+            drop_cat_file(self.path)
+        try:
+            return get_cat_file(self.path, env).query(name)
+        except (IOError, OSError, ValueError) as error:
+            drop_cat_file(self.path)
+            raise RepositoryException(
+                0, 'git cat-file failed: {0}'.format(error), ''
+            )
+
+    def resolve_revision(self, revision):
+        """Return object hash for given revision."""
+        if '@{' in revision:
+            # Errors in reflog syntax terminate cat-file
+            return self.execute(
+                ['rev-parse', '--verify', revision],
+                needs_lock=False
+            ).strip()
+        result = self.cat_file(revision)
+        if result is None:
+            raise RepositoryException(
+                128, "fatal: bad revision '{0}'".format(revision), ''
+            )
+        return result[0]
+
+    @cached_property
+    def last_revision(self):
+        """Return last local revision."""
+        return self.resolve_revision('HEAD')
+
+    @cached_property
+    def last_remote_revision(self):
+        """Return last remote revision."""
+        return self.resolve_revision('@{upstream}')
+
+    def get_remote_branch_name(self):
+        """Return the remote branch name."""
+        return 'origin/{0}'.format(self.branch)
+
+    def _has_revisions(self, source, target):
+        """Check whether there are revisions in target missing in source.
+
+        The result is cached by revision hashes, so it is automatically
+        invalidated by any commit, merge or fetch.
+        """
+        source = self.resolve_revision(source)
+        target = self.resolve_revision(target)
+        key = 'git-revisions-{0}-{1}'.format(source, target)
+        result = cache.get(key)
+        if result is None:
+            result = self._log_revisions(
+                '{0}..{1}'.format(source, target)
+            ) != ''
+            cache.set(key, result, 86400)
+        return result
+
     def needs_merge(self):
         """Check whether repository needs merge with upstream
         (is missing some revisions).
         """
-        return self._log_revisions(
-            '..origin/{0}'.format(self.branch)
-        ) != ''
+        return self._has_revisions('HEAD', self.get_remote_branch_name())
 
     def needs_push(self):
         """Check whether repository needs push to upstream
         (has additional revisions).
         """
-        return self._log_revisions(
-            'origin/{0}..'.format(self.branch)
-        ) != ''
+        return self._has_revisions(self.get_remote_branch_name(), 'HEAD')
 
     @classmethod
     def _get_version(cls):
@@ -358,10 +557,32 @@ class GitRepository(Repository):
 
     def get_file(self, path, revision):
         """Return content of file at given revision."""
-        return self.execute(
-            ['show', '{0}:{1}'.format(revision, path)],
+        result = self.cat_file(
+            '{0}:{1}'.format(self.resolve_revision(revision), path)
+        )
+        if result is None:
+            raise RepositoryException(
+                128,
+                "fatal: path '{0}' does not exist in '{1}'".format(
+                    path, revision
+                ),
+                ''
+            )
+        return result[2].decode('utf-8')
+
+    def list_changed_files(self, revision):
+        """Return list of files changed between revision and current one.
+
+        Renamed files are listed under both old and new name.
+        """
+        output = self.execute(
+            [
+                'diff', '--name-only', '--no-renames', '-z',
+                '{0}..HEAD'.format(revision), '--'
+            ],
             needs_lock=False
         )
+        return [name for name in output.split('\0') if name]
 
 
 class GitWithGerritRepository(GitRepository):
@@ -486,22 +707,6 @@ class SubversionRepository(GitRepository):
         else:
             self.execute(['svn', 'rebase'])
 
-    def needs_merge(self):
-        """Check whether repository needs merge with upstream
-        (is missing some revisions).
-        """
-        return self._log_revisions(
-            '..{0}'.format(self.get_remote_branch_name())
-        ) != ''
-
-    def needs_push(self):
-        """Check whether repository needs push to upstream
-        (has additional revisions).
-        """
-        return self._log_revisions(
-            '{0}..'.format(self.get_remote_branch_name())
-        ) != ''
-
     def reset(self):
         """Reset working copy to match remote branch."""
         self.execute(['reset', '--hard', self.get_remote_branch_name()])
@@ -510,13 +715,7 @@ class SubversionRepository(GitRepository):
     @cached_property
     def last_remote_revision(self):
         """Return last remote revision."""
-        return self.execute(
-            [
-                'log', '-n', '1', '--format=format:%H',
-                self.get_remote_branch_name()
-            ],
-            needs_lock=False
-        )
+        return self.resolve_revision(self.get_remote_branch_name())
 
     def get_remote_branch_name(self):
         """Return the remote branch name: trunk if local branch is master,
@@ -352,3 +352,17 @@ class HgRepository(Repository):
             ['cat', '--rev', revision, path],
             needs_lock=False
         )
+
+    def list_changed_files(self, revision):
+        """Return list of files changed between revision and current one.
+
+        Renamed files are listed under both old and new name.
+        """
+        output = self.execute(
+            [
+                'status', '--rev', revision, '--rev', '.',
+                '--modified', '--added', '--removed', '--no-status', '--print0'
+            ],
+            needs_lock=False
+        )
+        return [name for name in output.split('\0') if name]
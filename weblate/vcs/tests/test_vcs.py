@@ -31,7 +31,7 @@ from weblate.trans.tests.utils import RepoTestMixin
 from weblate.vcs.base import RepositoryException
 from weblate.vcs.git import (
     GitRepository, GitWithGerritRepository, GithubRepository,
-    SubversionRepository
+    SubversionRepository, get_cat_file, drop_cat_file,
 )
 from weblate.vcs.mercurial import HgRepository
 from weblate.trans.tests.utils import (
@@ -351,6 +351,25 @@ class VCSGitTest(TestCase, RepoTestMixin, TempDirMixin):
             40
         )
 
+    def test_list_changed_files(self):
+        original = self.repo.last_revision
+        self.assertEqual(self.repo.list_changed_files(original), [])
+        self.test_merge_remote()
+        self.assertEqual(self.repo.list_changed_files(original), ['test2'])
+
+    def test_object_hashes(self):
+        with open(os.path.join(self.tempdir, 'README.md'), 'a') as handle:
+            handle.write('CHANGE')
+        paths = ['po/cs.po', 'README.md', 'nonexisting']
+        hashes = self.repo.get_object_hashes(paths)
+        self.assertEqual(
+            hashes,
+            {
+                'po/cs.po': self.repo.get_object_hash('po/cs.po'),
+                'README.md': self.repo.get_object_hash('README.md'),
+            }
+        )
+
     def test_configure_remote(self):
         with self.repo.lock:
             self.repo.configure_remote('pullurl', 'pushurl', 'branch')
@@ -402,6 +421,45 @@ class VCSGitTest(TestCase, RepoTestMixin, TempDirMixin):
             self.repo.get_file('po/cs.po', self.repo.last_revision)
         )
 
+    def test_get_file_missing(self):
+        self.assertRaises(
+            RepositoryException,
+            self.repo.get_file,
+            'po/nonexisting.po',
+            self.repo.last_revision
+        )
+
+    def test_cat_file(self):
+        if not isinstance(self.repo, GitRepository):
+            raise SkipTest('Not supported')
+        result = self.repo.cat_file('HEAD')
+        self.assertEqual(result[0], self.repo.last_revision)
+        self.assertEqual(result[1], 'commit')
+        self.assertIsNone(self.repo.cat_file('nonexisting'))
+        # The process is reused
+        process = get_cat_file(self.tempdir, {})
+        self.repo.cat_file('HEAD')
+        self.assertIs(process, get_cat_file(self.tempdir, {}))
+        # Terminated process is restarted
+        process.process.kill()
+        process.process.wait()
+        self.assertEqual(
+            self.repo.cat_file('HEAD')[0], self.repo.last_revision
+        )
+        self.assertIsNot(process, get_cat_file(self.tempdir, {}))
+        drop_cat_file(self.tempdir)
+
+    def test_revision_after_merge(self):
+        self.add_remote_commit()
+        original = self.repo.last_revision
+        with self.repo.lock:
+            self.repo.update_remote()
+        self.assertTrue(self.repo.needs_merge())
+        with self.repo.lock:
+            self.repo.merge()
+        self.assertNotEqual(original, self.repo.last_revision)
+        self.assertFalse(self.repo.needs_merge())
+
 
 class VCSGerritTest(VCSGitTest):
     _class = GitWithGerritRepository
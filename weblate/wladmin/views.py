@@ -24,6 +24,7 @@ from django.core.checks import run_checks
 from django.shortcuts import render, redirect
 from django.utils.translation import ugettext as _
 
+from weblate.machinery.metrics import get_all_metrics
 from weblate.trans.models import Component
 from weblate.vcs.ssh import (
     generate_ssh_key, get_key_data, add_host_key,
@@ -69,6 +70,7 @@ def performance(request, admin_site):
     context['checks'] = wl_run_checks(request)
     context['django_errors'] = run_checks(include_deployment_checks=True)
     context['errors'] = ConfigurationError.objects.filter(ignored=False)
+    context['machinery'] = get_all_metrics()
 
     return render(
         request,